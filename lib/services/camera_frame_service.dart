@@ -1,18 +1,28 @@
 import 'package:camera/camera.dart';
 import 'package:image/image.dart' as img;
 import 'dart:typed_data';
+import 'websocket_service.dart';
 
 class CameraFrameService {
   /// Convert CameraImage to JPEG bytes
-  static Future<Uint8List> cameraImageToJpeg(CameraImage image) async {
+  ///
+  /// Without [settings] the full frame is encoded at quality 80. With
+  /// settings from the server it is scaled down to their `maxWidth` and
+  /// encoded at their `jpegQuality`; with [mouthCrop] only the server's mouth
+  /// ROI is encoded, resized to the model's crop size.
+  static Future<Uint8List> cameraImageToJpeg(
+    CameraImage image, {
+    CaptureSettings? settings,
+    bool mouthCrop = false,
+  }) async {
     try {
       // Handle different image formats
       if (image.format.group == ImageFormatGroup.yuv420) {
-        return _convertYUV420toJpeg(image);
+        return _convertYUV420toJpeg(image, settings, mouthCrop);
       } else if (image.format.group == ImageFormatGroup.bgra8888) {
-        return _convertBGRA8888toJpeg(image);
+        return _convertBGRA8888toJpeg(image, settings, mouthCrop);
       } else if (image.format.group == ImageFormatGroup.nv21) {
-        return _convertNV21toJpeg(image);
+        return _convertNV21toJpeg(image, settings, mouthCrop);
       }
 
       throw Exception('Unsupported image format: ${image.format.group}');
@@ -23,7 +33,8 @@ class CameraFrameService {
   }
 
   /// Convert YUV420 to JPEG
-  static Uint8List _convertYUV420toJpeg(CameraImage image) {
+  static Uint8List _convertYUV420toJpeg(
+      CameraImage image, CaptureSettings? settings, bool mouthCrop) {
     final width = image.width;
     final height = image.height;
 
@@ -60,11 +71,12 @@ class CameraFrameService {
     }
 
     // Encode to JPEG
-    return _encodeToJpeg(rgbData, width, height);
+    return _encodeToJpeg(rgbData, width, height, settings, mouthCrop);
   }
 
   /// Convert BGRA8888 to JPEG
-  static Uint8List _convertBGRA8888toJpeg(CameraImage image) {
+  static Uint8List _convertBGRA8888toJpeg(
+      CameraImage image, CaptureSettings? settings, bool mouthCrop) {
     final width = image.width;
     final height = image.height;
 
@@ -79,11 +91,12 @@ class CameraFrameService {
       rgbIndex += 3;
     }
 
-    return _encodeToJpeg(rgbData, width, height);
+    return _encodeToJpeg(rgbData, width, height, settings, mouthCrop);
   }
 
   /// Convert NV21 to JPEG
-  static Uint8List _convertNV21toJpeg(CameraImage image) {
+  static Uint8List _convertNV21toJpeg(
+      CameraImage image, CaptureSettings? settings, bool mouthCrop) {
     final width = image.width;
     final height = image.height;
 
@@ -116,13 +129,14 @@ class CameraFrameService {
       }
     }
 
-    return _encodeToJpeg(rgbData, width, height);
+    return _encodeToJpeg(rgbData, width, height, settings, mouthCrop);
   }
 
   /// Encode RGB data to JPEG
-  static Uint8List _encodeToJpeg(Uint8List rgbData, int width, int height) {
+  static Uint8List _encodeToJpeg(Uint8List rgbData, int width, int height,
+      CaptureSettings? settings, bool mouthCrop) {
     // Create image from RGB data
-    final image = img.Image.fromBytes(
+    var image = img.Image.fromBytes(
       width: width,
       height: height,
       bytes: rgbData.buffer,
@@ -130,7 +144,32 @@ class CameraFrameService {
       numChannels: 3,
     );
 
+    if (settings == null) {
+      // Encode to JPEG
+      return Uint8List.fromList(img.encodeJpg(image, quality: 80));
+    }
+
+    final roi = settings.roi;
+    if (mouthCrop && roi != null) {
+      // The ROI is in pixels of the (scaled) full frames the server received
+      final scale = width > settings.maxWidth ? width / settings.maxWidth : 1.0;
+      final x = (roi.x * scale).round().clamp(0, width - 1).toInt();
+      final y = (roi.y * scale).round().clamp(0, height - 1).toInt();
+      image = img.copyCrop(
+        image,
+        x: x,
+        y: y,
+        width: (roi.width * scale).round().clamp(1, width - x).toInt(),
+        height: (roi.height * scale).round().clamp(1, height - y).toInt(),
+      );
+      image = img.copyResize(image,
+          width: settings.cropWidth, height: settings.cropHeight);
+    } else if (width > settings.maxWidth) {
+      image = img.copyResize(image, width: settings.maxWidth);
+    }
+
     // Encode to JPEG
-    return Uint8List.fromList(img.encodeJpg(image, quality: 80));
+    return Uint8List.fromList(
+        img.encodeJpg(image, quality: settings.jpegQuality));
   }
 }
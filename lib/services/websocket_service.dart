@@ -4,19 +4,97 @@ import 'dart:typed_data';
 import 'package:web_socket_channel/web_socket_channel.dart';
 import 'package:web_socket_channel/status.dart' as status;
 
+/// Mouth region reported by the server, in pixels of the full frames we send
+class MouthRoi {
+  final int x;
+  final int y;
+  final int width;
+  final int height;
+
+  const MouthRoi(this.x, this.y, this.width, this.height);
+
+  factory MouthRoi.fromJson(Map<String, dynamic> json) =>
+      MouthRoi(json['x'], json['y'], json['width'], json['height']);
+}
+
+/// Capture settings pushed by the server in `capture_settings` messages
+class CaptureSettings {
+  final int level;
+  final int fps;
+  final int jpegQuality;
+  final int maxWidth;
+  final MouthRoi? roi;
+  final int cropWidth;
+  final int cropHeight;
+  final int fullFrameInterval;
+
+  const CaptureSettings({
+    this.level = 0,
+    this.fps = 10,
+    this.jpegQuality = 80,
+    this.maxWidth = 640,
+    this.roi,
+    this.cropWidth = 140,
+    this.cropHeight = 46,
+    this.fullFrameInterval = 10,
+  });
+
+  factory CaptureSettings.fromJson(Map<String, dynamic> json) {
+    final crop = json['crop_size'] ?? {};
+    return CaptureSettings(
+      level: json['level'] ?? 0,
+      fps: json['fps'] ?? 10,
+      jpegQuality: json['jpeg_quality'] ?? 80,
+      maxWidth: json['max_width'] ?? 640,
+      roi: json['roi'] != null ? MouthRoi.fromJson(json['roi']) : null,
+      cropWidth: crop['width'] ?? 140,
+      cropHeight: crop['height'] ?? 46,
+      fullFrameInterval: json['full_frame_interval'] ?? 10,
+    );
+  }
+
+  CaptureSettings withRoi(MouthRoi? roi) => CaptureSettings(
+        level: level,
+        fps: fps,
+        jpegQuality: jpegQuality,
+        maxWidth: maxWidth,
+        roi: roi,
+        cropWidth: cropWidth,
+        cropHeight: cropHeight,
+        fullFrameInterval: fullFrameInterval,
+      );
+
+  /// Minimum time between two frames
+  Duration get frameInterval => Duration(milliseconds: 1000 ~/ fps);
+}
+
 class WebSocketService {
   late WebSocketChannel _channel;
   late StreamController<String> _predictionController;
   late StreamController<bool> _connectionController;
+  late StreamController<CaptureSettings> _captureSettingsController;
   late Timer _pingTimer;
   
   bool _isConnected = false;
   final String _serverUrl;
 
+  // Until the server says otherwise, send full frames at 10 fps
+  CaptureSettings _captureSettings = const CaptureSettings();
+  final Stopwatch _sinceLastFrame = Stopwatch();
+  int _frameSeq = 0;
+  int _framesSinceFullFrame = 0;
+  bool _binaryNegotiated = false;
+
+  // Binary frame header (see src/utils/frame_protocol.py)
+  static const int _headerSize = 28;
+  static const int _msgJpegFrame = 1;
+  static const int _flagMouthCrop = 0x02;
+
   WebSocketService({String serverUrl = 'ws://localhost:8000/ws'})
       : _serverUrl = serverUrl {
     _predictionController = StreamController<String>.broadcast();
     _connectionController = StreamController<bool>.broadcast();
+    _captureSettingsController = StreamController<CaptureSettings>.broadcast();
   }
 
   /// Get stream of predictions
@@ -25,13 +103,36 @@ class WebSocketService {
   /// Get stream of connection status
   Stream<bool> get connectionStream => _connectionController.stream;
 
+  /// Get stream of capture settings changes from the server
+  Stream<CaptureSettings> get captureSettingsStream =>
+      _captureSettingsController.stream;
+
+  /// Current capture settings
+  CaptureSettings get captureSettings => _captureSettings;
+
   /// Check if connected
   bool get isConnected => _isConnected;
 
+  /// Whether a new frame is due at the server's recommended frame rate.
+  /// Check this before converting a camera image so skipped frames cost nothing.
+  bool shouldSendFrame() {
+    return !_sinceLastFrame.isRunning ||
+        _sinceLastFrame.elapsed >= _captureSettings.frameInterval;
+  }
+
+  /// Whether the next frame should be sent cropped to the mouth ROI; every
+  /// `fullFrameInterval` frames a full frame lets the server re-detect the face
+  bool get shouldSendMouthCrop =>
+      _captureSettings.roi != null &&
+      _framesSinceFullFrame < _captureSettings.fullFrameInterval - 1;
+
   /// Connect to WebSocket server
   Future<void> connect() async {
     try {
       _channel = WebSocketChannel.connect(Uri.parse(_serverUrl));
+      // A new session starts without a tracked mouth or binary protocol
+      _captureSettings = const CaptureSettings();
+      _binaryNegotiated = false;
 
       await _channel.ready;
       _isConnected = true;
@@ -88,11 +189,56 @@ class WebSocketService {
 
       // Send message
       _channel.sink.add(message);
+      _markFrameSent(false);
     } catch (e) {
       print('Error sending frame: $e');
     }
   }
 
+  /// Send a JPEG frame, or the mouth crop of one, as a binary message.
+  /// The binary protocol is negotiated with the server on first use.
+  void sendBinaryFrame(Uint8List frameBytes, {bool mouthCrop = false}) {
+    if (!_isConnected) {
+      print('WebSocket not connected');
+      return;
+    }
+
+    try {
+      if (!_binaryNegotiated) {
+        // Messages are handled in order, so the switch applies to this frame
+        _channel.sink.add(jsonEncode({
+          'type': 'config',
+          'config': {'protocol': 'binary'},
+        }));
+        _binaryNegotiated = true;
+      }
+
+      final header = ByteData(_headerSize)
+        ..setUint8(0, _msgJpegFrame)
+        ..setUint8(1, mouthCrop ? _flagMouthCrop : 0)
+        ..setUint32(4, _frameSeq++ & 0xFFFFFFFF, Endian.little)
+        ..setFloat64(8, DateTime.now().millisecondsSinceEpoch.toDouble(),
+            Endian.little);
+
+      final message = Uint8List(_headerSize + frameBytes.length)
+        ..setAll(0, header.buffer.asUint8List())
+        ..setAll(_headerSize, frameBytes);
+
+      // Send message
+      _channel.sink.add(message);
+      _markFrameSent(mouthCrop);
+    } catch (e) {
+      print('Error sending frame: $e');
+    }
+  }
+
+  void _markFrameSent(bool mouthCrop) {
+    _sinceLastFrame
+      ..reset()
+      ..start();
+    _framesSinceFullFrame = mouthCrop ? _framesSinceFullFrame + 1 : 0;
+  }
+
   /// Handle incoming messages from server
   void _handleMessage(dynamic message) {
     try {
@@ -116,6 +262,15 @@ class WebSocketService {
           print('Server error: $errorMessage');
         } else if (type == 'pong') {
           print('Pong received');
+        } else if (type == 'ping') {
+          // Server round-trip probe: echo its timestamp back
+          _channel.sink.add(jsonEncode({'type': 'pong', 'sent_at': data['sent_at']}));
+        } else if (type == 'capture_settings') {
+          _captureSettings = CaptureSettings.fromJson(data);
+          _captureSettingsController.add(_captureSettings);
+        } else if (type == 'mouth_roi') {
+          _captureSettings = _captureSettings.withRoi(MouthRoi.fromJson(data['roi']));
+          _captureSettingsController.add(_captureSettings);
         }
       }
     } catch (e) {
@@ -167,6 +322,7 @@ class WebSocketService {
     _stopPingTimer();
     _predictionController.close();
     _connectionController.close();
+    _captureSettingsController.close();
     if (_isConnected) {
       _channel.sink.close(status.goingAway);
     }
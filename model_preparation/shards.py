@@ -0,0 +1,341 @@
+"""
+Preprocessed dataset shards
+`modelutils.load_data` decodes every `.mpg` and normalizes it again each time
+an example is loaded. `build` does that work once: each clip is decoded,
+converted to grayscale exactly like `modelutils.load_video`, cropped to the
+46x140 mouth region and padded or trimmed to 75 frames. The frames go into fixed-layout uint8 `.npy` shards,
+and the alignments are encoded with the `char_to_num` layout. `index.json`
+describes the shards and lists every example.
+
+Training streams the shards through `make_dataset` (tf.data with parallel
+interleave and prefetch), reading frames through memory maps. Offline
+evaluation can iterate the same shards with `ShardIndex` and NumPy only.
+
+Usage:
+    python -m model_preparation.shards --videos data/s1 --alignments data/alignments/s1 \
+        --out data/shards/s1 --shard-size 1000 --workers 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+FRAMES = 75
+HEIGHT = 46
+WIDTH = 140
+MAX_LABEL_LENGTH = 40
+# GRID mouth crop, as in modelutils.load_video: frame[190:236, 80:220]
+MOUTH_CROP = (190, 236, 80, 220)
+# Same vocabulary and order as the char_to_num StringLookup (index 0 is the OOV token "")
+VOCAB = [x for x in "abcdefghijklmnopqrstuvwxyz'?!123456789 "]
+VIDEO_EXTENSIONS = (".mpg", ".mp4", ".avi", ".mov")
+
+_CHAR_TO_NUM = {char: i + 1 for i, char in enumerate(VOCAB)}
+
+# tf.image.rgb_to_grayscale weights. modelutils.load_video applies them to the BGR
+# frames cv2 decodes, so blue gets the red weight; the model was trained on that.
+_GRAY_WEIGHTS = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
+
+
+def read_alignment_text(path: str) -> str:
+    """Transcript of a GRID .align file, skipping silence like modelutils.load_alignments"""
+    with open(path, "r") as f:
+        words = [line.split()[2] for line in f if len(line.split()) >= 3]
+    return " ".join(w for w in words if w != "sil")
+
+
+def encode_text(text: str, max_length: int = MAX_LABEL_LENGTH) -> Tuple[np.ndarray, int]:
+    """Encode a transcript with the char_to_num layout; returns (zero-padded labels, length)"""
+    ids = [_CHAR_TO_NUM.get(char, 0) for char in text][:max_length]
+    labels = np.zeros(max_length, dtype=np.int32)
+    labels[:len(ids)] = ids
+    return labels, len(ids)
+
+
+def decode_labels(labels: np.ndarray) -> str:
+    return "".join(VOCAB[i - 1] for i in labels if 0 < i <= len(VOCAB))
+
+
+def to_grayscale(frame: np.ndarray) -> np.ndarray:
+    """(H,W,3) uint8 frame -> (H,W) uint8, matching `tf.image.rgb_to_grayscale` on cv2's BGR frames"""
+    scaled = frame.astype(np.float32) * np.float32(1 / 255)
+    gray = scaled @ _GRAY_WEIGHTS
+    # convert_image_dtype back to uint8: scale by 255.5 and truncate
+    return (gray * np.float32(255.5)).astype(np.uint8)
+
+
+def load_mouth_frames(path: str, frames: int = FRAMES) -> Optional[Tuple[np.ndarray, int]]:
+    """Decode a clip into a (frames, 46, 140) uint8 array.
+
+    Returns (frames, number of real frames before padding), or None when the
+    video cannot be read.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    y1, y2, x1, x2 = MOUTH_CROP
+    clip = []
+    try:
+        while len(clip) < frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            mouth = to_grayscale(frame[y1:y2, x1:x2])
+            if mouth.shape != (HEIGHT, WIDTH):
+                mouth = cv2.resize(mouth, (WIDTH, HEIGHT), interpolation=cv2.INTER_LINEAR)
+            clip.append(mouth)
+    finally:
+        cap.release()
+    if not clip:
+        return None
+    count = len(clip)
+    # Pad by repeating the last frame, like the serving path
+    clip.extend([clip[-1]] * (frames - count))
+    return np.stack(clip), count
+
+
+def _load_example(job: Tuple[str, str]) -> Tuple[str, Optional[Tuple[np.ndarray, int]], Optional[str]]:
+    video_path, align_path = job
+    loaded = load_mouth_frames(video_path)
+    text = read_alignment_text(align_path) if loaded is not None else None
+    return video_path, loaded, text
+
+
+def _find_examples(videos_dir: str, alignments_dir: str) -> List[Tuple[str, str]]:
+    jobs = []
+    missing = 0
+    for name in sorted(os.listdir(videos_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in VIDEO_EXTENSIONS:
+            continue
+        align_path = os.path.join(alignments_dir, stem + ".align")
+        if not os.path.exists(align_path):
+            missing += 1
+            continue
+        jobs.append((os.path.join(videos_dir, name), align_path))
+    if missing:
+        logger.warning(f"Skipped {missing} videos without an alignment file")
+    return jobs
+
+
+class _ShardWriter:
+    """Fills one shard's memory-mapped arrays"""
+
+    def __init__(self, out_dir: str, shard_id: int, capacity: int) -> None:
+        self.shard_id = shard_id
+        self.capacity = capacity
+        self.count = 0
+        self.files = {
+            "frames": f"shard-{shard_id:05d}.frames.npy",
+            "labels": f"shard-{shard_id:05d}.labels.npy",
+            "label_lengths": f"shard-{shard_id:05d}.label_lengths.npy",
+        }
+        self._out_dir = out_dir
+        open_memmap = np.lib.format.open_memmap
+        self.frames = open_memmap(os.path.join(out_dir, self.files["frames"]), mode="w+",
+                                  dtype=np.uint8, shape=(capacity, FRAMES, HEIGHT, WIDTH))
+        self.labels = np.zeros((capacity, MAX_LABEL_LENGTH), dtype=np.int32)
+        self.label_lengths = np.zeros(capacity, dtype=np.int32)
+
+    def add(self, frames: np.ndarray, labels: np.ndarray, length: int) -> int:
+        offset = self.count
+        self.frames[offset] = frames
+        self.labels[offset] = labels
+        self.label_lengths[offset] = length
+        self.count += 1
+        return offset
+
+    def close(self) -> Dict[str, Any]:
+        self.frames.flush()
+        del self.frames
+        frames_path = os.path.join(self._out_dir, self.files["frames"])
+        if self.count < self.capacity:
+            # Last shard: rewrite at its real size so the layout stays (count, 75, 46, 140)
+            full = np.load(frames_path, mmap_mode="r")
+            trimmed = np.array(full[:self.count])
+            del full
+            np.save(frames_path, trimmed)
+        np.save(os.path.join(self._out_dir, self.files["labels"]), self.labels[:self.count])
+        np.save(os.path.join(self._out_dir, self.files["label_lengths"]), self.label_lengths[:self.count])
+        return dict(self.files, count=self.count)
+
+
+def build(videos_dir: str, alignments_dir: str, out_dir: str, shard_size: int = 1000,
+          workers: Optional[int] = None) -> Dict[str, Any]:
+    """Decode every aligned clip once and write shards plus `index.json` to `out_dir`."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = _find_examples(videos_dir, alignments_dir)
+    logger.info(f"Preprocessing {len(jobs)} clips from {videos_dir} into {out_dir}")
+
+    index: Dict[str, Any] = {
+        "version": INDEX_VERSION,
+        "frames": FRAMES,
+        "height": HEIGHT,
+        "width": WIDTH,
+        "max_label_length": MAX_LABEL_LENGTH,
+        "mouth_crop": list(MOUTH_CROP),
+        "vocab": VOCAB,
+        "shards": [],
+        "examples": [],
+    }
+    started = time.perf_counter()
+    writer: Optional[_ShardWriter] = None
+    skipped = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for video_path, loaded, text in pool.map(_load_example, jobs, chunksize=8):
+            if loaded is None:
+                logger.warning(f"Could not read {video_path}")
+                skipped += 1
+                continue
+            if writer is None or writer.count == writer.capacity:
+                if writer is not None:
+                    index["shards"].append(writer.close())
+                writer = _ShardWriter(out_dir, len(index["shards"]), shard_size)
+            frames, frame_count = loaded
+            labels, length = encode_text(text)
+            offset = writer.add(frames, labels, length)
+            index["examples"].append({
+                "name": os.path.splitext(os.path.basename(video_path))[0],
+                "shard": writer.shard_id,
+                "offset": offset,
+                "frame_count": frame_count,
+                "text": text,
+            })
+    if writer is not None:
+        index["shards"].append(writer.close())
+
+    with open(os.path.join(out_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=1)
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Wrote {len(index['examples'])} examples in {len(index['shards'])} shards "
+                f"({skipped} unreadable) in {elapsed:.1f}s")
+    return index
+
+
+class ShardIndex:
+    """Memory-mapped access to built shards, without TensorFlow"""
+
+    def __init__(self, shard_dir: str) -> None:
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, "index.json"), "r") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported shard index version {self.index.get('version')}")
+        self.shards = self.index["shards"]
+        self.examples = self.index["examples"]
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def open_shard(self, shard_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(frames memmap, labels, label lengths) of one shard"""
+        files = self.shards[shard_id]
+        path = lambda key: os.path.join(self.shard_dir, files[key])  # noqa: E731
+        return (np.load(path("frames"), mmap_mode="r"),
+                np.load(path("labels")),
+                np.load(path("label_lengths")))
+
+    def iter_examples(self) -> Iterator[Tuple[Dict[str, Any], np.ndarray]]:
+        """(example entry, (75,46,140) uint8 frames) in shard order, e.g. for offline evaluation"""
+        by_shard: Dict[int, List[Dict[str, Any]]] = {}
+        for example in self.examples:
+            by_shard.setdefault(example["shard"], []).append(example)
+        for shard_id in sorted(by_shard):
+            frames, _, _ = self.open_shard(shard_id)
+            for example in by_shard[shard_id]:
+                yield example, np.asarray(frames[example["offset"]])
+
+
+def make_dataset(shard_dir: str, batch_size: int = 2, shuffle: bool = True, shuffle_buffer: int = 500,
+                 normalize: str = "standardize", cycle_length: int = 4, repeat: bool = False,
+                 seed: Optional[int] = None):
+    """
+    Stream built shards as a batched tf.data pipeline of (frames, labels)
+
+    Args:
+        shard_dir: Directory with `index.json` written by `build`
+        batch_size: Examples per batch
+        shuffle: Shuffle shard order and examples (non-deterministic interleave)
+        shuffle_buffer: Example shuffle buffer size
+        normalize: "standardize" (per-clip mean/std, as modelutils.load_video) or
+            "scale" (x / 255, as the serving path)
+        cycle_length: Shards read concurrently by the parallel interleave
+        repeat: Repeat indefinitely
+        seed: Shuffle seed
+
+    Returns:
+        tf.data.Dataset of ((B,75,46,140,1) float32, (B,40) int64) batches
+    """
+    import tensorflow as tf
+
+    if normalize not in ("standardize", "scale"):
+        raise ValueError(f"Unknown normalization: {normalize}")
+
+    shards = ShardIndex(shard_dir)
+
+    def shard_examples(shard_id):
+        frames, labels, _ = shards.open_shard(int(shard_id))
+        for i in range(len(frames)):
+            # Only this example's pages are read from the memory map
+            yield frames[i], labels[i]
+
+    signature = (
+        tf.TensorSpec((FRAMES, HEIGHT, WIDTH), tf.uint8),
+        tf.TensorSpec((MAX_LABEL_LENGTH,), tf.int32),
+    )
+
+    def read_shard(shard_id):
+        return tf.data.Dataset.from_generator(shard_examples, output_signature=signature, args=(shard_id,))
+
+    def prepare(frames, labels):
+        frames = tf.cast(frames, tf.float32)[..., tf.newaxis]
+        if normalize == "standardize":
+            frames = (frames - tf.reduce_mean(frames)) / tf.maximum(tf.math.reduce_std(frames), 1e-6)
+        else:
+            frames = frames / 255.0
+        return frames, tf.cast(labels, tf.int64)
+
+    dataset = tf.data.Dataset.range(len(shards.shards))
+    if shuffle:
+        dataset = dataset.shuffle(len(shards.shards), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.interleave(
+        read_shard,
+        cycle_length=max(1, min(cycle_length, len(shards.shards))),
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=not shuffle,
+    )
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    if repeat:
+        dataset = dataset.repeat()
+    dataset = dataset.map(prepare, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Preprocess GRID clips into memory-mapped training shards")
+    p.add_argument("--videos", default=os.path.join("data", "s1"), help="Directory of .mpg clips")
+    p.add_argument("--alignments", default=os.path.join("data", "alignments", "s1"), help="Directory of .align files")
+    p.add_argument("--out", default=os.path.join("data", "shards", "s1"), help="Output directory")
+    p.add_argument("--shard-size", type=int, default=1000, help="Examples per shard")
+    p.add_argument("--workers", type=int, default=None, help="Decode processes (default: CPU count)")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    build(args.videos, args.alignments, args.out, shard_size=args.shard_size, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Transcribe a directory (or glob) of videos offline, without the HTTP server.
+
+Videos are decoded into mouth windows in a pool of worker processes. The
+main process feeds them in batches to `LipReaderService.predict_batch`, the
+same batched forward pass and CTC decode the server uses. Each result is
+appended to a JSONL file, and each finished path to a manifest. An
+interrupted run continues where it stopped when started again with the same
+--output. Files whose decode failed are not added to the manifest, so they
+are retried by the next run.
+
+Usage:
+    python scripts/batch_transcribe.py data/archive --recursive --output results.jsonl
+    python scripts/batch_transcribe.py "data/s*/*.mpg" --weights models/checkpoint --workers 8
+
+Requirements:
+    pip install tensorflow opencv-python numpy
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import config  # noqa: E402
+from services.inference_backends import BACKENDS  # noqa: E402
+from services.lip_reader_service import LipReaderService  # noqa: E402
+
+logger = logging.getLogger("batch_transcribe")
+
+VIDEO_EXTENSIONS = (".mpg", ".mp4", ".avi", ".mov", ".webm")
+
+# Times a file is submitted before a decode worker that keeps dying on it is given up
+MAX_DECODE_ATTEMPTS = 3
+
+# Per-process state of the decode workers
+_reader = None
+_camera_service = None
+
+
+def list_videos(inputs, recursive=False):
+    """Sorted, de-duplicated video paths from directories, files and glob patterns"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for root, _, names in os.walk(item):
+                    paths.extend(os.path.join(root, n) for n in names if n.lower().endswith(VIDEO_EXTENSIONS))
+            else:
+                paths.extend(
+                    os.path.join(item, n) for n in os.listdir(item) if n.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            paths.extend(
+                p for p in glob.glob(item, recursive=recursive)
+                if os.path.isfile(p) and p.lower().endswith(VIDEO_EXTENSIONS)
+            )
+    return sorted(set(os.path.abspath(p) for p in paths))
+
+
+def read_manifest(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return set(line.rstrip("\n") for line in f if line.strip())
+
+
+def _init_worker(track_mouth):
+    """Decode worker initializer: a model-less service for video reading"""
+    global _reader, _camera_service
+    _reader = LipReaderService(load_model=False)
+    if track_mouth:
+        from services.camera_service import CameraService
+        _camera_service = CameraService()
+
+
+def _decode(path):
+    """Read one video into a (75,46,140) uint8 window; runs in a worker process."""
+    tracker = _camera_service.create_tracker() if _camera_service is not None else None
+    return path, _reader.read_video_window(path, tracker=tracker)
+
+
+def decode_all(paths, make_pool, decode=_decode, max_in_flight=8, max_attempts=MAX_DECODE_ATTEMPTS):
+    """
+    Decode videos in a process pool, yielding (path, window, error) as decodes finish
+
+    `window` is None for a video that could not be read; `error` is set when the
+    decode itself failed. A worker process that dies (e.g. a crash in the video
+    decoder) breaks the whole pool: the pool is then recreated and the decodes
+    that were in flight are resubmitted, up to `max_attempts` times per file.
+    """
+    pending = iter(paths)
+    retry = []
+    attempts = defaultdict(int)
+    # Decode future -> its path, so a worker failure can still be reported
+    in_flight = {}
+    pool = make_pool()
+    try:
+        while True:
+            broken = False
+            while len(in_flight) < max_in_flight:
+                path = retry.pop() if retry else next(pending, None)
+                if path is None:
+                    break
+                try:
+                    future = pool.submit(decode, path)
+                except BrokenProcessPool:
+                    retry.append(path)
+                    broken = True
+                    break
+                attempts[path] += 1
+                in_flight[future] = path
+
+            if not broken:
+                if not in_flight:
+                    break
+                completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        broken = True
+                        continue
+                    path = in_flight.pop(future)
+                    if error is not None:
+                        yield path, None, f"decode failed: {error}"
+                    else:
+                        yield path, future.result()[1], None
+
+            if broken:
+                logger.warning(f"Decode pool broke with {len(in_flight)} videos in flight, restarting it")
+                pool.shutdown(wait=False)
+                pool = make_pool()
+                for path in in_flight.values():
+                    if attempts[path] >= max_attempts:
+                        yield path, None, f"decode worker died {attempts[path]} times"
+                    else:
+                        retry.append(path)
+                in_flight.clear()
+    finally:
+        pool.shutdown()
+
+
+class Progress:
+    def __init__(self, total, interval=5.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def rate(self):
+        return self.done / max(1e-9, time.perf_counter() - self.started)
+
+    def update(self, done, failed=0):
+        self.done += done
+        self.failed += failed
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            remaining = (self.total - self.done) / self.rate if self.rate else float("inf")
+            logger.info(f"{self.done}/{self.total} files, {self.rate:.1f} files/s, "
+                        f"{self.failed} failed, ~{remaining:.0f}s left")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Batch-transcribe videos with the lip-reading model")
+    p.add_argument("inputs", nargs="+", help="Video files, directories or glob patterns")
+    p.add_argument("--output", default="transcripts.jsonl", help="JSONL file results are appended to")
+    p.add_argument("--manifest", default=None, help="Finished-files manifest (default: <output>.done)")
+    p.add_argument("--recursive", action="store_true", help="Descend into subdirectories / allow ** in globs")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Video decode processes")
+    p.add_argument("--batch-size", type=int, default=config.INFERENCE_MAX_BATCH_SIZE, help="Windows per forward pass")
+    p.add_argument("--weights", default=None, help="Checkpoint or .h5 weights (default: service search paths)")
+    p.add_argument("--backend", default=config.INFERENCE_BACKEND, choices=BACKENDS, help="Inference backend")
+    p.add_argument("--tflite-path", default=config.TFLITE_MODEL_PATH, help="TFLite model for tflite_* backends")
+    p.add_argument("--decoder", default=config.CTC_DECODER, choices=("greedy", "beam"), help="CTC decoder")
+    p.add_argument("--track-mouth", action="store_true", help="Crop the tracked mouth instead of the fixed GRID crop")
+    p.add_argument("--mock", action="store_true", help="Run without trained weights (pipeline testing)")
+    args = p.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    manifest_path = args.manifest or args.output + ".done"
+    finished = read_manifest(manifest_path)
+    videos = list_videos(args.inputs, args.recursive)
+    todo = [v for v in videos if v not in finished]
+    logger.info(f"Found {len(videos)} videos, {len(videos) - len(todo)} already done, {len(todo)} to transcribe")
+    if not todo:
+        return
+
+    batch_size = max(1, args.batch_size)
+    service = LipReaderService(
+        model_path=args.weights,
+        batch_sizes=sorted({1, batch_size}),
+        decoder=args.decoder,
+        beam_width=config.CTC_BEAM_WIDTH,
+        beam_prune_threshold=config.CTC_PRUNE_THRESHOLD,
+        lexicon_path=config.CTC_LEXICON_PATH,
+        backend=args.backend,
+        tflite_path=args.tflite_path,
+        mock=args.mock,
+    )
+    if not args.mock and service.backend is None:
+        logger.error("No trained model could be loaded (pass --mock to test the pipeline)")
+        sys.exit(1)
+    model_version = f"{service.model_version}:{service.decode_method}"
+
+    progress = Progress(len(todo))
+    # Keep enough decodes in flight to cover a batch while the previous one runs
+    max_in_flight = max(2 * batch_size, 4 * args.workers)
+    batch_paths, batch_windows = [], []
+
+    # Spawned workers do not inherit the parent's TensorFlow state
+    context = mp.get_context("spawn")
+
+    def make_pool():
+        return ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(args.track_mouth,))
+
+    with open(args.output, "a") as out, open(manifest_path, "a") as manifest:
+
+        def write(records, done=True):
+            for record in records:
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            # Mark files done only after their results are on disk
+            if done:
+                for record in records:
+                    manifest.write(record["path"] + "\n")
+                manifest.flush()
+
+        def flush_batch():
+            results = service.predict_batch(np.stack(batch_windows))
+            write([
+                {"path": path, "text": r.get("text", ""), "confidence": r.get("confidence", 0.0),
+                 "model_version": model_version}
+                for path, r in zip(batch_paths, results)
+            ])
+            progress.update(len(batch_paths))
+            batch_paths.clear()
+            batch_windows.clear()
+
+        for path, window, error in decode_all(todo, make_pool, max_in_flight=max_in_flight):
+            if error is not None:
+                # Not marked done: a worker or pool failure says nothing about the file
+                logger.error(f"Decode failed on {path}: {error}")
+                write([{"path": path, "error": error, "model_version": model_version}], done=False)
+                progress.update(1, failed=1)
+                continue
+            if window is None:
+                write([{"path": path, "error": "unreadable video", "model_version": model_version}])
+                progress.update(1, failed=1)
+                continue
+            batch_paths.append(path)
+            batch_windows.append(window)
+            if len(batch_windows) >= batch_size:
+                flush_batch()
+
+        if batch_windows:
+            flush_batch()
+
+    elapsed = time.perf_counter() - progress.started
+    logger.info(f"Processed {progress.done} files ({progress.failed} failed) in {elapsed:.1f}s, "
+                f"{progress.rate:.1f} files/s")
+    logger.info(f"Results appended to {args.output}; manifest {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""End-to-end load generator and latency benchmark for the backend.
+
+Starts N simulated `/ws` clients that send JPEG frames at a fixed FPS over
+the binary protocol, plus M concurrent `/predict` uploaders. Records
+p50/p95/p99 round-trip latency, achieved throughput, dropped frames and the
+server's CPU and RSS (read from /proc), and writes the results as JSON.
+
+Run against a server in mock-model mode to measure serving overhead only:
+
+    python scripts/benchmark_ws.py --spawn-server --clients 20 --fps 25 --uploaders 2
+
+or against a running server (pass --server-pid to sample its CPU/RSS):
+
+    LIPZA_MOCK_MODEL=1 python src/main.py &
+    python scripts/benchmark_ws.py --url http://localhost:8000 --server-pid $!
+
+Requirements:
+    pip install websockets httpx
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import httpx
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.frame_protocol import MSG_JPEG_FRAME, pack_binary_frame  # noqa: E402
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def synthetic_frames(count, width, height, quality):
+    """JPEG frames of a moving pattern with noise, so the encoder can't cheat"""
+    rng = np.random.default_rng(0)
+    base = cv2.resize((rng.random((height // 8, width // 8)) * 255).astype(np.uint8), (width, height))
+    frames = []
+    for i in range(count):
+        img = np.roll(base, i * 3, axis=1)
+        img = cv2.add(img, (rng.random((height, width)) * 24).astype(np.uint8))
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        frames.append(jpg.tobytes())
+    return frames
+
+
+def recorded_frames(path, count, quality):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, img = cap.read()
+        if not ret:
+            break
+        ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        frames.append(jpg.tobytes())
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Error: could not read frames from {path}")
+    return frames
+
+
+def synthetic_video(path, frames=75, width=360, height=288):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 25, (width, height))
+    rng = np.random.default_rng(1)
+    for i in range(frames):
+        writer.write((rng.random((height, width, 3)) * 255).astype(np.uint8))
+    writer.release()
+
+
+class ProcSampler:
+    """Samples CPU time and RSS of a process and its children from /proc"""
+
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.cpu_percent = []
+        self.rss_mb = []
+
+    def _pids(self):
+        pids = [self.pid]
+        try:
+            for entry in os.listdir("/proc"):
+                if entry.isdigit():
+                    with open(f"/proc/{entry}/stat") as f:
+                        fields = f.read().rsplit(")", 1)[1].split()
+                    if int(fields[1]) == self.pid:
+                        pids.append(int(entry))
+        except OSError:
+            pass
+        return pids
+
+    def _read(self):
+        ticks = rss_pages = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                ticks += int(fields[11]) + int(fields[12])  # utime + stime
+                rss_pages += int(fields[21])
+            except OSError:
+                continue
+        return ticks / self.clock_ticks, rss_pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+    async def run(self):
+        last_cpu, _ = self._read()
+        last_time = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            cpu, rss = self._read()
+            now = time.perf_counter()
+            self.cpu_percent.append(100 * (cpu - last_cpu) / (now - last_time))
+            self.rss_mb.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def summary(self):
+        if not self.rss_mb:
+            return None
+        return {
+            "pid": self.pid,
+            "cpu_percent_mean": float(np.mean(self.cpu_percent)),
+            "cpu_percent_max": float(np.max(self.cpu_percent)),
+            "rss_mb_mean": float(np.mean(self.rss_mb)),
+            "rss_mb_max": float(np.max(self.rss_mb)),
+        }
+
+
+async def ws_client(client_id, url, frames, fps, stride, duration, stats):
+    """Send frames at `fps` and time each prediction against the frame whose seq it echoes"""
+    sent_at = {}
+    predictions = []
+    state = {"frames_sent": 0, "frames_dropped": 0, "errors": 0, "late_sends": 0}
+
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"type": "config", "config": {"protocol": "binary", "stride": stride}}))
+        json.loads(await ws.recv())
+
+        async def receiver():
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("type") == "prediction":
+                    started = sent_at.pop(data.get("seq"), None)
+                    if started is not None:
+                        predictions.append(time.perf_counter() - started)
+                    state["frames_dropped"] = data.get("frames_dropped", state["frames_dropped"])
+                elif data.get("type") == "error":
+                    state["errors"] += 1
+
+        receive_task = asyncio.create_task(receiver())
+        interval = 1.0 / fps
+        start = time.perf_counter()
+        seq = 0
+        while time.perf_counter() - start < duration:
+            payload = pack_binary_frame(MSG_JPEG_FRAME, frames[seq % len(frames)], seq=seq,
+                                        timestamp_ms=time.time() * 1000)
+            sent_at[seq] = time.perf_counter()
+            await ws.send(payload)
+            state["frames_sent"] += 1
+            seq += 1
+
+            delay = start + seq * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                state["late_sends"] += 1
+
+        # Let in-flight predictions arrive
+        await asyncio.sleep(min(2.0, 10 * interval))
+        receive_task.cancel()
+
+    stats.append(dict(state, client_id=client_id, latencies=predictions))
+
+
+async def uploader(url, video_path, duration, results):
+    deadline = time.perf_counter() + duration
+    async with httpx.AsyncClient(timeout=120) as client:
+        while time.perf_counter() < deadline:
+            with open(video_path, "rb") as f:
+                content = f.read()
+            started = time.perf_counter()
+            try:
+                resp = await client.post(url, files={"file": ("clip.mp4", content, "video/mp4")})
+                elapsed = time.perf_counter() - started
+                results.append((resp.status_code, elapsed))
+            except httpx.HTTPError:
+                results.append((None, time.perf_counter() - started))
+
+
+async def wait_ready(base_url, timeout):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(f"{base_url}/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit("Error: server did not become ready")
+
+
+async def run(args):
+    base_url = args.url.rstrip("/")
+    ws_url = base_url.replace("http", "ws", 1) + "/ws"
+
+    if args.video:
+        frames = recorded_frames(args.video, args.frame_pool, args.quality)
+    else:
+        frames = synthetic_frames(args.frame_pool, args.width, args.height, args.quality)
+
+    upload_path = args.upload_file
+    if args.uploaders and not upload_path:
+        upload_path = os.path.join(tempfile.mkdtemp(prefix="lipza-bench-"), "clip.mp4")
+        synthetic_video(upload_path)
+
+    await wait_ready(base_url, args.ready_timeout)
+
+    sampler = ProcSampler(args.server_pid, args.sample_interval) if args.server_pid else None
+    sampler_task = asyncio.create_task(sampler.run()) if sampler else None
+
+    ws_stats, upload_results = [], []
+    started = time.perf_counter()
+    tasks = [
+        ws_client(i, ws_url, frames, args.fps, args.stride, args.duration, ws_stats)
+        for i in range(args.clients)
+    ]
+    tasks += [uploader(f"{base_url}/predict", upload_path, args.duration, upload_results)
+              for _ in range(args.uploaders)]
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    if sampler_task:
+        sampler_task.cancel()
+
+    async with httpx.AsyncClient(timeout=10) as client:
+        health = (await client.get(f"{base_url}/health")).json()
+
+    latencies = [lat for s in ws_stats for lat in s["latencies"]]
+    frames_sent = sum(s["frames_sent"] for s in ws_stats)
+    upload_ok = [t for status, t in upload_results if status == 200]
+    return {
+        "config": vars(args),
+        "elapsed_s": elapsed,
+        "websocket": {
+            "clients": args.clients,
+            "frames_sent": frames_sent,
+            "achieved_fps_per_client": frames_sent / max(1, args.clients) / args.duration,
+            "predictions": len(latencies),
+            "predictions_per_s": len(latencies) / elapsed,
+            "frames_dropped": sum(s["frames_dropped"] for s in ws_stats),
+            "late_sends": sum(s["late_sends"] for s in ws_stats),
+            "errors": sum(s["errors"] for s in ws_stats),
+            "latency": percentiles(latencies),
+        },
+        "uploads": {
+            "uploaders": args.uploaders,
+            "requests": len(upload_results),
+            "errors": len(upload_results) - len(upload_ok),
+            "requests_per_s": len(upload_ok) / elapsed,
+            "latency": percentiles(upload_ok),
+        },
+        "server": sampler.summary() if sampler else None,
+        "server_inference": health.get("inference"),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="WebSocket and /predict load generator")
+    p.add_argument("--url", default="http://localhost:8000", help="Server base URL")
+    p.add_argument("--spawn-server", action="store_true", help="Start a mock-model server for the run")
+    p.add_argument("--port", type=int, default=8765, help="Port for --spawn-server")
+    p.add_argument("--server-pid", type=int, default=None, help="Server PID to sample CPU/RSS from /proc")
+    p.add_argument("--clients", type=int, default=10, help="Concurrent WebSocket clients")
+    p.add_argument("--fps", type=float, default=25, help="Frames per second per client")
+    p.add_argument("--stride", type=int, default=5, help="Inference stride requested by each client")
+    p.add_argument("--uploaders", type=int, default=0, help="Concurrent /predict uploaders")
+    p.add_argument("--upload-file", default=None, help="Video to upload (default: synthetic clip)")
+    p.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    p.add_argument("--video", default=None, help="Recorded video to take frames from (default: synthetic)")
+    p.add_argument("--frame-pool", type=int, default=50, help="Distinct frames cycled by each client")
+    p.add_argument("--width", type=int, default=640, help="Synthetic frame width")
+    p.add_argument("--height", type=int, default=480, help="Synthetic frame height")
+    p.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    p.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between CPU/RSS samples")
+    p.add_argument("--ready-timeout", type=float, default=120, help="Seconds to wait for /ready")
+    p.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    args = p.parse_args()
+
+    server = None
+    if args.spawn_server:
+        env = dict(os.environ, LIPZA_MOCK_MODEL="1")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=SRC_DIR, env=env,
+        )
+        args.url = f"http://127.0.0.1:{args.port}"
+        args.server_pid = server.pid
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    ws, up = results["websocket"], results["uploads"]
+    print(f"WebSocket: {ws['clients']} clients, {ws['frames_sent']} frames, {ws['predictions']} predictions "
+          f"({ws['predictions_per_s']:.1f}/s), dropped={ws['frames_dropped']}")
+    if ws["latency"]["count"]:
+        lat = ws["latency"]
+        print(f"  latency p50={lat['p50_ms']:.1f}ms p95={lat['p95_ms']:.1f}ms p99={lat['p99_ms']:.1f}ms")
+    if up["requests"]:
+        lat = up["latency"]
+        print(f"Uploads: {up['requests']} requests ({up['requests_per_s']:.2f}/s), errors={up['errors']}"
+              + (f", p50={lat['p50_ms']:.0f}ms p95={lat['p95_ms']:.0f}ms" if lat["count"] else ""))
+    if results["server"]:
+        srv = results["server"]
+        print(f"Server: CPU mean={srv['cpu_percent_mean']:.0f}% max={srv['cpu_percent_max']:.0f}%, "
+              f"RSS max={srv['rss_mb_max']:.0f}MB")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Export the lip-reading checkpoint to TFLite and compare backends.
+
+Converts the Keras model to float16, dynamic-range and int8 TFLite files.
+Int8 is calibrated on sample windows from the calibration clips. Every
+backend then runs on a held-out clip set, and the script writes an
+accuracy/latency report that recommends the fastest backend within tolerance.
+
+Usage:
+    python scripts/convert_model.py --weights models/checkpoint \
+        --calibration data/s1 --eval data/holdout --align-dir data/alignments/s1
+
+Select the backend for the server with INFERENCE_BACKEND in src/config.py.
+
+Requirements:
+    pip install tensorflow
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from services.inference_backends import (  # noqa: E402
+    BACKEND_KERAS,
+    BACKEND_TFLITE_INT8,
+    TFLITE_BACKENDS,
+    convert_to_tflite,
+    default_tflite_path,
+)
+from services.lip_reader_service import LipReaderService  # noqa: E402
+
+VIDEO_EXTENSIONS = (".mpg", ".mp4", ".avi", ".mov", ".webm")
+
+
+def list_clips(paths):
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            clips.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(VIDEO_EXTENSIONS)
+            )
+        elif os.path.exists(path):
+            clips.append(path)
+    return clips
+
+
+def read_alignment(align_dir, clip):
+    """Transcript from a GRID .align file next to the clip name, or None"""
+    if not align_dir:
+        return None
+    path = os.path.join(align_dir, os.path.splitext(os.path.basename(clip))[0] + ".align")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        words = [line.split()[2] for line in f if len(line.split()) >= 3]
+    return " ".join(w for w in words if w not in ("sil", "sp"))
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (x != y))
+    return row[-1]
+
+
+def error_rate(hypotheses, references, split_words=False):
+    errors = total = 0
+    for hyp, ref in zip(hypotheses, references):
+        if split_words:
+            hyp, ref = hyp.split(), ref.split()
+        errors += edit_distance(hyp, ref)
+        total += max(1, len(ref))
+    return errors / max(1, total)
+
+
+def load_windows(service, clips):
+    windows, kept = [], []
+    for clip in clips:
+        window = service.read_video_window(clip)
+        if window is None:
+            print(f"Skipping unreadable clip: {clip}")
+            continue
+        windows.append(window)
+        kept.append(clip)
+    return windows, kept
+
+
+def measure_latency(service, windows, batch_size, runs):
+    """Per-batch latency percentiles in milliseconds"""
+    batch = np.stack([windows[i % len(windows)] for i in range(batch_size)])
+    service.predict_probs(batch)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        service.predict_probs(batch)
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "batch_size": batch_size,
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "windows_per_s": batch_size * 1000 / float(np.mean(times)),
+    }
+
+
+def evaluate(service, windows, references, reference_probs, batch_sizes, runs):
+    chunk = max(batch_sizes)
+    probs = np.concatenate([
+        service.predict_probs(np.stack(windows[i:i + chunk])) for i in range(0, len(windows), chunk)
+    ])
+    texts = [r["text"] for r in service.decode_probs(probs)]
+    report = {
+        "latency": [measure_latency(service, windows, b, runs) for b in batch_sizes],
+        "texts": texts,
+    }
+    if reference_probs is not None:
+        report["max_abs_prob_diff"] = float(np.max(np.abs(probs - reference_probs)))
+        report["mean_abs_prob_diff"] = float(np.mean(np.abs(probs - reference_probs)))
+    labelled = [(t, r) for t, r in zip(texts, references) if r is not None]
+    if labelled:
+        hyps, refs = zip(*labelled)
+        report["cer"] = error_rate(hyps, refs)
+        report["wer"] = error_rate(hyps, refs, split_words=True)
+    return probs, report
+
+
+def main():
+    p = argparse.ArgumentParser(description="Convert the model to TFLite backends and compare them")
+    p.add_argument("--weights", default=None, help="Checkpoint or .h5 weights (default: service search paths)")
+    p.add_argument("--out-dir", default="models", help="Directory for the .tflite files")
+    p.add_argument("--backends", default=",".join(TFLITE_BACKENDS), help="Comma-separated TFLite backends")
+    p.add_argument("--calibration", nargs="*", default=[], help="Clips or directories for int8 calibration")
+    p.add_argument("--calibration-windows", type=int, default=100,
+                   help="Maximum calibration windows (unreadable clips do not count)")
+    p.add_argument("--eval", nargs="*", default=[], help="Held-out clips or directories for the report")
+    p.add_argument("--align-dir", default=None, help="Directory with GRID .align transcripts for --eval clips")
+    p.add_argument("--allow-flex-ops", action="store_true",
+                   help="Fall back to TensorFlow (Flex) ops when builtins are not enough; "
+                        "such models need tensorflow (not tflite-runtime) to serve")
+    p.add_argument("--tolerance", type=float, default=0.02,
+                   help="Largest CER increase over Keras (or text disagreement without transcripts)")
+    p.add_argument("--batch-sizes", default="1,8", help="Batch sizes to time")
+    p.add_argument("--runs", type=int, default=20, help="Timed runs per batch size")
+    p.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    p.add_argument("--report", default=None, help="Report path (default: <out-dir>/backend_report.json)")
+    args = p.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in backends if b not in TFLITE_BACKENDS]
+    if unknown:
+        print(f"Error: unknown backend(s) {unknown}; choose from {list(TFLITE_BACKENDS)}")
+        sys.exit(2)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    keras_service = LipReaderService(model_path=args.weights, batch_sizes=batch_sizes)
+    if keras_service.model is None or not keras_service.is_initialized:
+        print("Error: no trained weights could be loaded")
+        sys.exit(1)
+
+    calibration_clips = list_clips(args.calibration)
+    if BACKEND_TFLITE_INT8 in backends and not calibration_clips:
+        print("Error: int8 conversion needs --calibration clips")
+        sys.exit(2)
+
+    def representative_windows():
+        count = 0
+        for clip in calibration_clips:
+            if count >= args.calibration_windows:
+                break
+            window = keras_service.read_video_window(clip)
+            if window is not None:
+                count += 1
+                yield LipReaderService._to_model_input(window)
+
+    paths = {}
+    for backend in backends:
+        path = default_tflite_path(backend, args.out_dir)
+        print(f"Converting to {backend}...")
+        try:
+            convert_to_tflite(keras_service.model, backend, path, representative_windows,
+                              allow_flex_ops=args.allow_flex_ops)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        paths[backend] = path
+
+    report = {"backends": {}, "tolerance": args.tolerance}
+    eval_clips = list_clips(args.eval)
+    if not eval_clips:
+        print("No --eval clips given; skipping the comparison report")
+        return
+
+    windows, eval_clips = load_windows(keras_service, eval_clips)
+    references = [read_alignment(args.align_dir, clip) for clip in eval_clips]
+    report["clips"] = eval_clips
+
+    print(f"Evaluating {BACKEND_KERAS} on {len(windows)} clips...")
+    keras_probs, keras_report = evaluate(keras_service, windows, references, None, batch_sizes, args.runs)
+    keras_report["size_bytes"] = None
+    report["backends"][BACKEND_KERAS] = keras_report
+
+    for backend, path in paths.items():
+        print(f"Evaluating {backend}...")
+        service = LipReaderService(backend=backend, tflite_path=path, batch_sizes=batch_sizes,
+                                   tflite_threads=args.threads)
+        _, backend_report = evaluate(service, windows, references, keras_probs, batch_sizes, args.runs)
+        backend_report["size_bytes"] = os.path.getsize(path)
+        backend_report["path"] = path
+        backend_report["text_disagreement"] = error_rate(backend_report["texts"], keras_report["texts"])
+        report["backends"][backend] = backend_report
+
+    # Fastest backend (by batch-1 latency) whose accuracy stays within tolerance of Keras
+    within = []
+    for name, r in report["backends"].items():
+        if "cer" in r:
+            degradation = r["cer"] - keras_report["cer"]
+        else:
+            degradation = r.get("text_disagreement", 0.0)
+        r["within_tolerance"] = degradation <= args.tolerance
+        if r["within_tolerance"]:
+            within.append((r["latency"][0]["p50_ms"], name))
+    report["recommended"] = min(within)[1] if within else BACKEND_KERAS
+
+    print(f"\n{'backend':<16}{'size MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'CER':>8}{'disagree':>10}  ok")
+    for name, r in report["backends"].items():
+        size = f"{r['size_bytes'] / 1e6:.1f}" if r["size_bytes"] else "-"
+        cer = f"{r['cer']:.3f}" if "cer" in r else "-"
+        disagree = f"{r['text_disagreement']:.3f}" if "text_disagreement" in r else "-"
+        print(f"{name:<16}{size:>9}{r['latency'][0]['p50_ms']:>9.1f}{r['latency'][0]['p95_ms']:>9.1f}"
+              f"{cer:>8}{disagree:>10}  {'yes' if r['within_tolerance'] else 'no'}")
+    print(f"\nRecommended backend: {report['recommended']}")
+
+    report_path = args.report or os.path.join(args.out_dir, "backend_report.json")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ Configuration file for Lipza backend
 Customize server settings here
 """
 
+import os
+
 # Server Configuration
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8000
@@ -16,10 +18,84 @@ MAX_FRAME_SIZE = 10 * 1024 * 1024  # 10MB
 DEFAULT_FRAME_WIDTH = 224
 DEFAULT_FRAME_HEIGHT = 224
 JPEG_QUALITY = 80
+DECODE_WORKERS = 4  # threads decoding incoming frames off the event loop
+
+# Mouth Tracking Configuration
+ENABLE_MOUTH_TRACKING = True  # locate the mouth in live frames sent without an ROI
+UPLOAD_MOUTH_TRACKING = False  # track uploads too (the fixed GRID crop is the fallback)
+MOUTH_DETECT_INTERVAL = 10  # frames between face detections while tracking holds
+MOUTH_TRACK_MIN_CONFIDENCE = 0.6  # template-match score that triggers re-detection
+MOUTH_ROI_SMOOTHING = 0.5  # EMA weight of the newest box
+MOUTH_TRACK_FRAME_WIDTH = 320  # JPEGs are decoded at the smallest reduced scale at least this wide
+MOUTH_ROI_PUSH_THRESHOLD = 8  # pixels the ROI must move before clients are sent an update
+
+# Upload Configuration
+UPLOADS_DIR = "videos"  # where kept uploads are stored
+KEEP_UPLOADS = False  # keep /predict uploads after prediction
+UPLOAD_RETENTION_MAX_BYTES = 1024 * 1024 * 1024  # 1GB total for kept uploads
+UPLOAD_RETENTION_MAX_AGE = 7 * 24 * 3600  # seconds
+UPLOAD_SWEEP_INTERVAL = 300  # seconds between retention sweeps
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes read per chunk while streaming uploads
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # reject larger uploads with 413
+
+# Long Video Configuration
+LONG_VIDEO_WINDOWING = True  # infer uploads longer than the window as overlapping native-rate windows
+LONG_VIDEO_HOP = 50  # frames between window starts (75 - hop frames of overlap)
+LONG_VIDEO_MAX_FRAMES = 25 * 60 * 10  # frames read from one upload (10 minutes at 25 fps); longer ones are marked truncated
+
+# Job Queue Configuration (POST /jobs)
+JOBS_DB_PATH = "jobs/jobs.sqlite3"  # job state, kept across restarts (relative to this directory)
+JOBS_UPLOAD_DIR = "jobs/uploads"  # uploads waiting for their job to run (relative to this directory)
+JOB_WORKERS = 2  # jobs run concurrently
+JOB_MAX_QUEUED = 100  # waiting jobs before POST /jobs returns 429
+JOB_RETENTION = 24 * 3600  # seconds finished jobs stay queryable
+
+# Streaming Configuration
+STREAM_WINDOW_SIZE = 75  # frames per inference window (model input length)
+STREAM_INFERENCE_STRIDE = 5  # run inference every N new frames
+STREAM_QUEUE_SIZE = 8  # frames buffered between the receiver and processing tasks
+STREAM_OVERFLOW_POLICY = "drop_oldest"  # "drop_oldest", "coalesce" or "block"
+ENABLE_MOTION_GATE = True  # skip inference on windows where the mouth is not moving
+MOTION_GATE_THRESHOLD = 2.0  # mean abs grey-level change between mouth frames that counts as movement
+MOTION_GATE_MIN_ACTIVE_FRAMES = 2  # moving frames since the last inference needed to run the model
+SEND_QUEUE_SIZE = 32  # outbound messages buffered per client before the send policy applies
+SEND_OVERFLOW_POLICY = "drop_oldest"  # "drop_oldest" or "disconnect" slow clients
+
+# Capture Control Configuration
+ENABLE_CAPTURE_CONTROL = True  # push capture settings (fps, JPEG quality, width, mouth ROI) to streaming clients
+CAPTURE_CLIENT_FPS = 10  # rate clients capture at unless their config declares `capture_fps`; never raised
+CAPTURE_CONTROL_INTERVAL = 1.0  # seconds between load checks and RTT pings
+CAPTURE_BACKLOG_HIGH = 16  # windows waiting for inference that make clients step down
+CAPTURE_BACKLOG_LOW = 4  # backlog at or below which clients may step back up
+CAPTURE_RTT_HIGH = 0.25  # smoothed round trip (seconds) that makes a client step down
+CAPTURE_RTT_LOW = 0.1  # round trip at or below which a client may step back up
+CAPTURE_RECOVER_INTERVALS = 3  # calm intervals in a row before stepping back up
+
+# Inference Scheduler Configuration
+INFERENCE_MAX_BATCH_SIZE = 8  # flush a batch once this many windows are pending
+INFERENCE_MAX_WAIT_MS = 10  # flush a partial batch after waiting this long
+
+# Inference Pool Configuration
+INFERENCE_POOL_WORKERS = 0  # >0 runs the model in this many worker processes
+INFERENCE_POOL_START_TIMEOUT = 300  # seconds to wait for a worker to load its model
 
 # Model Configuration
 MODEL_PATH = None  # "path/to/your/lip_reading_model"
 MODEL_ENABLED = False  # Set to True when model is available
+MOCK_MODEL = os.environ.get("LIPZA_MOCK_MODEL", "0") == "1"  # serve mock predictions without TensorFlow
+USE_XLA = False  # jit_compile the traced inference function with XLA
+INFERENCE_BATCH_SIZES = [1, 2, 4, 8]  # batch sizes traced and warmed up at startup
+MODEL_ARTIFACT_PATH = "models/lipza_savedmodel"  # saved built model reused across restarts; None to disable
+INFERENCE_BACKEND = "keras"  # "keras", "tflite_fp16", "tflite_dynamic" or "tflite_int8"
+TFLITE_MODEL_PATH = None  # defaults to models/lipza_<fp16|dynamic|int8>.tflite (see scripts/convert_model.py)
+TFLITE_NUM_THREADS = None  # interpreter CPU threads; None lets TFLite decide
+ENABLE_INCREMENTAL_ENCODER = False  # reuse per-frame encoder features across a session's windows (Keras backend, no pool)
+
+# CTC Decoding Configuration
+CTC_DECODER = "greedy"  # "greedy" or "beam"
+CTC_BEAM_WIDTH = 10
+CTC_PRUNE_THRESHOLD = 1e-3  # skip characters below this probability in beam search
+CTC_LEXICON_PATH = None  # optional word list (one per line) constraining beam search
 
 # Logging Configuration
 ENABLE_FRAME_LOGGING = False  # Log frame reception timestamps
@@ -27,10 +103,19 @@ ENABLE_PREDICTION_LOGGING = True  # Log all predictions
 LOG_BATCH_SIZE = 100  # Log stats every N predictions
 
 # Performance Configuration
-ENABLE_FRAME_CACHING = False  # Cache processed frames
-MAX_CACHED_FRAMES = 100
+ENABLE_FRAME_CACHING = False  # Cache /predict results by upload content hash
+MAX_CACHED_FRAMES = 100  # maximum cached predictions
+PREDICTION_CACHE_MAX_BYTES = 1024 * 1024  # approximate size bound for cached predictions
+ENABLE_TENSOR_CACHE = False  # also cache preprocessed (75,46,140) windows per upload
+TENSOR_CACHE_MAX_ENTRIES = 200
+TENSOR_CACHE_MAX_BYTES = 256 * 1024 * 1024
 USE_GPU = False  # Use GPU for inference if available
 
+# Profiling Configuration
+ADMIN_TOKEN = os.environ.get("LIPZA_ADMIN_TOKEN", "")  # required in X-Admin-Token; /admin/* is disabled (404) when unset
+PROFILE_MAX_SECONDS = 60.0  # longest stack-sampling window /admin/profile accepts
+PROFILE_SAMPLE_INTERVAL = 0.005  # default seconds between stack samples
+
 # CORS Configuration (if needed)
 CORS_ORIGINS = ["*"]
 CORS_CREDENTIALS = True
@@ -3,30 +3,126 @@ FastAPI WebSocket server for lip-reading application
 Handles real-time camera frame transmission and processing
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Header, HTTPException, Query
 from pathlib import Path
+import hmac
 import os
+import shutil
 import time
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 import asyncio
+import base64
 import json
-from typing import Set, Dict, Any
+from contextlib import asynccontextmanager, suppress
+from typing import Set, Dict, Any, Optional
 import logging
 
+import numpy as np
+
+import config
+from services import metrics
 from services.camera_service import CameraService
+from services.capture_control import CaptureController
+from services.client_sender import ClientSender
 from services.lip_reader_service import LipReaderService
+from services.inference_scheduler import InferenceScheduler, RawWindow, collate_windows, decode_rows
+from services.inference_pool import InferencePool
+from services.job_queue import PRIORITIES, JobQueue, JobQueueFull, JobStore
+from services.incremental_encoder import EncoderCache, IncrementalEncoder, IncrementalRequest
+from services.upload_store import UploadStore, UploadTooLarge
+from services.prediction_cache import PredictionCache
+from services.profiling import ProfilerBusy, RequestTrace, sample_stacks
+from services.stream_session import OVERFLOW_POLICIES, PendingFrame, StreamSession
 from utils.frame_processor import FrameProcessor
+from utils.frame_window import FrameWindow
+from utils.long_video import merge_central, window_starts
+from utils.motion_gate import MotionGate
+from utils.video_reader import DEFAULT_MOUTH_CROP, pad_frames
+from utils.frame_protocol import (
+    HEADER_SIZE,
+    MSG_JPEG_FRAME,
+    MSG_RAW_GRAY_FRAME,
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    SUPPORTED_PROTOCOLS,
+    parse_binary_frame,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the application."""
+    # Load the model in the background so the server accepts connections
+    # immediately; /ready reports when inference is available
+    loader = asyncio.create_task(_load_model())
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+    await inference_scheduler.start()
+    if stream_scheduler is not inference_scheduler:
+        await stream_scheduler.start()
+    await job_queue.start()
+    sweeper = None
+    if upload_store.keep_uploads:
+        sweeper = asyncio.create_task(upload_store.run_sweeper(config.UPLOAD_SWEEP_INTERVAL))
+    yield
+    if not loader.done():
+        loader.cancel()
+        with suppress(asyncio.CancelledError):
+            await loader
+    for task in (sweeper, loop_monitor):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await job_queue.stop()
+    job_store.close()
+    await inference_scheduler.stop()
+    if stream_scheduler is not inference_scheduler:
+        await stream_scheduler.stop()
+    if inference_pool is not None:
+        await inference_pool.stop()
+    frame_processor.shutdown()
+
+
+async def _load_model() -> None:
+    try:
+        if inference_pool is not None:
+            await inference_pool.start()
+        else:
+            await asyncio.to_thread(lip_reader_service.load)
+    except Exception as e:
+        logger.exception("Model loading failed: %s", e)
+
+
+def _model_ready() -> bool:
+    if inference_pool is not None:
+        return inference_pool.is_ready
+    return lip_reader_service.is_ready
+
+
+def _model_load_error() -> Optional[str]:
+    """Why the model (or a pool worker) failed to load, if it did"""
+    if inference_pool is not None:
+        return inference_pool.load_error
+    return lip_reader_service.load_error
+
+
+def _model_version() -> str:
+    if inference_pool is not None:
+        return inference_pool.model_version
+    return lip_reader_service.model_version
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Lipza Backend",
     description="Real-time lip-reading WebSocket server",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -39,41 +135,152 @@ app.add_middleware(
 )
 
 # Initialize services
-camera_service = CameraService()
-lip_reader_service = LipReaderService()
-frame_processor = FrameProcessor()
+camera_service = CameraService(
+    detect_interval=config.MOUTH_DETECT_INTERVAL,
+    min_confidence=config.MOUTH_TRACK_MIN_CONFIDENCE,
+    smoothing=config.MOUTH_ROI_SMOOTHING,
+)
+lip_reader_kwargs = dict(
+    jit_compile=config.USE_XLA,
+    batch_sizes=config.INFERENCE_BATCH_SIZES,
+    decoder=config.CTC_DECODER,
+    beam_width=config.CTC_BEAM_WIDTH,
+    beam_prune_threshold=config.CTC_PRUNE_THRESHOLD,
+    lexicon_path=config.CTC_LEXICON_PATH,
+    artifact_path=config.MODEL_ARTIFACT_PATH,
+    backend=config.INFERENCE_BACKEND,
+    tflite_path=config.TFLITE_MODEL_PATH,
+    tflite_threads=config.TFLITE_NUM_THREADS,
+    mock=config.MOCK_MODEL,
+)
+# The model is loaded in the background by `lifespan`. In pool mode it lives
+# in the worker processes; this process only reads videos and decodes outputs
+lip_reader_service = LipReaderService(
+    load_model=False,
+    incremental=config.ENABLE_INCREMENTAL_ENCODER and config.INFERENCE_POOL_WORKERS <= 0,
+    **lip_reader_kwargs,
+)
+frame_processor = FrameProcessor(decode_workers=config.DECODE_WORKERS)
+
+inference_pool = None
+if config.INFERENCE_POOL_WORKERS > 0:
+    inference_pool = InferencePool(
+        config.INFERENCE_POOL_WORKERS,
+        service_kwargs=lip_reader_kwargs,
+        decode=lip_reader_service.decode_probs,
+        max_batch=config.INFERENCE_MAX_BATCH_SIZE,
+        window_shape=(LipReaderService.WINDOW_FRAMES, LipReaderService.FRAME_HEIGHT, LipReaderService.FRAME_WIDTH),
+        num_classes=lip_reader_service.decoder.num_classes,
+        start_timeout=config.INFERENCE_POOL_START_TIMEOUT,
+    )
+
+
+
+def _run_windows(batch):
+    """Scheduler runner: forward pass in a worker thread; raw windows skip CTC decoding"""
+    windows, raw = batch
+    return decode_rows(lip_reader_service.predict_probs(windows), raw, lip_reader_service.decode_probs)
+
+
+async def _run_windows_in_pool(batch):
+    """Scheduler runner: forward pass in a pool worker, CTC decode in this process"""
+    windows, raw = batch
+    return decode_rows(await inference_pool.predict_probs(windows), raw, lip_reader_service.decode_probs)
+
+
+# All sessions and uploads, including the windows of long clips, share one
+# micro-batching scheduler
+inference_scheduler = InferenceScheduler(
+    _run_windows_in_pool if inference_pool is not None else _run_windows,
+    max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=config.INFERENCE_MAX_WAIT_MS,
+    collate=collate_windows,
+    # One batch per worker process at a time; in-process inference runs one batch at a time
+    max_in_flight=inference_pool.num_workers if inference_pool is not None else 1,
+)
+
+# Streaming sessions can reuse cached encoder features between windows; that
+# needs the model in this process, so it is unavailable in pool mode
+incremental_encoder = None
+stream_scheduler = inference_scheduler
+if config.ENABLE_INCREMENTAL_ENCODER:
+    if inference_pool is not None:
+        logger.warning("ENABLE_INCREMENTAL_ENCODER is ignored with INFERENCE_POOL_WORKERS > 0")
+    else:
+        incremental_encoder = IncrementalEncoder(lip_reader_service)
+        stream_scheduler = InferenceScheduler(
+            incremental_encoder.predict_batch,
+            max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=config.INFERENCE_MAX_WAIT_MS,
+            collate=list,
+        )
 
 # Connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
+        self.sessions: Dict[WebSocket, StreamSession] = {}
+        # All sends to a connection go through its queue and writer task
+        self.senders: Dict[WebSocket, ClientSender] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> ClientSender:
         await websocket.accept()
+        sender = ClientSender(websocket, max_queue=config.SEND_QUEUE_SIZE, policy=config.SEND_OVERFLOW_POLICY)
+        sender.start()
         self.active_connections.add(websocket)
+        self.senders[websocket] = sender
         logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
+        return sender
 
-    def disconnect(self, websocket: WebSocket):
+    async def disconnect(self, websocket: WebSocket):
         self.active_connections.discard(websocket)
+        self.sessions.pop(websocket, None)
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            await sender.stop()
         logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
 
-    async def broadcast(self, message: Dict[str, Any]) -> None:
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting message: {e}")
-                disconnected.append(connection)
-        
-        for connection in disconnected:
-            self.disconnect(connection)
-
 manager = ConnectionManager()
 
-# Ensure videos directory exists for uploaded recordings
-VIDEOS_DIR = Path("videos")
-VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
+# Uploaded recordings are streamed to temp files; keeping them under
+# `videos/` is optional and bounded by the retention policy
+VIDEOS_DIR = Path(config.UPLOADS_DIR)
+upload_store = UploadStore(
+    VIDEOS_DIR,
+    keep_uploads=config.KEEP_UPLOADS,
+    max_bytes=config.UPLOAD_RETENTION_MAX_BYTES,
+    max_age=config.UPLOAD_RETENTION_MAX_AGE,
+    chunk_size=config.UPLOAD_CHUNK_SIZE,
+    max_upload_size=config.MAX_UPLOAD_SIZE,
+)
+
+# Re-uploads of the same clip are served from a content-addressed cache
+prediction_cache = PredictionCache(
+    max_entries=config.MAX_CACHED_FRAMES,
+    max_bytes=config.PREDICTION_CACHE_MAX_BYTES,
+    tensor_cache=config.ENABLE_TENSOR_CACHE,
+    tensor_max_entries=config.TENSOR_CACHE_MAX_ENTRIES,
+    tensor_max_bytes=config.TENSOR_CACHE_MAX_BYTES,
+) if config.ENABLE_FRAME_CACHING else None
+
+
+
+def _inference_backlog() -> int:
+    """Windows waiting for either scheduler"""
+    return inference_scheduler.queue_depth + (
+        stream_scheduler.queue_depth if stream_scheduler is not inference_scheduler else 0
+    )
+
+
+metrics.ACTIVE_CONNECTIONS.set_function(lambda: len(manager.active_connections))
+metrics.INFERENCE_QUEUE_DEPTH.set_function(_inference_backlog)
+
+# Preprocessing settings of the /predict path; part of the tensor cache key
+UPLOAD_DECODE_KEY = (
+    "sample",
+    LipReaderService.WINDOW_FRAMES,
+    "tracked" if config.UPLOAD_MOUTH_TRACKING else DEFAULT_MOUTH_CROP,
+)
 
 
 @app.get("/")
@@ -91,32 +298,654 @@ async def health() -> Dict[str, Any]:
     """Health check for monitoring"""
     return {
         "status": "healthy",
-        "active_connections": len(manager.active_connections)
+        "active_connections": len(manager.active_connections),
+        "sessions": [
+            dict(session.stats(), **manager.senders[ws].stats())
+            for ws, session in manager.sessions.items() if ws in manager.senders
+        ],
+        "inference": inference_scheduler.stats(),
+        "incremental": dict(incremental_encoder.stats(), scheduler=stream_scheduler.stats())
+        if incremental_encoder is not None else None,
+        "inference_pool": inference_pool.stats() if inference_pool is not None else None,
+        "jobs": job_queue.stats(),
+        "cache": prediction_cache.stats() if prediction_cache is not None else None
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once the model is loaded, 503 while loading or after a failed load"""
+    body = {
+        "ready": _model_ready(),
+        "model_version": _model_version(),
+    }
+    if not body["ready"]:
+        body["error"] = _model_load_error()
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.REGISTRY.CONTENT_TYPE)
+
+
+@app.post("/admin/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval: float = Query(config.PROFILE_SAMPLE_INTERVAL, gt=0),
+    x_admin_token: Optional[str] = Header(None),
+) -> PlainTextResponse:
+    """Sample the stacks of all server threads for `seconds` and return them collapsed.
+
+    The output is one `frame;frame;... count` line per stack, ready for
+    flamegraph.pl or speedscope. Inference pool workers are separate
+    processes and are not sampled.
+    """
+    if not config.ADMIN_TOKEN:
+        # Disabled unless an operator configured a token
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if seconds > config.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {config.PROFILE_MAX_SECONDS}")
+    try:
+        sampler = await asyncio.to_thread(sample_stacks, seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(sampler.collapsed())
+
+
+def _pop_batch_timings(result: Dict[str, Any], trace: Optional[RequestTrace]) -> None:
+    """Move the scheduler's per-window timings from a result into the trace"""
+    queue_wait = result.pop("queue_wait", 0.0)
+    batch_time = result.pop("batch_time", 0.0)
+    if trace is not None:
+        trace.add("queue_wait", queue_wait)
+        # Forward pass and CTC decode of the whole batch this window ran in
+        trace.add("inference", batch_time)
+
+
 @app.post("/predict")
-async def predict_upload(file: UploadFile = File(...)) -> Dict[str, Any]:
-    """Accept a multipart file upload, save it under `videos/`, and run prediction."""
+async def predict_upload(
+    file: UploadFile = File(...),
+    debug: bool = Query(False, description="Return a stage timing breakdown"),
+) -> Dict[str, Any]:
+    """Accept a multipart file upload, stream it to disk, and run prediction."""
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded")
+    if not _model_ready():
+        raise HTTPException(status_code=503, detail="Model is still loading")
 
-    suffix = Path(file.filename).suffix or ".mp4"
-    dest = VIDEOS_DIR / f"{int(time.time()*1000)}{suffix}"
+    trace = RequestTrace() if debug else None
+    try:
+        upload = await upload_store.save(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.exception("Failed to save uploaded file: %s", e)
+        metrics.ERRORS.inc(kind="upload")
+        raise HTTPException(status_code=500, detail="Failed to save uploaded file")
+
+    if trace is not None:
+        trace.add("upload", time.perf_counter() - trace.started)
 
+    start_time = time.time()
     try:
-        content = await file.read()
-        with open(dest, "wb") as f:
-            f.write(content)
+        result = await _predict_stored_upload(upload.path, upload.digest, trace)
+    except Exception as e:
+        logger.exception("Error running prediction: %s", e)
+        return {"text": "ERROR", "confidence": 0.0, "processing_time": time.time() - start_time}
+    finally:
+        await asyncio.to_thread(upload_store.release, upload.path)
+
+    if result is None:
+        return {"text": "", "confidence": 0.0, "processing_time": time.time() - start_time}
+    return result
+
+
+async def _predict_stored_upload(path: Path, digest: str, trace: Optional[RequestTrace] = None):
+    """Predict a stored upload through the caches and the shared scheduler.
+
+    Returns the result dict, or None if the video could not be read. Raises
+    if inference fails.
+    """
+    start_time = time.time()
+    started = time.perf_counter()
+    model_version = f"{_model_version()}:{lip_reader_service.decode_method}"
+
+    if prediction_cache is not None:
+        cached = prediction_cache.get_result(digest, model_version)
+        if cached is not None:
+            cached["cached"] = True
+            cached["processing_time"] = time.time() - start_time
+            if trace is not None:
+                cached["timings"] = trace.breakdown()
+            metrics.PREDICTIONS.inc(source="upload")
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, source="upload")
+            return cached
+
+    window = fps = None
+    truncated = False
+    if prediction_cache is not None:
+        window = prediction_cache.get_tensor(digest, UPLOAD_DECODE_KEY)
+
+    if window is None:
+        # Decode off the event loop, then batch the forward pass with other requests
+        started_read = time.perf_counter()
+        with metrics.STAGE_SECONDS.time(stage="video_read"):
+            clip = await asyncio.to_thread(_read_upload_window, str(path))
+        if trace is not None:
+            trace.add("video_read", time.perf_counter() - started_read)
+        if clip is None:
+            metrics.ERRORS.inc(kind="decode")
+            return None
+        window, fps, truncated = clip
+        if prediction_cache is not None and len(window) == LipReaderService.WINDOW_FRAMES:
+            prediction_cache.put_tensor(digest, UPLOAD_DECODE_KEY, window)
+
+    try:
+        if len(window) > LipReaderService.WINDOW_FRAMES:
+            result = await _predict_long_clip(window, fps, truncated, trace)
+        else:
+            result = await inference_scheduler.submit(window)
+            _pop_batch_timings(result, trace)
+    except Exception:
+        metrics.ERRORS.inc(kind="inference")
+        raise
+
+    if prediction_cache is not None:
+        prediction_cache.put_result(digest, model_version, result)
+
+    result["processing_time"] = time.time() - start_time
+    if trace is not None:
+        result["timings"] = trace.breakdown()
+    metrics.PREDICTIONS.inc(source="upload")
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, source="upload")
+    return result
+
+
+async def _run_job(job) -> Dict[str, Any]:
+    """Job runner: wait for the model, predict the stored upload, then release it."""
+    while not _model_ready():
+        if _model_load_error() is not None:
+            raise RuntimeError(f"Model failed to load: {_model_load_error()}")
+        await asyncio.sleep(0.5)
+
+    path = Path(job.path)
+    try:
+        result = await _predict_stored_upload(path, job.digest)
+    except Exception:
+        await asyncio.to_thread(upload_store.release, path)
+        raise
+    # Not reached on cancellation: the upload stays for the re-queued job
+    await asyncio.to_thread(upload_store.release, path)
+    if result is None:
+        raise ValueError("Could not read video")
+    return result
+
+
+# Long uploads run as background jobs; state survives restarts. Relative paths
+# are resolved against this directory, not the working directory
+JOBS_UPLOAD_DIR = Path(__file__).resolve().parent / config.JOBS_UPLOAD_DIR
+job_store = JobStore(str(Path(__file__).resolve().parent / config.JOBS_DB_PATH))
+job_queue = JobQueue(
+    job_store,
+    _run_job,
+    workers=config.JOB_WORKERS,
+    max_queued=config.JOB_MAX_QUEUED,
+    retention=config.JOB_RETENTION,
+)
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    priority: str = Query("normal", description="high, normal or low"),
+) -> Dict[str, Any]:
+    """Store an upload and queue its prediction; returns the job id immediately."""
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {list(PRIORITIES)}")
+
+    try:
+        upload = await upload_store.save(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.exception("Failed to save uploaded file: %s", e)
+        metrics.ERRORS.inc(kind="upload")
         raise HTTPException(status_code=500, detail="Failed to save uploaded file")
 
-    # Call the lip reader service; it accepts a path
-    result = await lip_reader_service.predict(str(dest))
+    # Temporary files may not survive a restart; queued uploads live next to the job store
+    JOBS_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    path = JOBS_UPLOAD_DIR / upload.path.name
+    await asyncio.to_thread(shutil.move, str(upload.path), path)
+
+    try:
+        job = await job_queue.submit(str(path), file.filename or path.name, upload.digest, priority)
+    except JobQueueFull as e:
+        path.unlink(missing_ok=True)
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Status of a job, with its prediction once done"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+def _read_upload_window(path: str):
+    """Decode an upload into a model window; blocking, runs in a worker thread.
+
+    Returns (frames, fps or None, truncated), or None if the video cannot be
+    read. With LONG_VIDEO_WINDOWING, clips longer than the window are returned
+    whole at their native frame rate instead of being subsampled to 75
+    frames, cut off after LONG_VIDEO_MAX_FRAMES (`truncated`).
+    """
+    tracker = camera_service.create_tracker() if config.UPLOAD_MOUTH_TRACKING else None
+    if not config.LONG_VIDEO_WINDOWING:
+        window = lip_reader_service.read_video_window(path, tracker=tracker)
+        return (window, None, False) if window is not None else None
+
+    clip = lip_reader_service.read_video_clip(path, tracker=tracker, max_frames=config.LONG_VIDEO_MAX_FRAMES)
+    if clip is None:
+        return None
+    frames, fps, truncated = clip
+    if truncated:
+        logger.warning(f"{path}: only the first {len(frames)} frames (LONG_VIDEO_MAX_FRAMES) are transcribed")
+    if len(frames) <= LipReaderService.WINDOW_FRAMES:
+        return np.stack(pad_frames(frames, LipReaderService.WINDOW_FRAMES)), fps, truncated
+    return frames, fps, truncated
+
+
+def _decode_long_clip(merged, fps: float) -> Dict[str, Any]:
+    """Decode a merged (T,V) sequence with the configured method; blocking.
+
+    Word timestamps come from the greedy (best path) alignment, which beam
+    search does not provide.
+    """
+    with metrics.STAGE_SECONDS.time(stage="ctc_decode"):
+        result = lip_reader_service.decoder.greedy_words(merged, fps)
+        if lip_reader_service.decode_method != "greedy":
+            result.update(lip_reader_service.decoder.decode(merged[np.newaxis], lip_reader_service.decode_method)[0])
+    return result
+
+
+async def _predict_long_clip(frames, fps: float, truncated: bool = False,
+                             trace: Optional[RequestTrace] = None) -> Dict[str, Any]:
+    """Transcribe a clip longer than the model window.
+
+    The clip is cut into overlapping windows that go through the shared
+    scheduler `INFERENCE_MAX_BATCH_SIZE` at a time, so no oversized batch is
+    built and live sessions keep getting slots in between. Each frame keeps
+    the output of its most central window, and the merged sequence is decoded
+    into text with word timestamps. `truncated` marks a clip cut off at
+    LONG_VIDEO_MAX_FRAMES; `duration` is then the part that was transcribed.
+    """
+    size = LipReaderService.WINDOW_FRAMES
+    starts = window_starts(len(frames), size, config.LONG_VIDEO_HOP)
+    chunk = config.INFERENCE_MAX_BATCH_SIZE
+
+    started = time.perf_counter()
+    probs = []
+    for i in range(0, len(starts), chunk):
+        results = await asyncio.gather(*(
+            inference_scheduler.submit(RawWindow(frames[start:start + size])) for start in starts[i:i + chunk]
+        ))
+        probs.extend(result["probs"] for result in results)
+    if trace is not None:
+        trace.add("inference", time.perf_counter() - started)
+
+    merged = merge_central(np.stack(probs), starts, len(frames))
+    result = await asyncio.to_thread(_decode_long_clip, merged, fps)
+    result.update({
+        "frames": len(frames),
+        "duration": len(frames) / fps,
+        "windows": len(starts),
+        "truncated": truncated,
+    })
     return result
 
 
+MOUTH_FRAME_SIZE = (LipReaderService.FRAME_WIDTH, LipReaderService.FRAME_HEIGHT)
+
+
+def _track_mouth(gray, scale: int, tracker):
+    """Crop the tracked mouth from a (reduced-scale) grayscale frame.
+
+    Returns (mouth frame or None, ROI in full-resolution pixels or None). Until
+    a face is found the whole frame is used.
+    """
+    if gray is None:
+        return None, None
+    with metrics.STAGE_SECONDS.time(stage="preprocess"):
+        roi = tracker.update(gray)
+        frame = frame_processor.crop_mouth(gray, roi, MOUTH_FRAME_SIZE)
+    full_roi = {key: value * scale for key, value in roi.items()} if roi else None
+    return frame, full_roi
+
+
+def _decode_json_frame(data: str, tracker=None):
+    """Decode a base64 JSON frame and return (mouth frame or None, tracked ROI or None).
+
+    Blocking; runs on the frame processor's decode pool.
+    """
+    if tracker is None:
+        with metrics.STAGE_SECONDS.time(stage="decode"):
+            return frame_processor.decode_mouth_frame_base64(data, MOUTH_FRAME_SIZE), None
+
+    if not data or len(data) > frame_processor.MAX_FRAME_SIZE:
+        return None, None
+    with metrics.STAGE_SECONDS.time(stage="decode"):
+        gray, scale = frame_processor.decode_gray(base64.b64decode(data), config.MOUTH_TRACK_FRAME_WIDTH)
+    return _track_mouth(gray, scale, tracker)
+
+
+def _decode_binary_frame(data: bytes, tracker=None):
+    """Parse a binary frame message and return (packet, mouth frame or None, tracked ROI or None).
+
+    Frames with a client ROI, or flagged as an already cropped mouth, skip the
+    tracker. Blocking; runs on the frame processor's decode pool.
+    """
+    with metrics.STAGE_SECONDS.time(stage="parse"):
+        packet = parse_binary_frame(data)
+
+    if tracker is not None and packet.roi is None and not packet.mouth_crop:
+        with metrics.STAGE_SECONDS.time(stage="decode"):
+            if packet.msg_type == MSG_JPEG_FRAME:
+                gray, scale = frame_processor.decode_gray(packet.payload, config.MOUTH_TRACK_FRAME_WIDTH)
+            else:
+                gray, scale = frame_processor.decode_raw_gray(packet.payload, packet.width, packet.height), 1
+        frame, roi = _track_mouth(gray, scale, tracker)
+        return packet, frame, roi
+
+    with metrics.STAGE_SECONDS.time(stage="decode"):
+        if packet.msg_type == MSG_RAW_GRAY_FRAME:
+            frame = frame_processor.mouth_frame_from_gray(
+                packet.payload, packet.width, packet.height, MOUTH_FRAME_SIZE, packet.roi
+            )
+        else:
+            frame = frame_processor.decode_mouth_frame(packet.payload, MOUTH_FRAME_SIZE, packet.roi)
+
+    return packet, frame, None
+
+
+def _roi_moved(roi: Dict[str, int], previous, threshold: int) -> bool:
+    if previous is None:
+        return True
+    return any(abs(roi[key] - previous[key]) > threshold for key in ("x", "y", "width", "height"))
+
+
+# Answer for gated windows before the session has produced any transcript
+NO_SPEECH = {"text": "", "confidence": 0.0}
+
+
+def _create_motion_gate() -> MotionGate:
+    return MotionGate(
+        size=config.STREAM_WINDOW_SIZE,
+        threshold=config.MOTION_GATE_THRESHOLD,
+        min_active_frames=config.MOTION_GATE_MIN_ACTIVE_FRAMES,
+    )
+
+
+async def _process_session(sender: ClientSender, session: StreamSession) -> None:
+    """Processing task: decode queued frames into the window and predict once per stride."""
+    # Stage timings since the last prediction, kept while the session is in debug mode
+    trace: Optional[RequestTrace] = None
+    while True:
+        pending = await session.next_frames()
+        seq = None
+
+        if session.debug and trace is None:
+            trace = RequestTrace(started=pending[0].received_at)
+            trace.add("queue_lag", session.queue_lag)
+        elif not session.debug:
+            trace = None
+
+        for item in pending:
+            try:
+                # Decode, crop and resize off the event loop
+                started_decode = time.perf_counter()
+                if item.kind == "binary":
+                    packet, frame, roi = await frame_processor.run_in_pool(
+                        _decode_binary_frame, item.data, session.tracker
+                    )
+                    seq = packet.seq
+                else:
+                    frame, roi = await frame_processor.run_in_pool(_decode_json_frame, item.data, session.tracker)
+                if trace is not None:
+                    trace.add("decode", time.perf_counter() - started_decode)
+
+                # Tell the client where the mouth is so it can send only that crop
+                if roi is not None and _roi_moved(roi, session.roi_sent, config.MOUTH_ROI_PUSH_THRESHOLD):
+                    session.roi_sent = roi
+                    sender.send_json({
+                        "type": "mouth_roi",
+                        "roi": roi,
+                        "confidence": session.tracker.confidence,
+                        "full_frame_interval": config.MOUTH_DETECT_INTERVAL,
+                    })
+
+                if frame is None:
+                    metrics.ERRORS.inc(kind="decode")
+                    error_response = {
+                        "type": "error",
+                        "message": "Failed to decode frame"
+                    }
+                    if seq is not None:
+                        error_response["seq"] = seq
+                    sender.send_json(error_response)
+                    continue
+
+                session.window.push(frame)
+                if session.motion_gate is not None:
+                    session.motion_gate.push(frame)
+                session.frames_processed += 1
+            except Exception as e:
+                logger.error(f"Error processing frame: {e}")
+                metrics.ERRORS.inc(kind="frame")
+                sender.send_json({"type": "error", "message": str(e)})
+
+        # Keep filling the window while the model loads; predict once it is ready
+        if not session.window.should_infer() or not _model_ready():
+            continue
+
+        session.window.mark_inferred()
+        gated = False
+        if session.motion_gate is not None:
+            moving, speaking = session.motion_gate.check()
+            gated = not moving
+            metrics.MOTION_GATE_WINDOWS.inc(decision="skipped" if gated else "inferred")
+
+        if gated:
+            # Nothing was articulated since the last window: repeat the last
+            # transcript while its speech is still in the window, else report silence
+            result = session.last_result if speaking and session.last_result is not None else NO_SPEECH
+        else:
+            # Run the lip reader on the current window
+            try:
+                if session.encoder_cache is not None:
+                    window = session.window
+                    request = IncrementalRequest(window.snapshot(), window.total, window.is_full, session.encoder_cache)
+                    result = await stream_scheduler.submit(request)
+                else:
+                    result = await inference_scheduler.submit(session.window.snapshot())
+            except Exception as e:
+                logger.error(f"Error running prediction: {e}")
+                metrics.ERRORS.inc(kind="inference")
+                sender.send_json({"type": "error", "message": str(e)})
+                trace = None
+                continue
+
+            _pop_batch_timings(result, trace)
+            session.last_result = result
+
+        # Send prediction back to client
+        response = {
+            "type": "prediction",
+            "text": result.get("text", ""),
+            "confidence": result.get("confidence", 0.0),
+            "processing_time": 0.0 if gated else result.get("processing_time", 0.0),
+            "frames_dropped": session.frames_dropped,
+            "queue_lag": session.queue_lag
+        }
+        if gated:
+            response["gated"] = True
+        if seq is not None:
+            response["seq"] = seq
+        if trace is not None:
+            response["timings"] = trace.breakdown()
+            trace = None
+
+        sender.send_json(response)
+        session.predictions_sent += 1
+        metrics.PREDICTIONS.inc(source="ws")
+        # Oldest frame of the last batch through to the prediction being sent
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - pending[0].received_at, source="ws")
+
+
+async def _control_session(sender: ClientSender, session: StreamSession) -> None:
+    """Control task: ping the client for its RTT and push capture settings when they change."""
+    controller = session.capture
+    while True:
+        settings = controller.settings(session.roi_sent)
+        if settings != controller.sent:
+            if controller.sent is not None and settings["level"] != controller.sent["level"]:
+                direction = "down" if settings["level"] > controller.sent["level"] else "up"
+                metrics.CAPTURE_LEVEL_CHANGES.inc(direction=direction)
+                logger.info(f"Capture level {controller.sent['level']} -> {settings['level']} ({controller.reason})")
+            controller.sent = settings
+            sender.send_json({
+                "type": "capture_settings",
+                **settings,
+                "reason": controller.reason,
+                "crop_size": {"width": LipReaderService.FRAME_WIDTH, "height": LipReaderService.FRAME_HEIGHT},
+                "full_frame_interval": config.MOUTH_DETECT_INTERVAL,
+            })
+
+        # The client echoes `sent_at` in a pong; the round trip includes our send queue
+        sender.send_json({"type": "ping", "sent_at": time.perf_counter()})
+        await asyncio.sleep(config.CAPTURE_CONTROL_INTERVAL)
+        controller.update(_inference_backlog(), session.frames_dropped)
+
+
+async def _receive_session(websocket: WebSocket, sender: ClientSender, session: StreamSession) -> None:
+    """Receiver task: read messages, queue frames and answer control messages inline."""
+    while True:
+        # Receive message from client
+        incoming = await websocket.receive()
+        if incoming["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(incoming.get("code", 1000))
+
+        if incoming.get("bytes") is not None:
+            if session.protocol != PROTOCOL_BINARY:
+                sender.send_json({
+                    "type": "error",
+                    "message": "Binary frames require negotiating the binary protocol"
+                })
+            else:
+                await session.enqueue(PendingFrame("binary", incoming["bytes"]))
+            continue
+
+        data = incoming.get("text")
+        
+        try:
+            with metrics.STAGE_SECONDS.time(stage="parse"):
+                message = json.loads(data)
+            
+            if message.get("type") == "frame":
+                # Decoding happens in the processing task
+                await session.enqueue(PendingFrame("json", message.get("data")))
+            
+            elif message.get("type") == "ping":
+                # Keep-alive ping
+                sender.send_json({"type": "pong"})
+
+            elif message.get("type") == "pong":
+                # Echo of a server ping: measures this client's round trip
+                sent_at = message.get("sent_at")
+                if session.capture is not None and isinstance(sent_at, (int, float)):
+                    session.capture.record_rtt(time.perf_counter() - sent_at)
+            
+            elif message.get("type") == "watch_job":
+                # Push a job_update now and again when the job finishes
+                def on_job_finished(finished) -> None:
+                    sender.send_json({"type": "job_update", **finished.to_dict()})
+
+                job_id = str(message.get("job_id"))
+                job = await job_queue.watch(job_id, on_job_finished)
+                if job is None:
+                    sender.send_json({"type": "error", "message": "Unknown job"})
+                else:
+                    session.job_watches.append((job_id, on_job_finished))
+                    sender.send_json({"type": "job_update", **job.to_dict()})
+
+            elif message.get("type") == "stats":
+                sender.send_json({"type": "stats", **session.stats(), **sender.stats()})
+            
+            elif message.get("type") == "config":
+                # Handle configuration messages
+                session_config = message.get("config", {})
+                logger.info(f"Received config: {session_config}")
+
+                stride = session_config.get("stride")
+                if isinstance(stride, int) and stride > 0:
+                    session.window.stride = stride
+
+                requested_protocol = session_config.get("protocol")
+                if requested_protocol in SUPPORTED_PROTOCOLS:
+                    session.protocol = requested_protocol
+
+                overflow_policy = session_config.get("overflow_policy")
+                if overflow_policy in OVERFLOW_POLICIES:
+                    session.overflow_policy = overflow_policy
+
+                debug = session_config.get("debug")
+                if isinstance(debug, bool):
+                    session.debug = debug
+
+                capture_fps = session_config.get("capture_fps")
+                if session.capture is not None and isinstance(capture_fps, int) and 0 < capture_fps <= 60:
+                    session.capture.client_fps = capture_fps
+
+                motion_gate = session_config.get("motion_gate")
+                if motion_gate is False:
+                    session.motion_gate = None
+                elif motion_gate is True and session.motion_gate is None:
+                    session.motion_gate = _create_motion_gate()
+
+                sender.send_json({
+                    "type": "config_received",
+                    "status": "ok",
+                    "protocol": session.protocol,
+                    "overflow_policy": session.overflow_policy,
+                    "debug": session.debug,
+                    "motion_gate": session.motion_gate is not None,
+                    "binary_header_size": HEADER_SIZE
+                })
+            
+        except json.JSONDecodeError:
+            metrics.ERRORS.inc(kind="protocol")
+            error_response = {
+                "type": "error",
+                "message": "Invalid JSON format"
+            }
+            sender.send_json(error_response)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            metrics.ERRORS.inc(kind="protocol")
+            error_response = {
+                "type": "error",
+                "message": str(e)
+            }
+            sender.send_json(error_response)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket) -> None:
     """
@@ -128,83 +957,86 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
         "data": "base64_encoded_jpeg"
     }
     
-    Server response format:
+    After negotiating `{"type": "config", "config": {"protocol": "binary"}}`
+    the client may instead send binary messages (see utils/frame_protocol.py).
+    
+    Server response format (sent every `stride` frames):
     {
         "type": "prediction",
         "text": "predicted_word",
         "confidence": 0.95
     }
-    """
-    await manager.connect(websocket)
     
+    Reading and processing run as separate tasks joined by a bounded queue,
+    so frames arriving faster than inference are dropped or coalesced
+    according to the session's overflow policy instead of piling up.
+    """
+    sender = await manager.connect(websocket)
+
+    # Each connection owns a sliding window of the last 75 mouth frames
+    window = FrameWindow(
+        size=config.STREAM_WINDOW_SIZE,
+        height=LipReaderService.FRAME_HEIGHT,
+        width=LipReaderService.FRAME_WIDTH,
+        stride=config.STREAM_INFERENCE_STRIDE,
+    )
+    session = StreamSession(
+        window,
+        queue_size=config.STREAM_QUEUE_SIZE,
+        overflow_policy=config.STREAM_OVERFLOW_POLICY,
+    )
+    if incremental_encoder is not None:
+        session.encoder_cache = EncoderCache()
+    if config.ENABLE_MOTION_GATE:
+        session.motion_gate = _create_motion_gate()
+    if config.ENABLE_CAPTURE_CONTROL:
+        session.capture = CaptureController(
+            client_fps=config.CAPTURE_CLIENT_FPS,
+            backlog_high=config.CAPTURE_BACKLOG_HIGH,
+            backlog_low=config.CAPTURE_BACKLOG_LOW,
+            rtt_high=config.CAPTURE_RTT_HIGH,
+            rtt_low=config.CAPTURE_RTT_LOW,
+            recover_intervals=config.CAPTURE_RECOVER_INTERVALS,
+        )
+    if config.ENABLE_MOUTH_TRACKING:
+        # Loading the cascade reads an XML file; keep it off the event loop
+        session.tracker = await asyncio.to_thread(camera_service.create_tracker)
+    manager.sessions[websocket] = session
+    processor = asyncio.create_task(_process_session(sender, session))
+    receiver = asyncio.create_task(_receive_session(websocket, sender, session))
+    tasks = [receiver, processor]
+    if session.capture is not None:
+        tasks.append(asyncio.create_task(_control_session(sender, session)))
+
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
-            try:
-                message = json.loads(data)
-                
-                if message.get("type") == "frame":
-                    # Process camera frame
-                    frame_data = message.get("data")
-                    
-                    # Decode frame from base64
-                    frame = frame_processor.decode_frame(frame_data)
-                    
-                    if frame is not None:
-                        # Process frame with lip reader
-                        result = await lip_reader_service.predict(frame)
-                        
-                        # Send prediction back to client
-                        response = {
-                            "type": "prediction",
-                            "text": result.get("text", ""),
-                            "confidence": result.get("confidence", 0.0),
-                            "processing_time": result.get("processing_time", 0.0)
-                        }
-                        
-                        await websocket.send_json(response)
-                    else:
-                        error_response = {
-                            "type": "error",
-                            "message": "Failed to decode frame"
-                        }
-                        await websocket.send_json(error_response)
-                
-                elif message.get("type") == "ping":
-                    # Keep-alive ping
-                    await websocket.send_json({"type": "pong"})
-                
-                elif message.get("type") == "config":
-                    # Handle configuration messages
-                    config = message.get("config", {})
-                    logger.info(f"Received config: {config}")
-                    await websocket.send_json({
-                        "type": "config_received",
-                        "status": "ok"
-                    })
-                
-            except json.JSONDecodeError:
-                error_response = {
-                    "type": "error",
-                    "message": "Invalid JSON format"
-                }
-                await websocket.send_json(error_response)
-            except Exception as e:
-                logger.error(f"Error processing message: {e}")
-                error_response = {
-                    "type": "error",
-                    "message": str(e)
-                }
-                await websocket.send_json(error_response)
-    
+        # The writer finishes first when a send fails or a slow client is dropped;
+        # the processing and control tasks loop forever unless they fail
+        done, _ = await asyncio.wait({sender.task, *tasks}, return_when=asyncio.FIRST_COMPLETED)
+        if receiver in done:
+            receiver.result()
+        elif sender.task in done:
+            logger.info(f"Closing WebSocket: {sender.close_reason}")
+        else:
+            for task in done:
+                task.result()
+            raise RuntimeError("Session task stopped")
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         logger.info("WebSocket disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
-        manager.disconnect(websocket)
+        metrics.ERRORS.inc(kind="session")
+        # Do not leave the client connected to a session that no longer predicts
+        with suppress(Exception):
+            await asyncio.wait_for(websocket.close(code=1011, reason="Session failed"), timeout=1.0)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        for job_id, listener in session.job_watches:
+            job_queue.unwatch(job_id, listener)
+        await manager.disconnect(websocket)
 
 
 if __name__ == "__main__":
@@ -3,20 +3,198 @@ Camera service for handling camera-related operations
 """
 
 import logging
-from typing import Optional, Dict, Any
+import os
+from typing import Optional, Dict, Any, Tuple
 import cv2
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+FACE_CASCADE = "haarcascade_frontalface_default.xml"
+
+# Mouth box relative to a detected face box
+MOUTH_CENTER_Y = 0.8  # fraction of face height from the top
+MOUTH_WIDTH = 0.75  # fraction of face width
+
+# Box as (x, y, width, height) floats in tracker-frame pixels
+Box = Tuple[float, float, float, float]
+
+
+class MouthTracker:
+    """Per-session mouth ROI tracker
+    
+    Runs the face detector every `detect_interval` frames, or as soon as
+    template matching drops below `min_confidence`, and follows the mouth with
+    template matching in between. While no face is in view it also only
+    looks for one every `detect_interval` frames. The box is smoothed with an exponential
+    moving average and keeps the model's 140:46 aspect ratio.
+    """
+    
+    def __init__(self, detector: "cv2.CascadeClassifier", detect_interval: int = 10, min_confidence: float = 0.6,
+                 smoothing: float = 0.5, aspect: float = 140 / 46, max_misses: int = 5) -> None:
+        """
+        Args:
+            detector: Haar face cascade owned by this tracker (cascades are not shared across threads)
+            detect_interval: Frames between face detections while tracking succeeds
+            min_confidence: Template-match score below which the face is re-detected
+            smoothing: EMA weight of the newest box (1.0 disables smoothing)
+            aspect: Width / height of the mouth box
+            max_misses: Consecutive failed detections before the ROI is dropped
+        """
+        self.detector = detector
+        self.detect_interval = max(1, detect_interval)
+        self.min_confidence = min_confidence
+        self.smoothing = min(max(smoothing, 0.0), 1.0)
+        self.aspect = aspect
+        self.max_misses = max_misses
+        
+        self.box: Optional[Box] = None
+        self.confidence = 0.0
+        self._template: Optional[np.ndarray] = None
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._since_detect = 0
+        self._misses = 0
+        self._skip = 0  # frames left before the next search while no face is in view
+        
+        # Stats
+        self.detections = 0
+        self.tracked_frames = 0
+    
+    def _detect(self, gray: np.ndarray) -> Optional[Box]:
+        """Mouth box derived from the largest detected face, or None"""
+        min_side = max(24, min(gray.shape[:2]) // 6)
+        faces = self.detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side))
+        self.detections += 1
+        if len(faces) == 0:
+            return None
+        
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        width = fw * MOUTH_WIDTH
+        height = width / self.aspect
+        cx, cy = fx + fw / 2, fy + fh * MOUTH_CENTER_Y
+        return cx - width / 2, cy - height / 2, width, height
+    
+    def _track(self, gray: np.ndarray) -> Optional[Box]:
+        """Template-match the last mouth patch in a search area around the previous box"""
+        x, y, w, h = self.box
+        th, tw = self._template.shape
+        x1, y1 = max(0, int(x - w / 2)), max(0, int(y - h / 2))
+        x2, y2 = min(gray.shape[1], int(x + w * 1.5)), min(gray.shape[0], int(y + h * 1.5))
+        search = gray[y1:y2, x1:x2]
+        if search.shape[0] < th or search.shape[1] < tw:
+            self.confidence = 0.0
+            return None
+        
+        scores = cv2.matchTemplate(search, self._template, cv2.TM_CCOEFF_NORMED)
+        _, self.confidence, _, (mx, my) = cv2.minMaxLoc(scores)
+        return x1 + mx, y1 + my, w, h
+    
+    def _patch(self, gray: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        x, y, w, h = (int(round(v)) for v in box)
+        x, y = max(0, x), max(0, y)
+        patch = gray[y:y + h, x:x + w]
+        return patch.copy() if patch.size and min(patch.shape) >= 8 else None
+    
+    def update(self, gray: np.ndarray) -> Optional[Dict[str, int]]:
+        """
+        Locate the mouth in a grayscale frame
+        
+        Args:
+            gray: Full grayscale frame; the tracker starts over whenever its size
+                (or decode scale) changes
+            
+        Returns:
+            ROI dict with x, y, width and height in `gray` pixels, or None if no face has been found
+        """
+        if gray.shape[:2] != self._frame_shape:
+            # The box and template are in pixels of the previous frame size
+            self.reset()
+            self._frame_shape = gray.shape[:2]
+
+        if self.box is None and self._skip > 0:
+            self._skip -= 1
+            return None
+
+        raw = None
+        if self.box is not None and self._template is not None and self._since_detect < self.detect_interval:
+            raw = self._track(gray)
+            if raw is not None and self.confidence >= self.min_confidence:
+                self._since_detect += 1
+                self.tracked_frames += 1
+            else:
+                raw = None
+        
+        detected = raw is None
+        if detected:
+            raw = self._detect(gray)
+            if raw is None:
+                self._misses += 1
+                if self._misses >= self.max_misses:
+                    self.reset()
+                if self.box is None:
+                    self._skip = self.detect_interval - 1
+                return self.roi
+            self._misses = 0
+            self._since_detect = 0
+            self.confidence = 1.0
+        
+        if self.box is None:
+            self.box = raw
+        else:
+            a = self.smoothing
+            self.box = tuple(a * new + (1 - a) * old for new, old in zip(raw, self.box))
+        if detected:
+            # Cut the template from the box whose size tracking carries forward
+            self._template = self._patch(gray, self.box)
+        return self.roi
+    
+    @property
+    def roi(self) -> Optional[Dict[str, int]]:
+        if self.box is None:
+            return None
+        x, y, w, h = self.box
+        return {"x": max(0, int(round(x))), "y": max(0, int(round(y))),
+                "width": max(1, int(round(w))), "height": max(1, int(round(h)))}
+    
+    def reset(self) -> None:
+        self.box = None
+        self._template = None
+        self._since_detect = 0
+        self._misses = 0
+        self._skip = 0
+        self.confidence = 0.0
+
 
 class CameraService:
     """Service for camera operations"""
     
-    def __init__(self) -> None:
-        self.is_initialized = False
+    def __init__(self, detect_interval: int = 10, min_confidence: float = 0.6, smoothing: float = 0.5) -> None:
+        self.detect_interval = detect_interval
+        self.min_confidence = min_confidence
+        self.smoothing = smoothing
+        # Minimal OpenCV builds ship without the objdetect module or its cascades
+        cascade_dir = getattr(getattr(cv2, "data", None), "haarcascades", "")
+        self.cascade_path = os.path.join(cascade_dir, FACE_CASCADE)
+        self.is_initialized = hasattr(cv2, "CascadeClassifier") and os.path.exists(self.cascade_path)
+        if not self.is_initialized:
+            logger.warning(f"Face cascade {self.cascade_path} not found; mouth tracking disabled")
         logger.info("CameraService initialized")
     
+    def create_tracker(self) -> Optional[MouthTracker]:
+        """
+        Create a mouth tracker for one session or video
+        
+        Returns:
+            MouthTracker with its own cascade, or None if the detector is unavailable
+        """
+        if not self.is_initialized:
+            return None
+        detector = cv2.CascadeClassifier(self.cascade_path)
+        if detector.empty():
+            logger.error(f"Failed to load face cascade {self.cascade_path}")
+            return None
+        return MouthTracker(detector, self.detect_interval, self.min_confidence, self.smoothing)
+    
     def process_frame(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         Process a camera frame for lip reading
@@ -46,18 +224,28 @@ class CameraService:
             logger.error(f"Error processing frame: {e}")
             return None
     
-    def extract_roi(self, frame: np.ndarray, face_region: Dict[str, Any]) -> Optional[np.ndarray]:
+    def extract_roi(self, frame: np.ndarray, face_region: Optional[Dict[str, Any]] = None,
+                    tracker: Optional[MouthTracker] = None) -> Optional[np.ndarray]:
         """
         Extract Region of Interest (ROI) from frame
         
         Args:
             frame: Input frame
             face_region: Dictionary with x, y, width, height of face region
+            tracker: Locates the mouth when no region is given
             
         Returns:
             Extracted ROI or None
         """
         try:
+            if face_region is None:
+                if tracker is None:
+                    return None
+                gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                face_region = tracker.update(gray)
+                if face_region is None:
+                    return None
+            
             x = face_region.get("x", 0)
             y = face_region.get("y", 0)
             width = face_region.get("width", frame.shape[1])
@@ -0,0 +1,156 @@
+"""
+Server-driven capture settings for streaming clients
+Each session walks a ladder of capture levels (share of the client's frame
+rate, JPEG quality, full-frame width). Inference backlog, dropped frames or a
+slow round trip step it down at once; it only steps back up after several
+calm intervals in a row. The client is sent the settings whenever they change, together with the
+mouth ROI it should crop once the tracker has found one.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CaptureLevel:
+    """What a client should capture and send"""
+
+    fps_fraction: float  # of the rate the client captures at; never raised above it
+    jpeg_quality: int
+    max_width: int  # full frames only; mouth crops are sent at the model's frame size
+
+
+# Best first. Full frames stay at least MOUTH_TRACK_FRAME_WIDTH wide so the
+# tracker can still find the face
+CAPTURE_LEVELS = (
+    CaptureLevel(fps_fraction=1.0, jpeg_quality=80, max_width=640),
+    CaptureLevel(fps_fraction=1.0, jpeg_quality=70, max_width=480),
+    CaptureLevel(fps_fraction=0.8, jpeg_quality=60, max_width=320),
+    CaptureLevel(fps_fraction=0.6, jpeg_quality=50, max_width=320),
+    CaptureLevel(fps_fraction=0.4, jpeg_quality=40, max_width=320),
+)
+
+
+class CaptureController:
+    """Chooses one session's capture level from server load and its round trip time"""
+
+    def __init__(
+        self,
+        client_fps: int = 10,
+        levels: Sequence[CaptureLevel] = CAPTURE_LEVELS,
+        backlog_high: int = 16,
+        backlog_low: int = 4,
+        rtt_high: float = 0.25,
+        rtt_low: float = 0.1,
+        recover_intervals: int = 3,
+        rtt_smoothing: float = 0.3,
+    ) -> None:
+        """
+        Args:
+            client_fps: Frame rate the client captures at; the top level keeps it
+            levels: Capture levels, best first
+            backlog_high: Windows waiting for inference above which the level drops
+            backlog_low: Backlog at or below which the level may recover
+            rtt_high: Smoothed round trip (seconds) above which the level drops
+            rtt_low: Round trip at or below which the level may recover
+            recover_intervals: Consecutive calm updates before stepping back up
+            rtt_smoothing: EMA weight of the newest round trip sample
+        """
+        if not levels:
+            raise ValueError("levels must not be empty")
+
+        self.client_fps = max(1, client_fps)
+        self.levels = list(levels)
+        self.backlog_high = backlog_high
+        self.backlog_low = backlog_low
+        self.rtt_high = rtt_high
+        self.rtt_low = rtt_low
+        self.recover_intervals = max(1, recover_intervals)
+        self.rtt_smoothing = rtt_smoothing
+
+        self.level = 0
+        self.reason = "initial"
+        self.rtt: Optional[float] = None
+        self.sent: Optional[Dict[str, Any]] = None  # last settings pushed to the client
+        self._calm = 0
+        self._frames_dropped = 0
+
+        # Stats
+        self.downgrades = 0
+        self.upgrades = 0
+
+    def record_rtt(self, seconds: float) -> None:
+        """Fold in a round trip measured from a ping the client echoed"""
+        if seconds < 0:
+            return
+        if self.rtt is None:
+            self.rtt = seconds
+        else:
+            self.rtt += self.rtt_smoothing * (seconds - self.rtt)
+
+    def _overload(self, backlog: int, dropped: int) -> Optional[str]:
+        if backlog > self.backlog_high:
+            return "backlog"
+        if dropped > 0:
+            return "dropped_frames"
+        if self.rtt is not None and self.rtt > self.rtt_high:
+            return "rtt"
+        return None
+
+    def update(self, backlog: int, frames_dropped: int) -> int:
+        """
+        Re-evaluate the level once per control interval
+
+        Args:
+            backlog: Windows currently waiting for inference, server-wide
+            frames_dropped: The session's total dropped-frame count
+
+        Returns:
+            The new level index
+        """
+        dropped = frames_dropped - self._frames_dropped
+        self._frames_dropped = frames_dropped
+
+        reason = self._overload(backlog, dropped)
+        if reason is not None:
+            self._calm = 0
+            if self.level < len(self.levels) - 1:
+                self.level += 1
+                self.reason = reason
+                self.downgrades += 1
+            return self.level
+
+        if backlog <= self.backlog_low and (self.rtt is None or self.rtt <= self.rtt_low):
+            self._calm += 1
+            if self._calm >= self.recover_intervals and self.level > 0:
+                self.level -= 1
+                self.reason = "recovered"
+                self.upgrades += 1
+                self._calm = 0
+        else:
+            # Between the thresholds: hold the current level
+            self._calm = 0
+        return self.level
+
+    def settings(self, roi: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Settings for the current level plus the mouth ROI to crop, if known"""
+        level = self.levels[self.level]
+        return {
+            "level": self.level,
+            "fps": max(1, round(self.client_fps * level.fps_fraction)),
+            "jpeg_quality": level.jpeg_quality,
+            "max_width": level.max_width,
+            "roi": roi,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "reason": self.reason,
+            "rtt": self.rtt,
+            "downgrades": self.downgrades,
+            "upgrades": self.upgrades,
+        }
@@ -0,0 +1,173 @@
+"""
+Per-connection outbound queue for the /ws endpoint
+Every message to a client is serialized once and put on a bounded queue
+that a dedicated writer task drains into the socket. Producers (the session
+tasks, job watches) never await the network, so a slow client only delays
+itself. When its queue fills up, its oldest prediction is dropped or the
+client is disconnected, depending on the policy. Control messages (config
+acks, capture settings, job updates, errors) are never dropped; a client
+whose queue holds twice the limit of them is disconnected instead.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+from services.metrics import OUTBOUND_DROPPED, SLOW_CLIENT_DISCONNECTS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Policies for a full outbound queue
+SEND_POLICY_DROP_OLDEST = "drop_oldest"  # discard the oldest queued prediction
+SEND_POLICY_DISCONNECT = "disconnect"  # close the connection as a slow consumer
+SEND_POLICIES = (SEND_POLICY_DROP_OLDEST, SEND_POLICY_DISCONNECT)
+
+# Close code for clients that cannot keep up (RFC 6455 "try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Message types a newer message supersedes; everything else must reach the client
+DROPPABLE_TYPES = frozenset({"prediction"})
+
+
+def serialize(message: Dict[str, Any]) -> str:
+    """JSON text frame payload, encoded like Starlette's `send_json`"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ClientSender:
+    """Bounded outbound queue plus the writer task that owns a socket's sends"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int = 32, policy: str = SEND_POLICY_DROP_OLDEST) -> None:
+        if policy not in SEND_POLICIES:
+            raise ValueError(f"Unknown send policy: {policy}")
+
+        self.websocket = websocket
+        self.policy = policy
+        self.max_queue = max(1, max_queue)
+        # (text, droppable) in send order; control messages may exceed max_queue
+        self.queue: Deque[Tuple[str, bool]] = deque()
+        self._queued = asyncio.Event()
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.messages_sent = 0
+        self.messages_dropped = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="ws-writer")
+
+    @property
+    def task(self) -> Optional[asyncio.Task]:
+        """Writer task; finishes when the socket fails or the client is dropped as slow"""
+        return self._task
+
+    def send_json(self, message: Dict[str, Any]) -> bool:
+        """Queue a message for the client without waiting; False if it was not queued."""
+        return self.send_text(serialize(message), droppable=message.get("type") in DROPPABLE_TYPES)
+
+    def send_text(self, text: str, droppable: bool = False) -> bool:
+        """
+        Queue an already serialized message without waiting
+
+        Args:
+            text: Serialized message
+            droppable: Whether a full queue may discard it for a newer message
+        """
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.max_queue:
+            if self.policy == SEND_POLICY_DISCONNECT:
+                logger.warning(f"Client outbound queue full ({self.max_queue}); disconnecting slow consumer")
+                SLOW_CLIENT_DISCONNECTS.inc()
+                self._close("slow consumer")
+                return False
+            # Latest prediction wins: discard the oldest queued one
+            if not self._drop_oldest_droppable():
+                if droppable:
+                    # Nothing but control messages queued; they go first
+                    self._count_dropped()
+                    return False
+                # Control messages are queued past the bound, but only up to twice it
+                if len(self.queue) >= 2 * self.max_queue:
+                    logger.warning(f"Client outbound queue full of control messages ({len(self.queue)}); "
+                                   f"disconnecting slow consumer")
+                    SLOW_CLIENT_DISCONNECTS.inc()
+                    self._close("slow consumer")
+                    return False
+
+        self.queue.append((text, droppable))
+        self._queued.set()
+        return True
+
+    def _drop_oldest_droppable(self) -> bool:
+        for i, (_, droppable) in enumerate(self.queue):
+            if droppable:
+                del self.queue[i]
+                self._count_dropped()
+                return True
+        return False
+
+    def _count_dropped(self) -> None:
+        self.messages_dropped += 1
+        OUTBOUND_DROPPED.inc()
+
+    def _close(self, reason: str) -> None:
+        self.closed = True
+        self.close_reason = reason
+        # Interrupt the writer even if it is stuck in a send; it closes the socket
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                while not self.queue:
+                    self._queued.clear()
+                    await self._queued.wait()
+                text, _ = self.queue.popleft()
+                started = time.perf_counter()
+                try:
+                    await self.websocket.send_text(text)
+                except Exception as e:
+                    logger.info(f"Stopping writer after failed send: {e}")
+                    self.closed = True
+                    self.close_reason = "send failed"
+                    return
+                STAGE_SECONDS.observe(time.perf_counter() - started, stage="send")
+                self.messages_sent += 1
+        except asyncio.CancelledError:
+            if self.close_reason != "slow consumer":
+                raise
+            try:
+                await asyncio.wait_for(
+                    self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason=self.close_reason),
+                    timeout=1.0,
+                )
+            except Exception:
+                pass
+
+    async def stop(self) -> None:
+        """Stop the writer; messages still queued are discarded."""
+        self.closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "send_policy": self.policy,
+            "outbound_queue_depth": len(self.queue),
+            "messages_sent": self.messages_sent,
+            "messages_dropped": self.messages_dropped,
+        }
@@ -0,0 +1,133 @@
+"""
+Incremental streaming inference
+Consecutive windows of a session share all but `stride` frames. The Conv3D
+encoder only looks a few frames to each side, so per-frame features of the
+shared frames are reused from a per-session cache. Only the frames whose
+receptive field changed are re-encoded, and the BiLSTM+Dense head runs on
+the full 75-frame feature sequence.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EncoderCache:
+    """Encoder outputs for one session's current window"""
+
+    features: Optional[np.ndarray] = None  # (T, features) float32, oldest frame first
+    total: int = 0  # FrameWindow.total when `features` was computed
+
+    def reset(self) -> None:
+        self.features = None
+        self.total = 0
+
+
+@dataclass
+class IncrementalRequest:
+    """One session window submitted for incremental inference"""
+
+    window: np.ndarray  # (T,H,W) uint8 snapshot
+    total: int  # FrameWindow.total at snapshot time
+    full: bool  # the window held `T` real frames (no padding)
+    cache: EncoderCache = field(default_factory=EncoderCache)
+
+
+class IncrementalEncoder:
+    """Scheduler runner that reuses cached encoder features across a session's windows"""
+
+    def __init__(self, service) -> None:
+        """
+        Args:
+            service: LipReaderService; falls back to full-window inference when it
+                cannot split its model (mock mode, TFLite backends)
+        """
+        self.service = service
+
+        # Stats
+        self.full_encodes = 0
+        self.incremental_steps = 0
+        self.frames_encoded = 0
+        self.frames_reused = 0
+
+    def _plan(self, request: IncrementalRequest) -> Tuple[int, List[Tuple[int, int, int, int]]]:
+        """
+        Decide which frames to re-encode
+
+        Returns:
+            (shift, chunks) where each chunk is (start, end, keep_from, keep_to): encode
+            window[start:end] and keep outputs [keep_from, keep_to) of the window
+        """
+        size = len(request.window)
+        rf = self.service.receptive_field
+        cache = request.cache
+        shift = request.total - cache.total
+
+        if not request.full or cache.features is None or shift < 0 or shift >= size - 2 * rf:
+            return -1, [(0, size, 0, size)]
+        if shift == 0:
+            return 0, []
+
+        # First `rf` positions see the zero padding at the window start; the last
+        # `shift + rf` positions are new frames or previously saw the window end
+        tail_from = size - shift - rf
+        return shift, [(0, 2 * rf, 0, rf), (tail_from - rf, size, tail_from, size)]
+
+    def predict_batch(self, requests: List[IncrementalRequest]) -> List[Dict[str, Any]]:
+        """Predict a list of session windows; blocking, run by the inference scheduler."""
+        if not self.service.supports_incremental:
+            return self.service.predict_batch(np.stack([r.window for r in requests]))
+
+        started = time.perf_counter()
+        size = len(requests[0].window)
+        features = np.empty((len(requests), size, self.service.feature_size), dtype=np.float32)
+
+        # Group chunks of equal length so each group is one encoder call
+        groups: Dict[int, List[Tuple[int, int, int, int, int]]] = defaultdict(list)
+        for i, request in enumerate(requests):
+            shift, chunks = self._plan(request)
+            if shift >= 0:
+                features[i, :size - shift] = request.cache.features[shift:]
+                self.incremental_steps += 1
+                self.frames_reused += size - sum(keep_to - keep_from for _, _, keep_from, keep_to in chunks)
+            else:
+                self.full_encodes += 1
+            for chunk in chunks:
+                groups[chunk[1] - chunk[0]].append((i,) + chunk)
+
+        for jobs in groups.values():
+            batch = np.stack([requests[i].window[start:end] for i, start, end, _, _ in jobs])
+            encoded = self.service.encode_frames(batch)
+            self.frames_encoded += batch.shape[0] * batch.shape[1]
+            for (i, start, _, keep_from, keep_to), chunk_features in zip(jobs, encoded):
+                features[i, keep_from:keep_to] = chunk_features[keep_from - start:keep_to - start]
+
+        for request, request_features in zip(requests, features):
+            if request.full:
+                request.cache.features = request_features.copy()
+                request.cache.total = request.total
+            else:
+                request.cache.reset()
+
+        probs = self.service.head_probs(features)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="forward")
+        return self.service.decode_probs(probs)
+
+    def stats(self) -> Dict[str, Any]:
+        steps = self.full_encodes + self.incremental_steps
+        return {
+            "full_encodes": self.full_encodes,
+            "incremental_steps": self.incremental_steps,
+            "frames_encoded": self.frames_encoded,
+            "frames_reused": self.frames_reused,
+            "mean_frames_encoded": self.frames_encoded / steps if steps else 0.0,
+        }
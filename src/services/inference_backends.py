@@ -0,0 +1,267 @@
+"""
+Inference backends for the lip-reading model
+A backend turns a (B,75,46,140,1) float32 batch into (B,T,vocab) probabilities.
+`KerasBackend` runs the traced Keras model; `TFLiteBackend` runs a converted
+float16, dynamic-range or int8 TFLite model on the CPU.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+logger = logging.getLogger(__name__)
+
+BACKEND_KERAS = "keras"
+BACKEND_TFLITE_FP16 = "tflite_fp16"
+BACKEND_TFLITE_DYNAMIC = "tflite_dynamic"
+BACKEND_TFLITE_INT8 = "tflite_int8"
+TFLITE_BACKENDS = (BACKEND_TFLITE_FP16, BACKEND_TFLITE_DYNAMIC, BACKEND_TFLITE_INT8)
+BACKENDS = (BACKEND_KERAS,) + TFLITE_BACKENDS
+
+
+def default_tflite_path(backend: str, directory: str = "models") -> str:
+    """Where the converter writes (and the service looks for) a TFLite model"""
+    return os.path.join(directory, f"lipza_{backend[len('tflite_'):]}.tflite")
+
+
+class InferenceBackend:
+    """Runs batches of preprocessed windows through one execution engine"""
+
+    name = "base"
+
+    def __init__(self, input_shape: Sequence[int], batch_sizes: Sequence[int]) -> None:
+        """
+        Args:
+            input_shape: Shape of one window, (75, 46, 140, 1)
+            batch_sizes: Batch sizes warmed up at startup; batches are padded up to these
+        """
+        self.input_shape = tuple(input_shape)
+        self.batch_sizes = sorted(set(int(b) for b in batch_sizes if int(b) > 0)) or [1]
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self) -> None:
+        """Run one forward pass per batch size so the first request is not slow"""
+        start_time = time.time()
+        for batch_size in self.batch_sizes:
+            self._forward(np.zeros((batch_size,) + self.input_shape, dtype=np.float32))
+        logger.info(f"Warmed up {self.name} backend for batch sizes {self.batch_sizes} "
+                    f"in {time.time() - start_time:.2f}s")
+
+    def run(self, arr: np.ndarray) -> np.ndarray:
+        """Forward a (B,75,46,140,1) float32 batch and return (B,T,vocab) probabilities.
+
+        Batches are zero-padded up to the nearest warmed-up batch size (and split
+        above the largest one) so the engine never sees a new shape at request time.
+        """
+        max_batch = self.batch_sizes[-1]
+        outputs = []
+        for offset in range(0, len(arr), max_batch):
+            chunk = arr[offset:offset + max_batch]
+            bucket = next(b for b in self.batch_sizes if b >= len(chunk))
+            if bucket > len(chunk):
+                padding = np.zeros((bucket - len(chunk),) + chunk.shape[1:], dtype=np.float32)
+                chunk = np.concatenate([chunk, padding], axis=0)
+            probs = self._forward(np.ascontiguousarray(chunk, dtype=np.float32))
+            outputs.append(probs[:min(max_batch, len(arr) - offset)])
+
+        return np.concatenate(outputs, axis=0)
+
+
+class KerasBackend(InferenceBackend):
+    """Float32 Keras model behind a `tf.function` traced with a fixed signature
+
+    Calling a concrete tf.function skips the data adapter and callback setup
+    `model.predict` does on every call, and lets XLA compile the graph once.
+    """
+
+    name = BACKEND_KERAS
+
+    def __init__(self, model: "tf.keras.Model", input_shape: Sequence[int], batch_sizes: Sequence[int],
+                 jit_compile: bool = False) -> None:
+        super().__init__(input_shape, batch_sizes)
+        import tensorflow as tf
+
+        self.model = model
+        self.jit_compile = jit_compile
+        signature = [tf.TensorSpec((None,) + self.input_shape, tf.float32)]
+
+        @tf.function(input_signature=signature, jit_compile=jit_compile)
+        def infer(x):
+            return model(x, training=False)
+
+        self._infer_fn = infer
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        import tensorflow as tf
+
+        return self._infer_fn(tf.constant(batch, dtype=tf.float32)).numpy()
+
+
+def _table_field(buf: bytes, table: int, field: int) -> Optional[int]:
+    """Position of a flatbuffer table field, or None when it is not set"""
+    vtable = table - struct.unpack_from("<i", buf, table)[0]
+    vtable_size = struct.unpack_from("<H", buf, vtable)[0]
+    entry = 4 + 2 * field
+    if entry >= vtable_size:
+        return None
+    offset = struct.unpack_from("<H", buf, vtable + entry)[0]
+    return table + offset if offset else None
+
+
+def _deref(buf: bytes, pos: int) -> int:
+    return pos + struct.unpack_from("<I", buf, pos)[0]
+
+
+def tflite_custom_ops(model_path: str) -> List[str]:
+    """Names of the custom ops in a .tflite model's operator codes"""
+    with open(model_path, "rb") as f:
+        buf = f.read()
+    try:
+        model = _deref(buf, 0)
+        codes = _table_field(buf, model, 1)  # Model.operator_codes
+        if codes is None:
+            return []
+        vector = _deref(buf, codes)
+        names = []
+        for i in range(struct.unpack_from("<I", buf, vector)[0]):
+            code = _deref(buf, vector + 4 + 4 * i)
+            custom = _table_field(buf, code, 1)  # OperatorCode.custom_code
+            if custom is not None:
+                string = _deref(buf, custom)
+                length = struct.unpack_from("<I", buf, string)[0]
+                names.append(buf[string + 4:string + 4 + length].decode("utf-8", "replace"))
+        return names
+    except struct.error as e:
+        raise ValueError(f"{model_path} is not a valid TFLite model") from e
+
+
+def uses_flex_ops(model_path: str) -> bool:
+    """True if a .tflite file calls TensorFlow (Flex) ops, which tflite-runtime cannot run"""
+    # Flex kernels are custom ops whose names start with "Flex"
+    return any(name.startswith("Flex") for name in tflite_custom_ops(model_path))
+
+
+def _tflite_interpreter_class(flex_ops: bool = False):
+    """Prefer the standalone tflite-runtime package, else TensorFlow's interpreter
+
+    Models with Flex ops always need TensorFlow's interpreter.
+    """
+    if not flex_ops:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+            return Interpreter
+        except ImportError:
+            pass
+    try:
+        import tensorflow as tf
+    except ImportError as e:
+        raise RuntimeError("This TFLite model uses TensorFlow (Flex) ops and needs tensorflow installed") from e
+    return tf.lite.Interpreter
+
+
+class TFLiteBackend(InferenceBackend):
+    """Converted TFLite model run on the CPU
+
+    The interpreter is resized to each batch size on demand. It is not thread
+    safe, so forward passes are serialized with a lock.
+    """
+
+    def __init__(self, model_path: str, name: str, input_shape: Sequence[int], batch_sizes: Sequence[int],
+                 num_threads: Optional[int] = None) -> None:
+        super().__init__(input_shape, batch_sizes)
+        self.name = name
+        self.model_path = model_path
+        self.flex_ops = uses_flex_ops(model_path)
+        self.interpreter = _tflite_interpreter_class(self.flex_ops)(model_path=model_path, num_threads=num_threads)
+        self._input_index = self.interpreter.get_input_details()[0]["index"]
+        self._output_index = self.interpreter.get_output_details()[0]["index"]
+        self._batch_size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        with self._lock:
+            if self._batch_size != len(batch):
+                self.interpreter.resize_tensor_input(self._input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self._input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).copy()
+
+
+def convert_to_tflite(
+    model: "tf.keras.Model",
+    backend: str,
+    output_path: str,
+    representative_windows: Optional[Callable[[], Iterable[np.ndarray]]] = None,
+    allow_flex_ops: bool = False,
+) -> int:
+    """
+    Export a Keras model to a TFLite file
+
+    Args:
+        model: Loaded Keras model
+        backend: One of TFLITE_BACKENDS
+        output_path: Where to write the .tflite file
+        representative_windows: For int8, a callable yielding (75,46,140,1) float32
+            calibration windows
+        allow_flex_ops: If the model cannot be expressed in builtin ops, fall back to
+            TensorFlow (Flex) ops. Such files only load with tensorflow installed,
+            not with tflite-runtime.
+
+    Returns:
+        Size of the written file in bytes
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    supported_ops: List = [tf.lite.OpsSet.TFLITE_BUILTINS]
+
+    if backend == BACKEND_TFLITE_FP16:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif backend == BACKEND_TFLITE_DYNAMIC:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif backend == BACKEND_TFLITE_INT8:
+        if representative_windows is None:
+            raise ValueError("int8 conversion needs calibration windows")
+
+        def representative_dataset():
+            for window in representative_windows():
+                yield [np.asarray(window, dtype=np.float32)[None]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        # Inputs and outputs stay float32; ops without an int8 kernel stay float
+        supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8] + supported_ops
+    else:
+        raise ValueError(f"Unknown TFLite backend: {backend}")
+
+    converter.target_spec.supported_ops = supported_ops
+    try:
+        flatbuffer = converter.convert()
+    except Exception as e:
+        if not allow_flex_ops:
+            raise RuntimeError(
+                f"{backend} conversion needs ops without a builtin TFLite kernel; allow TensorFlow (Flex) "
+                "ops to convert anyway (the model then needs tensorflow, not tflite-runtime, to load)"
+            ) from e
+        logger.warning(f"{backend} conversion falls back to TensorFlow (Flex) ops: {e}")
+        converter.target_spec.supported_ops = supported_ops + [tf.lite.OpsSet.SELECT_TF_OPS]
+        flatbuffer = converter.convert()
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(flatbuffer)
+    logger.info(f"Wrote {backend} model to {output_path} ({len(flatbuffer) / 1e6:.1f} MB)")
+    return len(flatbuffer)
@@ -0,0 +1,288 @@
+"""
+Out-of-process inference worker pool
+Each worker process holds its own LipReaderService model. Input windows and
+output probabilities move through per-worker `multiprocessing.shared_memory`
+slots; only small control messages travel over the pipe.
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# (frames, height, width) of one input window and number of output classes
+WindowShape = Tuple[int, int, int]
+
+
+def _worker_main(worker_id: int, service_kwargs: Dict[str, Any], input_name: str, output_name: str,
+                 max_batch: int, window_shape: WindowShape, num_classes: int, conn) -> None:
+    """Worker process entry point: load the model once, then serve batches."""
+    from services.lip_reader_service import LipReaderService
+
+    logging.basicConfig(level=logging.INFO)
+    service = LipReaderService(**service_kwargs)
+    if not service.is_ready:
+        conn.send(("error", service.load_error or "model did not load"))
+        conn.close()
+        return
+
+    input_shm = shared_memory.SharedMemory(name=input_name)
+    output_shm = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_batch,) + window_shape, dtype=np.uint8, buffer=input_shm.buf)
+    outputs = np.ndarray((max_batch, window_shape[0], num_classes), dtype=np.float32, buffer=output_shm.buf)
+
+    conn.send(("ready", service.model_version))
+    try:
+        while True:
+            request = conn.recv()
+            if request is None:
+                break
+            batch_size = request
+            try:
+                probs = service.predict_probs(inputs[:batch_size])
+                outputs[:batch_size] = probs
+                conn.send(("ok", batch_size))
+            except Exception as e:
+                logger.exception("Worker %d failed to run batch", worker_id)
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # Drop the numpy views before closing the mappings
+        del inputs, outputs
+        input_shm.close()
+        output_shm.close()
+
+
+class _Worker:
+    """Parent-side handle for one worker process and its shared-memory slots"""
+
+    def __init__(self, worker_id: int, max_batch: int, window_shape: WindowShape, num_classes: int) -> None:
+        self.worker_id = worker_id
+        self.input_shm = shared_memory.SharedMemory(
+            create=True, size=max_batch * int(np.prod(window_shape))
+        )
+        self.output_shm = shared_memory.SharedMemory(
+            create=True, size=max_batch * window_shape[0] * num_classes * np.dtype(np.float32).itemsize
+        )
+        self.inputs = np.ndarray((max_batch,) + window_shape, dtype=np.uint8, buffer=self.input_shm.buf)
+        self.outputs = np.ndarray(
+            (max_batch, window_shape[0], num_classes), dtype=np.float32, buffer=self.output_shm.buf
+        )
+
+        self.process: Optional[mp.Process] = None
+        self.conn = None
+        self.lock = asyncio.Lock()
+        self.load = 0  # batches queued or running on this worker
+        self.restarts = 0
+        self.batches = 0
+
+    def close(self) -> None:
+        self.inputs = self.outputs = None
+        for shm in (self.input_shm, self.output_shm):
+            shm.close()
+            shm.unlink()
+
+
+class InferencePool:
+    """Routes batches to the least-loaded of N model worker processes"""
+
+    def __init__(
+        self,
+        num_workers: int,
+        service_kwargs: Dict[str, Any],
+        decode: Callable[[np.ndarray], List[Dict[str, Any]]],
+        max_batch: int = 8,
+        window_shape: WindowShape = (75, 46, 140),
+        num_classes: int = 41,
+        start_timeout: float = 300.0,
+    ) -> None:
+        """
+        Args:
+            num_workers: Number of worker processes
+            service_kwargs: Keyword arguments for LipReaderService in each worker
+            decode: Turns (B,T,V) probabilities into prediction dicts (runs in the API process)
+            max_batch: Largest batch one shared-memory slot holds
+            window_shape: (frames, height, width) of an input window
+            num_classes: Size of the model output layer
+            start_timeout: Seconds to wait for a worker to load its model
+        """
+        self.num_workers = max(1, num_workers)
+        self.service_kwargs = service_kwargs
+        self.decode = decode
+        self.max_batch = max(1, max_batch)
+        self.window_shape = tuple(window_shape)
+        self.num_classes = num_classes
+        self.start_timeout = start_timeout
+
+        # TensorFlow is not fork-safe
+        self._context = mp.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._monitor: Optional[asyncio.Task] = None
+        self.is_ready = False
+        self.load_error: Optional[str] = None
+        self.model_version = "mock"
+
+    def _spawn(self, worker: _Worker) -> None:
+        """Start (or restart) the process behind a worker slot and wait until ready."""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, self.service_kwargs, worker.input_shm.name, worker.output_shm.name,
+                  self.max_batch, self.window_shape, self.num_classes, child_conn),
+            name=f"inference-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+
+        try:
+            if not parent_conn.poll(self.start_timeout):
+                raise RuntimeError(f"Inference worker {worker.worker_id} did not start")
+            status, payload = parent_conn.recv()
+        except EOFError:
+            status, payload = "error", "worker exited while loading"
+        except Exception:
+            process.kill()
+            parent_conn.close()
+            raise
+        if status != "ready":
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+            parent_conn.close()
+            raise RuntimeError(f"Inference worker {worker.worker_id} failed to load the model: {payload}")
+        model_version = payload
+        self.model_version = model_version
+        logger.info(f"Inference worker {worker.worker_id} ready (pid={process.pid}, model={model_version})")
+
+        worker.process = process
+        worker.conn = parent_conn
+
+    async def start(self) -> None:
+        for worker_id in range(self.num_workers):
+            worker = _Worker(worker_id, self.max_batch, self.window_shape, self.num_classes)
+            self._workers.append(worker)
+        try:
+            await asyncio.gather(*(asyncio.to_thread(self._spawn, w) for w in self._workers))
+        except Exception as e:
+            self.load_error = str(e)
+            raise
+        self._monitor = asyncio.create_task(self._monitor_workers(), name="inference-pool-monitor")
+        self.is_ready = True
+
+    async def stop(self) -> None:
+        self.is_ready = False
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+        for worker in self._workers:
+            try:
+                if worker.conn is not None:
+                    worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            worker.close()
+        self._workers = []
+
+    async def _restart(self, worker: _Worker) -> None:
+        """Replace a dead worker process; callers hold `worker.lock`."""
+        worker.restarts += 1
+        logger.warning(f"Restarting inference worker {worker.worker_id} (restart #{worker.restarts})")
+        if worker.process is not None and worker.process.is_alive():
+            worker.process.kill()
+        if worker.conn is not None:
+            worker.conn.close()
+            worker.conn = None
+        await asyncio.to_thread(self._spawn, worker)
+
+    async def _monitor_workers(self, interval: float = 1.0) -> None:
+        """Restart idle workers that died between requests."""
+        while True:
+            await asyncio.sleep(interval)
+            for worker in self._workers:
+                if worker.process is not None and not worker.process.is_alive() and not worker.lock.locked():
+                    async with worker.lock:
+                        try:
+                            await self._restart(worker)
+                        except Exception as e:
+                            logger.error(f"Failed to restart inference worker {worker.worker_id}: {e}")
+
+    @staticmethod
+    def _roundtrip(worker: _Worker, batch_size: int) -> Tuple[str, Any]:
+        worker.conn.send(batch_size)
+        return worker.conn.recv()
+
+    async def _run_on_worker(self, worker: _Worker, windows: np.ndarray) -> np.ndarray:
+        worker.load += 1
+        try:
+            async with worker.lock:
+                if worker.process is None or not worker.process.is_alive():
+                    await self._restart(worker)
+
+                batch_size = len(windows)
+                worker.inputs[:batch_size] = windows
+                try:
+                    status, payload = await asyncio.to_thread(self._roundtrip, worker, batch_size)
+                except (EOFError, BrokenPipeError, ConnectionResetError, OSError) as e:
+                    # The process died mid-batch; bring up a replacement for later requests
+                    await self._restart(worker)
+                    raise RuntimeError(f"Inference worker {worker.worker_id} crashed") from e
+
+                if status != "ok":
+                    raise RuntimeError(f"Inference worker {worker.worker_id} failed: {payload}")
+
+                worker.batches += 1
+                return worker.outputs[:batch_size].copy()
+        finally:
+            worker.load -= 1
+
+    async def predict_probs(self, windows: np.ndarray) -> np.ndarray:
+        """Run a (B,T,H,W) uint8 batch on the least-loaded workers and return (B,T,V) probabilities."""
+        started = time.perf_counter()
+        chunks = [windows[i:i + self.max_batch] for i in range(0, len(windows), self.max_batch)]
+        tasks = []
+        for chunk in chunks:
+            worker = min(self._workers, key=lambda w: w.load)
+            # Reserve the worker now so the next chunk is routed elsewhere
+            tasks.append(asyncio.create_task(self._run_on_worker(worker, chunk)))
+            await asyncio.sleep(0)
+        probs = np.concatenate(await asyncio.gather(*tasks), axis=0)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="forward")
+        return probs
+
+    async def predict_batch(self, windows: np.ndarray) -> List[Dict[str, Any]]:
+        """Scheduler runner: batched forward pass in a worker, CTC decode in this process."""
+        return self.decode(await self.predict_probs(windows))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": [
+                {
+                    "worker_id": w.worker_id,
+                    "pid": w.process.pid if w.process is not None else None,
+                    "alive": bool(w.process is not None and w.process.is_alive()),
+                    "load": w.load,
+                    "batches": w.batches,
+                    "restarts": w.restarts,
+                }
+                for w in self._workers
+            ]
+        }
@@ -0,0 +1,233 @@
+"""
+Inference scheduler that micro-batches prediction requests
+Windows submitted by all WebSocket sessions and `/predict` uploads are
+collected into batches and run through a single forward pass.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from services.metrics import BATCH_SIZE, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Blocking callable (run in a thread) or coroutine function
+BatchRunner = Callable[[np.ndarray], Union[List[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]]
+
+
+@dataclass
+class RawWindow:
+    """A window whose undecoded (T,V) probabilities are wanted, e.g. one slice of a long clip"""
+
+    window: np.ndarray
+
+
+def collate_windows(items: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack plain and `RawWindow` items into one batch plus a mask of the raw rows"""
+    raw = np.array([isinstance(item, RawWindow) for item in items])
+    windows = np.stack([item.window if isinstance(item, RawWindow) else item for item in items])
+    return windows, raw
+
+
+def decode_rows(probs: np.ndarray, raw: np.ndarray,
+                decode: Callable[[np.ndarray], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """CTC-decode the plain rows of a (B,T,V) batch; raw rows get {"probs": (T,V)}"""
+    decoded = iter(decode(probs[~raw]) if not raw.all() else [])
+    return [{"probs": probs[i]} if raw[i] else next(decoded) for i in range(len(probs))]
+
+
+class InferenceScheduler:
+    """Collects pending windows into batches and fans results back to callers"""
+
+    def __init__(self, runner: BatchRunner, max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 collate: Callable[[Sequence[Any]], Any] = np.stack, max_in_flight: int = 1) -> None:
+        """
+        Args:
+            runner: Callable mapping a (B,T,H,W) uint8 batch to B result dicts; blocking
+                callables run in a worker thread, coroutine functions are awaited
+            max_batch_size: Flush as soon as this many windows are pending
+            max_wait_ms: Flush a partial batch after waiting this long for more windows
+            collate: Combines the submitted items into the runner's batch argument
+            max_in_flight: Batches run concurrently, e.g. one per inference worker process
+        """
+        self.runner = runner
+        self.collate = collate
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batches: Set[asyncio.Task] = set()
+
+        # Stats
+        self.batches_run = 0
+        self.windows_run = 0
+        self.batch_size_counts: Counter = Counter()
+        self.total_queue_wait = 0.0
+        self.total_forward_time = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._task = asyncio.create_task(self._run(), name="inference-scheduler")
+        logger.info(
+            f"InferenceScheduler started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f}, max_in_flight={self.max_in_flight})"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        for batch_task in list(self._batches):
+            batch_task.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+
+        # Fail anything still waiting
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference scheduler stopped"))
+
+    async def submit(self, window: Any) -> Dict[str, Any]:
+        """
+        Queue a (T,H,W) uint8 window and wait for its prediction
+
+        Args:
+            window: Preprocessed mouth frames for one clip or session window (or
+                any item the scheduler's `collate` accepts)
+
+        Returns:
+            Prediction dict with text, confidence, processing_time and batch_size
+        """
+        if self._task is None:
+            await self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        submitted = time.perf_counter()
+        self._queue.put_nowait((window, future, submitted))
+
+        result = await future
+        result["processing_time"] = time.perf_counter() - submitted
+        return result
+
+    async def _collect_batch(self) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        """Wait for the first window, then gather more until full or max_wait elapses."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free slot first so the next batch keeps filling meanwhile
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # Drop requests whose callers went away while queued
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        self._batches.discard(task)
+        self._slots.release()
+
+    async def _run_batch(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]) -> None:
+        """Run one batch through the runner and resolve its callers' futures."""
+        started = time.perf_counter()
+        try:
+            windows = self.collate([window for window, _, _ in batch])
+            if asyncio.iscoroutinefunction(self.runner):
+                results = await self.runner(windows)
+            else:
+                results = await asyncio.to_thread(self.runner, windows)
+            if len(results) != len(batch):
+                # Results cannot be matched to callers; fail them all rather than truncate
+                raise RuntimeError(f"Runner returned {len(results)} results for a batch of {len(batch)}")
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference scheduler stopped"))
+            raise
+        except Exception as e:
+            logger.exception("Batched inference failed: %s", e)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        forward_time = time.perf_counter() - started
+        self.batches_run += 1
+        self.windows_run += len(batch)
+        self.batch_size_counts[len(batch)] += 1
+        self.total_forward_time += forward_time
+        BATCH_SIZE.observe(len(batch))
+
+        for (_, future, submitted), result in zip(batch, results):
+            self.total_queue_wait += started - submitted
+            STAGE_SECONDS.observe(started - submitted, stage="queue_wait")
+            if not future.done():
+                result["batch_size"] = len(batch)
+                result["queue_wait"] = started - submitted
+                result["batch_time"] = forward_time
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and batch-size statistics"""
+        batches = self.batches_run or 1
+        windows = self.windows_run or 1
+        return {
+            "queue_depth": self.queue_depth,
+            "batches_in_flight": len(self._batches),
+            "batches_run": self.batches_run,
+            "windows_run": self.windows_run,
+            "mean_batch_size": self.windows_run / batches,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_size_counts.items())},
+            "mean_queue_wait": self.total_queue_wait / windows,
+            "mean_forward_time": self.total_forward_time / batches,
+        }
@@ -0,0 +1,286 @@
+"""
+Asynchronous prediction jobs
+`POST /jobs` stores the upload and returns a job id immediately. A fixed
+number of worker tasks then run queued jobs in priority order. Job state is
+kept in a SQLite database, so queued and finished jobs survive a restart.
+Jobs that were running when the server stopped are queued again. Store calls
+block on disk, so the queue runs them in worker threads.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Priority classes, highest first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are already waiting"""
+
+
+@dataclass
+class Job:
+    """One queued upload and, once finished, its prediction"""
+
+    id: str
+    priority: str
+    filename: str
+    path: str  # stored upload; removed or kept by the upload store once the job finishes
+    digest: str
+    status: str = JOB_QUEUED
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Client-facing view (without the server-side path)"""
+        data = asdict(self)
+        data.pop("path")
+        data.pop("digest")
+        return data
+
+
+class JobStore:
+    """SQLite persistence for jobs; each call is a short, blocking transaction"""
+
+    _COLUMNS = ("id", "priority", "filename", "path", "digest", "status", "created_at",
+                "started_at", "finished_at", "result", "error")
+
+    def __init__(self, db_path: str) -> None:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, priority TEXT, filename TEXT, path TEXT, digest TEXT, status TEXT, "
+            "created_at REAL, started_at REAL, finished_at REAL, result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at)")
+
+    def _row_to_job(self, row) -> Job:
+        values = dict(zip(self._COLUMNS, row))
+        values["result"] = json.loads(values["result"]) if values["result"] else None
+        return Job(**values)
+
+    def save(self, job: Job) -> None:
+        values = asdict(job)
+        values["result"] = json.dumps(job.result) if job.result is not None else None
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                [values[c] for c in self._COLUMNS],
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def unfinished(self) -> List[Job]:
+        """Queued and running jobs, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that finished before `older_than`"""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (JOB_DONE, JOB_FAILED, older_than),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+JobRunner = Callable[[Job], Awaitable[Dict[str, Any]]]
+JobListener = Callable[[Job], Any]
+
+
+class JobQueue:
+    """Priority queue of jobs drained by a bounded set of worker tasks"""
+
+    def __init__(self, store: JobStore, runner: JobRunner, workers: int = 2, max_queued: int = 100,
+                 retention: Optional[float] = None) -> None:
+        """
+        Args:
+            store: Persistence for job state
+            runner: Coroutine that runs a job and returns its result
+            workers: Jobs run concurrently
+            max_queued: Waiting jobs before `submit` raises JobQueueFull
+            retention: Seconds finished jobs are kept in the store
+        """
+        self.store = store
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.retention = retention
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._order = itertools.count()
+        self._listeners: Dict[str, List[JobListener]] = {}
+
+        # Stats
+        self.jobs_done = 0
+        self.jobs_failed = 0
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Re-queue jobs left unfinished by a previous run, then start the workers."""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        if self.retention is not None:
+            await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+
+        recovered = 0
+        for job in await asyncio.to_thread(self.store.unfinished):
+            if not os.path.exists(job.path):
+                await self._finish(job, error="Upload was lost before the job ran")
+                continue
+            job.status = JOB_QUEUED
+            job.started_at = None
+            await asyncio.to_thread(self.store.save, job)
+            self._enqueue(job)
+            recovered += 1
+        if recovered:
+            logger.info(f"Re-queued {recovered} unfinished jobs")
+
+        self._tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+        logger.info(f"JobQueue started (workers={self.workers}, max_queued={self.max_queued})")
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs stay `running` and are re-queued on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _enqueue(self, job: Job) -> None:
+        self._queue.put_nowait((PRIORITIES[job.priority], next(self._order), job.id))
+
+    async def submit(self, path: str, filename: str, digest: str, priority: str = "normal") -> Job:
+        """Persist and queue a job for a stored upload"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self.queued >= self.max_queued:
+            raise JobQueueFull(f"{self.queued} jobs are already waiting")
+
+        job = Job(id=uuid.uuid4().hex, priority=priority, filename=filename, path=path, digest=digest,
+                  created_at=time.time())
+        await asyncio.to_thread(self.store.save, job)
+        self._enqueue(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def watch(self, job_id: str, listener: JobListener) -> Optional[Job]:
+        """
+        Call `listener(job)` once the job finishes
+
+        Returns:
+            The job, or None if it does not exist. A job that has already
+            finished is returned without registering the listener.
+        """
+        job = await self.get(job_id)
+        if job is not None and job.status not in (JOB_DONE, JOB_FAILED):
+            self._listeners.setdefault(job_id, []).append(listener)
+        return job
+
+    def unwatch(self, job_id: str, listener: JobListener) -> None:
+        """Drop a listener registered with `watch`, e.g. when its client disconnects"""
+        listeners = self._listeners.get(job_id)
+        if listeners is None:
+            return
+        if listener in listeners:
+            listeners.remove(listener)
+        if not listeners:
+            del self._listeners[job_id]
+
+    async def _finish(self, job: Job, result: Optional[Dict[str, Any]] = None,
+                      error: Optional[str] = None) -> None:
+        job.status = JOB_FAILED if error is not None else JOB_DONE
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        await asyncio.to_thread(self.store.save, job)
+        if error is not None:
+            self.jobs_failed += 1
+        else:
+            self.jobs_done += 1
+
+        for listener in self._listeners.pop(job.id, []):
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Job listener failed: {e}")
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = await self.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                continue
+
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            await asyncio.to_thread(self.store.save, job)
+            try:
+                result = await self.runner(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed: {e}")
+                await self._finish(job, error=str(e))
+            else:
+                await self._finish(job, result=result)
+
+            if self.retention is not None:
+                await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "jobs_done": self.jobs_done,
+            "jobs_failed": self.jobs_failed,
+        }
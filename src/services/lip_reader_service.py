@@ -9,24 +9,28 @@ import os
 import logging
 import asyncio
 import time
-from typing import Dict, Any, List, Tuple, Optional, Union
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple, Optional, Sequence, Union
 
 import numpy as np
 import cv2
 
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import (
-    Conv3D,
-    LSTM,
-    Dense,
-    Dropout,
-    Bidirectional,
-    MaxPool3D,
-    Activation,
-    TimeDistributed,
-    Flatten,
+if TYPE_CHECKING:
+    import tensorflow as tf
+
+# TensorFlow is imported lazily inside the methods that need it, so importing
+# this module (and starting the server) doesn't pay its multi-second import cost.
+
+from services.inference_backends import (
+    BACKEND_KERAS,
+    TFLITE_BACKENDS,
+    InferenceBackend,
+    KerasBackend,
+    TFLiteBackend,
+    default_tflite_path,
 )
+from services.metrics import STAGE_SECONDS
+from utils.ctc_decoder import CTCDecoder, LexiconTrie
+from utils.video_reader import DEFAULT_MOUTH_CROP, crop_mouth_frame, pad_frames, read_video_frames, video_fps
 
 logger = logging.getLogger(__name__)
 
@@ -36,23 +40,115 @@ class LipReaderService:
     # Default vocabulary (matches the example notebook)
     VOCAB = [x for x in "abcdefghijklmnopqrstuvwxyz'?!123456789 "]
 
-    def __init__(self, model_path: Optional[str] = None) -> None:
-        self.model: Optional[tf.keras.Model] = None
+    # Model input geometry: (frames, height, width)
+    WINDOW_FRAMES = 75
+    FRAME_HEIGHT = 46
+    FRAME_WIDTH = 140
+
+    # Batch sizes the compiled inference function is traced and warmed up for
+    DEFAULT_BATCH_SIZES = (1, 2, 4, 8)
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        jit_compile: bool = False,
+        batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+        decoder: str = "greedy",
+        beam_width: int = 10,
+        beam_prune_threshold: float = 1e-3,
+        lexicon_path: Optional[str] = None,
+        load_model: bool = True,
+        artifact_path: Optional[str] = None,
+        backend: str = BACKEND_KERAS,
+        tflite_path: Optional[str] = None,
+        tflite_threads: Optional[int] = None,
+        incremental: bool = False,
+        mock: bool = False,
+    ) -> None:
+        self.model: Optional["tf.keras.Model"] = None
         self.is_initialized = False
-
-        # Create StringLookup layers
-        self.char_to_num = tf.keras.layers.StringLookup(vocabulary=self.VOCAB, oov_token="")
-        self.num_to_char = tf.keras.layers.StringLookup(
-            vocabulary=self.char_to_num.get_vocabulary(), invert=True, oov_token=""
+        self.is_ready = False
+        self.load_error: Optional[str] = None
+        self.model_path = model_path
+        # Serve mock predictions without touching TensorFlow (benchmarks, offline testing)
+        self.mock = mock
+        self.artifact_path = artifact_path
+        self.jit_compile = jit_compile
+        self.batch_sizes = sorted(set(int(b) for b in batch_sizes if int(b) > 0)) or [1]
+        self.backend_name = backend
+        self.tflite_path = tflite_path
+        self.tflite_threads = tflite_threads
+        self.backend: Optional[InferenceBackend] = None
+        # Encoder/head split for incremental streaming (Keras backend only)
+        self.incremental = incremental
+        self._encode_fn = None
+        self._head_fn = None
+        self.receptive_field = 0
+        self.feature_size = 0
+        # Identifies the loaded weights; cached predictions are keyed by it
+        self.model_version = "mock"
+
+        # Index -> char table shares the StringLookup layout: OOV "" at 0, blank last
+        lexicon = None
+        if lexicon_path:
+            try:
+                lexicon = LexiconTrie.from_file(lexicon_path)
+                logger.info(f"Loaded lexicon with {lexicon.size} words from {lexicon_path}")
+            except OSError:
+                logger.warning("Could not read lexicon %s; beam search will be unconstrained", lexicon_path)
+        self.decode_method = decoder
+        self.decoder = CTCDecoder(
+            self.VOCAB,
+            beam_width=beam_width,
+            prune_threshold=beam_prune_threshold,
+            lexicon=lexicon,
         )
 
-        # Try to initialize model from provided path or environment
-        self._initialize_model(model_path)
+        # Load synchronously unless the caller defers it (the server loads in
+        # the background via `load`; pool-mode API processes never load)
+        if load_model:
+            self.load()
         logger.info("LipReaderService initialized")
 
+    def load(self) -> None:
+        """Build or restore the model, trace it and warm it up.
+
+        Blocking; the server runs it in a background thread so the port opens
+        immediately and `/ready` reports when it is done.
+        """
+        if self.is_ready:
+            return
+
+        if self.mock:
+            logger.info("LipReaderService running in mock-model mode")
+            self.is_ready = True
+            return
+
+        start_time = time.time()
+        try:
+            self._initialize_backend()
+            self.is_ready = True
+            logger.info(f"Model ready in {time.time() - start_time:.2f}s (version={self.model_version})")
+        except Exception as e:
+            self.load_error = str(e)
+            logger.exception("Failed to load LipReaderService model: %s", e)
+
     @staticmethod
-    def build_model(input_shape: Tuple[int, int, int, int], output_size: int) -> Sequential:
+    def build_model(input_shape: Tuple[int, int, int, int], output_size: int) -> "tf.keras.Sequential":
         """Builds the model architecture used in the LipNet-style notebook."""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import (
+            Conv3D,
+            LSTM,
+            Dense,
+            Dropout,
+            Bidirectional,
+            MaxPool3D,
+            Activation,
+            TimeDistributed,
+            Flatten,
+        )
+
         model = Sequential()
         model.add(Conv3D(128, 3, input_shape=input_shape, padding="same"))
         model.add(Activation("relu"))
@@ -83,10 +179,7 @@ class LipReaderService:
         model_path: path to checkpoint (TensorFlow checkpoint or .h5 weights).
         """
         try:
-            # Default input shape used in the notebook: (75,46,140,1)
-            input_shape = (75, 46, 140, 1)
-            output_size = len(self.char_to_num.get_vocabulary()) + 1
-            self.model = self.build_model(input_shape, output_size)
+            import tensorflow as tf
 
             # Determine candidate weight paths
             candidates = []
@@ -95,6 +188,17 @@ class LipReaderService:
             candidates.append(os.path.join("models", "checkpoint"))
             candidates.append(os.path.join("model_preparation", "models", "checkpoint"))
 
+            # A saved artifact of the same weights restores in one step
+            weights_path = next((p for p in candidates if p and os.path.exists(p)), None)
+            expected_version = self._weights_version(weights_path) if weights_path else None
+            if self.artifact_path and self._load_artifact(expected_version):
+                return
+
+            # Default input shape used in the notebook: (75,46,140,1)
+            input_shape = (75, 46, 140, 1)
+            output_size = self.decoder.num_classes
+            self.model = self.build_model(input_shape, output_size)
+
             loaded = False
             for p in candidates:
                 if not p:
@@ -141,11 +245,154 @@ class LipReaderService:
                 self.is_initialized = False
             else:
                 self.is_initialized = True
+                self.model_version = self._weights_version(p)
+                if self.artifact_path:
+                    self._save_artifact()
 
         except Exception as e:
             logger.exception("Failed to initialize LipReaderService model: %s", e)
             self.is_initialized = False
 
+    def _artifact_version_file(self) -> str:
+        return os.path.join(self.artifact_path, "lipza_version.txt")
+
+    def _load_artifact(self, expected_version: Optional[str]) -> bool:
+        """Restore the model from the saved artifact if it matches the current weights."""
+        import tensorflow as tf
+
+        try:
+            if not os.path.isdir(self.artifact_path):
+                return False
+            with open(self._artifact_version_file(), "r", encoding="utf-8") as f:
+                artifact_version = f.read().strip()
+            if expected_version is not None and artifact_version != expected_version:
+                logger.info(f"Model artifact is stale ({artifact_version} != {expected_version}); rebuilding")
+                return False
+
+            self.model = tf.keras.models.load_model(self.artifact_path, compile=False)
+            self.model_version = artifact_version
+            self.is_initialized = True
+            logger.info(f"Loaded model artifact from {self.artifact_path}")
+            return True
+        except Exception:
+            logger.warning("Could not load model artifact %s; rebuilding", self.artifact_path, exc_info=True)
+            self.model = None
+            return False
+
+    def _save_artifact(self) -> None:
+        """Save the built model with its weights so later boots skip build and restore."""
+        try:
+            self.model.save(self.artifact_path, include_optimizer=False)
+            with open(self._artifact_version_file(), "w", encoding="utf-8") as f:
+                f.write(self.model_version)
+            logger.info(f"Saved model artifact to {self.artifact_path}")
+        except Exception:
+            logger.warning("Could not save model artifact %s", self.artifact_path, exc_info=True)
+
+    def _initialize_backend(self) -> None:
+        """Create the configured inference backend and warm it up."""
+        input_shape = (self.WINDOW_FRAMES, self.FRAME_HEIGHT, self.FRAME_WIDTH, 1)
+
+        if self.backend_name in TFLITE_BACKENDS:
+            path = self.tflite_path or default_tflite_path(self.backend_name)
+            if not os.path.exists(path):
+                logger.warning(f"TFLite model {path} not found. Run scripts/convert_model.py; using mock predictions.")
+                return
+            self.backend = TFLiteBackend(
+                path, self.backend_name, input_shape, self.batch_sizes, num_threads=self.tflite_threads
+            )
+            self.model_version = f"{self._weights_version(path)}:{self.backend_name}"
+            self.is_initialized = True
+        else:
+            self._initialize_model(self.model_path)
+            if not self.is_initialized:
+                return
+            self.backend = KerasBackend(self.model, input_shape, self.batch_sizes, jit_compile=self.jit_compile)
+            if self.incremental:
+                self._split_model()
+
+        self.backend.warmup()
+
+    def _split_model(self) -> None:
+        """Split the Keras model at TimeDistributed(Flatten) into a per-frame encoder and a sequence head.
+
+        Also derives the encoder's temporal receptive field (frames on each side)
+        from its Conv3D kernels; temporal pooling would make features non-local,
+        in which case incremental inference stays disabled.
+        """
+        import tensorflow as tf
+
+        layers = self.model.layers
+        split = next((i for i, layer in enumerate(layers) if isinstance(layer, tf.keras.layers.TimeDistributed)), None)
+        if split is None:
+            logger.warning("Model has no TimeDistributed layer; incremental encoder disabled")
+            return
+
+        receptive_field = 0
+        for layer in layers[:split]:
+            if isinstance(layer, tf.keras.layers.Conv3D):
+                receptive_field += (layer.kernel_size[0] - 1) // 2 * layer.dilation_rate[0]
+            elif isinstance(layer, tf.keras.layers.MaxPool3D) and layer.pool_size[0] != 1:
+                logger.warning("Encoder pools over time; incremental encoder disabled")
+                return
+
+        frame_shape = (self.FRAME_HEIGHT, self.FRAME_WIDTH, 1)
+        encoder = tf.keras.Sequential([tf.keras.Input((None,) + frame_shape)] + layers[:split + 1])
+        feature_size = encoder.output_shape[-1]
+        head = tf.keras.Sequential([tf.keras.Input((self.WINDOW_FRAMES, feature_size))] + layers[split + 1:])
+
+        @tf.function(input_signature=[tf.TensorSpec((None, None) + frame_shape, tf.float32)])
+        def encode(x):
+            return encoder(x, training=False)
+
+        @tf.function(input_signature=[tf.TensorSpec((None, self.WINDOW_FRAMES, feature_size), tf.float32)])
+        def run_head(x):
+            return head(x, training=False)
+
+        self._encode_fn = encode
+        self._head_fn = run_head
+        self.receptive_field = receptive_field
+        self.feature_size = feature_size
+        logger.info(f"Split model for incremental inference (receptive field ±{receptive_field} frames, "
+                    f"{feature_size} features per frame)")
+
+    @property
+    def supports_incremental(self) -> bool:
+        return self._encode_fn is not None
+
+    def encode_frames(self, chunks: np.ndarray) -> np.ndarray:
+        """Run the encoder over a (B,L,46,140) uint8 batch of frame chunks and return (B,L,features)."""
+        import tensorflow as tf
+
+        return self._encode_fn(tf.constant(self._to_model_input(chunks))).numpy()
+
+    def head_probs(self, features: np.ndarray) -> np.ndarray:
+        """Run the BiLSTM+Dense head over (B,75,features) encoder outputs and return (B,75,vocab)."""
+        import tensorflow as tf
+
+        return self._head_fn(tf.constant(features, dtype=tf.float32)).numpy()
+
+    def _run_model(self, arr: np.ndarray) -> np.ndarray:
+        """Forward a (B,75,46,140,1) float32 batch and return (B,T,vocab) probabilities."""
+        expected_shape = (self.WINDOW_FRAMES, self.FRAME_HEIGHT, self.FRAME_WIDTH, 1)
+        if arr.shape[1:] != expected_shape:
+            if self.model is None:
+                raise ValueError(f"{self.backend_name} backend expects windows of shape {expected_shape}")
+            return self.model.predict(arr, batch_size=len(arr), verbose=0)
+        return self.backend.run(arr)
+
+    @staticmethod
+    def _weights_version(path: str) -> str:
+        """Version string for a weights path: its name plus latest modification time."""
+        try:
+            if os.path.isdir(path):
+                mtime = max((e.stat().st_mtime for e in os.scandir(path)), default=os.path.getmtime(path))
+            else:
+                mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = 0
+        return f"{os.path.basename(os.path.normpath(path))}@{int(mtime)}"
+
     async def predict(self, video_or_frames: Union[str, np.ndarray]) -> Dict[str, Any]:
         """Public async API: accept either a file path (str) or a numpy ndarray of frames.
 
@@ -197,56 +444,135 @@ class LipReaderService:
             logger.exception("Error running prediction: %s", e)
             return {"text": "ERROR", "confidence": 0.0, "processing_time": time.time() - start_time}
 
-    def _read_and_preprocess_video(self, video_path: str, target_frames: int = 75, crop: Tuple[int, int, int, int] = (190, 236, 80, 220)) -> Optional[np.ndarray]:
-        """Read video with cv2, crop, convert to grayscale, normalize and return np.ndarray shape (1,T,H,W,1)."""
+    @classmethod
+    def preprocess_frame(cls, frame: np.ndarray) -> np.ndarray:
+        """Convert a decoded camera frame to a (46,140) uint8 grayscale mouth frame."""
+        if frame.ndim == 3 and frame.shape[-1] == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        elif frame.ndim == 3 and frame.shape[-1] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+        elif frame.ndim == 3:
+            frame = frame[..., 0]
+        if frame.shape != (cls.FRAME_HEIGHT, cls.FRAME_WIDTH):
+            frame = cv2.resize(frame, (cls.FRAME_WIDTH, cls.FRAME_HEIGHT), interpolation=cv2.INTER_LINEAR)
+        return frame.astype(np.uint8, copy=False)
+
+    async def predict_window(self, window: np.ndarray) -> Dict[str, Any]:
+        """Run prediction on a (T,46,140) uint8 window of preprocessed mouth frames."""
+        start_time = time.time()
+
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                logger.error("Could not open video: %s", video_path)
-                return None
+            if window.ndim != 3:
+                return {"text": "", "confidence": 0.0, "processing_time": 0.0}
 
-            frames: List[np.ndarray] = []
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                # Convert to grayscale and crop
-                y1, y2, x1, x2 = crop
-                h, w = frame.shape[:2]
-                # Clamp crop to frame bounds
-                y1c, y2c = max(0, y1), min(h, y2)
-                x1c, x2c = max(0, x1), min(w, x2)
-                cropped = frame[y1c:y2c, x1c:x2c]
-                gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-                # Ensure size matches notebook expectation (46,140)
-                gray = cv2.resize(gray, (140, 46), interpolation=cv2.INTER_LINEAR)
-                frames.append(gray)
-
-            cap.release()
-
-            if len(frames) == 0:
+            arr = self._to_model_input(window[np.newaxis])  # (1,T,H,W,1)
+            result = await asyncio.to_thread(self._process_frames_array, arr)
+            result["processing_time"] = time.time() - start_time
+            return result
+
+        except Exception as e:
+            logger.exception("Error running window prediction: %s", e)
+            return {"text": "ERROR", "confidence": 0.0, "processing_time": time.time() - start_time}
+
+    def _mouth_transform(self, crop: Tuple[int, int, int, int], tracker=None):
+        """Per-frame BGR -> (46,140) grayscale mouth crop, following `tracker` when it has a ROI"""
+        size = (self.FRAME_WIDTH, self.FRAME_HEIGHT)
+
+        def transform(frame: np.ndarray) -> np.ndarray:
+            if tracker is not None:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                roi = tracker.update(gray)
+                if roi is not None:
+                    mouth = gray[roi["y"]:roi["y"] + roi["height"], roi["x"]:roi["x"] + roi["width"]]
+                    if mouth.size:
+                        return cv2.resize(mouth, size, interpolation=cv2.INTER_AREA)
+            return crop_mouth_frame(frame, crop, size)
+
+        return transform
+
+    def read_video_window(self, video_path: str, target_frames: int = 75, crop: Tuple[int, int, int, int] = DEFAULT_MOUTH_CROP,
+                          tracker=None) -> Optional[np.ndarray]:
+        """Read video with cv2, crop, convert to grayscale and return a (T,46,140) uint8 window.
+
+        Only the frames kept by uniform sampling are decoded, and cropping runs
+        while the background thread decodes the next frames. With a
+        `MouthTracker` the crop follows the tracked mouth; `crop` is used until
+        a face is found.
+        """
+        try:
+            frames = read_video_frames(video_path, target_frames=target_frames,
+                                       transform=self._mouth_transform(crop, tracker))
+            if not frames:
                 return None
 
-            # Sample or pad frames to target_frames
-            if len(frames) < target_frames:
-                # pad by repeating last frame
-                last = frames[-1]
-                while len(frames) < target_frames:
-                    frames.append(last.copy())
-            elif len(frames) > target_frames:
-                # sample uniformly
-                idxs = np.linspace(0, len(frames) - 1, target_frames).astype(int)
-                frames = [frames[i] for i in idxs]
-
-            arr = np.stack(frames, axis=0).astype(np.float32) / 255.0
-            arr = np.expand_dims(arr, axis=-1)  # (T,H,W,1)
-            arr = np.expand_dims(arr, axis=0)   # (1,T,H,W,1)
-            return arr
+            # pad by repeating last frame
+            return np.stack(pad_frames(frames, target_frames), axis=0)
+
+        except Exception:
+            logger.exception("Error reading/preprocessing video %s", video_path)
+            return None
+
+    def read_video_clip(self, video_path: str, crop: Tuple[int, int, int, int] = DEFAULT_MOUTH_CROP,
+                        tracker=None, max_frames: Optional[int] = None) -> Optional[Tuple[np.ndarray, float, bool]]:
+        """Read every frame (up to `max_frames`) at the native frame rate.
+
+        Returns ((N,46,140) uint8 mouth frames, fps, truncated), or None if the
+        video cannot be read. `truncated` is True when the video has frames
+        past `max_frames`. Used for windowed inference on long clips.
+        """
+        try:
+            # One extra frame tells a clip of exactly `max_frames` from a longer one
+            frames = read_video_frames(video_path, transform=self._mouth_transform(crop, tracker),
+                                       max_frames=max_frames + 1 if max_frames is not None else None)
+            if not frames:
+                return None
+            truncated = max_frames is not None and len(frames) > max_frames
+            if truncated:
+                frames = frames[:max_frames]
+            return np.stack(frames, axis=0), video_fps(video_path), truncated
 
         except Exception:
             logger.exception("Error reading/preprocessing video %s", video_path)
             return None
 
+    def _read_and_preprocess_video(self, video_path: str, target_frames: int = 75, crop: Tuple[int, int, int, int] = DEFAULT_MOUTH_CROP) -> Optional[np.ndarray]:
+        """Read video with cv2, crop, convert to grayscale, normalize and return np.ndarray shape (1,T,H,W,1)."""
+        window = self.read_video_window(video_path, target_frames, crop)
+        if window is None:
+            return None
+        return self._to_model_input(window[np.newaxis])
+
+    @staticmethod
+    def _to_model_input(windows: np.ndarray) -> np.ndarray:
+        """Normalize a (B,T,H,W) uint8 batch to the (B,T,H,W,1) float32 model input."""
+        arr = windows.astype(np.float32) / 255.0
+        return arr[..., np.newaxis]
+
+    def decode_probs(self, probs: np.ndarray) -> List[Dict[str, Any]]:
+        """CTC-decode (B,T,vocab) model outputs into one prediction dict per batch row."""
+        with STAGE_SECONDS.time(stage="ctc_decode"):
+            return self.decoder.decode(np.asarray(probs), method=self.decode_method)
+
+    def predict_probs(self, windows: np.ndarray) -> np.ndarray:
+        """Forward a (B,T,46,140) uint8 batch and return (B,T,vocab) probabilities."""
+        if not self.is_ready:
+            raise RuntimeError("Model is still loading")
+
+        arr = self._to_model_input(windows)
+
+        if not self.is_initialized or self.backend is None:
+            return self._mock_probs(arr)
+
+        with STAGE_SECONDS.time(stage="forward"):
+            return np.asarray(self._run_model(arr), dtype=np.float32)
+
+    def predict_batch(self, windows: np.ndarray) -> List[Dict[str, Any]]:
+        """Run one forward pass over a (B,T,46,140) uint8 batch of windows.
+
+        Blocking; intended to be called from a worker thread by the inference scheduler.
+        """
+        return self.decode_probs(self.predict_probs(windows))
+
     def _process_video(self, video_path: str) -> Dict[str, Any]:
         """Process video file and return prediction dict."""
         try:
@@ -254,32 +580,14 @@ class LipReaderService:
             if frames is None:
                 return {"text": "", "confidence": 0.0}
 
-            if not self.is_initialized or self.model is None:
+            if not self.is_initialized or self.backend is None:
                 # fallback to mock: pick text based on mean intensity
                 return self._mock_prediction(frames)
 
             # model expects shape (batch, T, H, W, C)
-            probs = self.model.predict(frames)
+            probs = self._run_model(frames)
             # probs shape: (1, T, vocab_size)
-            # decode with CTC greedy
-            input_length = np.array([probs.shape[1]])
-            decoded, _ = tf.keras.backend.ctc_decode(probs, input_length=input_length, greedy=True)
-            decoded = decoded[0].numpy()
-
-            # convert indices to chars
-            if decoded.shape[1] == 0:
-                text = ""
-            else:
-                seq = decoded[0]
-                # remove padding and blanks (if present)
-                chars = [self.num_to_char(int(i)).numpy().decode("utf-8") for i in seq if i != -1 and i != 0]
-                text = "".join(chars)
-
-            # simple confidence estimate: mean max-prob across timesteps
-            timestep_max = np.max(probs, axis=-1)  # shape (1,T)
-            confidence = float(np.mean(timestep_max))
-
-            return {"text": text, "confidence": confidence}
+            return self.decode_probs(probs)[0]
 
         except Exception:
             logger.exception("Error in _process_video")
@@ -293,6 +601,28 @@ class LipReaderService:
         idx = int(mean_intensity * len(mock_words)) % len(mock_words)
         return {"text": mock_words[idx], "confidence": confidence}
 
+    def _mock_probs(self, arr: np.ndarray) -> np.ndarray:
+        """Build (B,T,vocab) probabilities that CTC-decode to the mock prediction,
+        so mock mode exercises the same batching and decoding path as the model."""
+        batch, steps = arr.shape[:2]
+        num_classes = self.decoder.num_classes
+        probs = np.empty((batch, steps, num_classes), dtype=np.float32)
+
+        for b in range(batch):
+            mock = self._mock_prediction(arr[b])
+            confidence = mock["confidence"]
+            path = np.full(steps, self.decoder.blank)
+            # Space characters out so repeated letters stay separated by blanks
+            spacing = max(2, steps // (len(mock["text"]) + 1))
+            for k, char in enumerate(mock["text"]):
+                if (k + 1) * spacing < steps:
+                    path[(k + 1) * spacing] = self.decoder.char_to_index[char]
+
+            probs[b] = (1.0 - confidence) / (num_classes - 1)
+            probs[b, np.arange(steps), path] = confidence
+
+        return probs
+
     def _process_frames_array(self, arr: np.ndarray) -> Dict[str, Any]:
         """Process a preprocessed frames array of shape (1,T,H,W,1) and
         return prediction dict. This mirrors the logic in `_process_video`.
@@ -301,25 +631,11 @@ class LipReaderService:
             if arr is None:
                 return {"text": "", "confidence": 0.0}
 
-            if not self.is_initialized or self.model is None:
+            if not self.is_initialized or self.backend is None:
                 return self._mock_prediction(arr)
 
-            probs = self.model.predict(arr)
-            input_length = np.array([probs.shape[1]])
-            decoded, _ = tf.keras.backend.ctc_decode(probs, input_length=input_length, greedy=True)
-            decoded = decoded[0].numpy()
-
-            if decoded.shape[1] == 0:
-                text = ""
-            else:
-                seq = decoded[0]
-                chars = [self.num_to_char(int(i)).numpy().decode("utf-8") for i in seq if i != -1 and i != 0]
-                text = "".join(chars)
-
-            timestep_max = np.max(probs, axis=-1)
-            confidence = float(np.mean(timestep_max))
-
-            return {"text": text, "confidence": confidence}
+            probs = self._run_model(arr)
+            return self.decode_probs(probs)[0]
 
         except Exception:
             logger.exception("Error in _process_frames_array")
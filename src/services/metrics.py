@@ -0,0 +1,266 @@
+"""
+Prometheus-style metrics for the backend
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format by the `/metrics` endpoint. Metrics
+are updated from the event loop and from decode/inference threads, so every
+metric guards its values with a lock.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond parsing to multi-second uploads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled counters are exported as 0 before the first increment
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                logger.debug(f"Gauge callback for {self.name} failed", exc_info=True)
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time spent in the `with` block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def process_rss_bytes() -> float:
+    """Resident set size of this process from /proc (0 where unavailable)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+REGISTRY = MetricsRegistry()
+
+# Per-stage latency: parse, decode, preprocess, queue_wait, forward, ctc_decode, send, video_read
+STAGE_SECONDS = REGISTRY.histogram(
+    "lipza_stage_seconds", "Time spent in each processing stage", ("stage",)
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "lipza_request_seconds", "End-to-end prediction latency", ("source",)
+)
+FRAMES_RECEIVED = REGISTRY.counter(
+    "lipza_frames_received_total", "Frames received over WebSocket", ("protocol",)
+)
+FRAMES_DROPPED = REGISTRY.counter(
+    "lipza_frames_dropped_total", "Frames discarded by the session overflow policy"
+)
+OUTBOUND_DROPPED = REGISTRY.counter(
+    "lipza_outbound_messages_dropped_total", "Messages discarded from full per-client send queues"
+)
+SLOW_CLIENT_DISCONNECTS = REGISTRY.counter(
+    "lipza_slow_client_disconnects_total", "Clients disconnected because their send queue was full"
+)
+PREDICTIONS = REGISTRY.counter(
+    "lipza_predictions_total", "Predictions returned", ("source",)
+)
+ERRORS = REGISTRY.counter(
+    "lipza_errors_total", "Errors by kind", ("kind",)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "lipza_cache_requests_total", "Prediction cache lookups", ("tier", "result")
+)
+MOTION_GATE_WINDOWS = REGISTRY.counter(
+    "lipza_motion_gate_windows_total", "Streaming windows by motion gate decision", ("decision",)
+)
+CAPTURE_LEVEL_CHANGES = REGISTRY.counter(
+    "lipza_capture_level_changes_total", "Capture level changes pushed to clients", ("direction",)
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "lipza_inference_batch_size", "Windows per batched forward pass", buckets=BATCH_SIZE_BUCKETS
+)
+ACTIVE_CONNECTIONS = REGISTRY.gauge(
+    "lipza_active_connections", "Open WebSocket connections"
+)
+INFERENCE_QUEUE_DEPTH = REGISTRY.gauge(
+    "lipza_inference_queue_depth", "Windows waiting for the inference scheduler"
+)
+EVENT_LOOP_LAG = REGISTRY.gauge(
+    "lipza_event_loop_lag_seconds", "How late the event loop woke up for the last lag probe"
+)
+RSS_BYTES = REGISTRY.gauge(
+    "lipza_process_resident_memory_bytes", "Resident memory of the API process", function=process_rss_bytes
+)
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Background task: measure how late `asyncio.sleep` wakes up"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - started - interval))
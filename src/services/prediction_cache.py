@@ -0,0 +1,136 @@
+"""
+Content-addressed cache for upload predictions
+Tier 1 maps (upload digest, model version) to a prediction; the optional
+tier 2 maps (upload digest, decode settings) to the preprocessed uint8
+window so a new model version or decoder can still skip video decoding.
+"""
+
+import copy
+import logging
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _result_size(value: Any) -> int:
+    """Approximate deep size of a JSON-like result, including nested words and timestamps"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_result_size(k) + _result_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_result_size(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + value.nbytes
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """LRU mapping bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = sys.getsizeof) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self.total_bytes -= self._sizes[key]
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self.total_bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            old_key, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class PredictionCache:
+    """Two-tier cache keyed by a streaming hash of the uploaded bytes"""
+
+    def __init__(self, max_entries: int = 100, max_bytes: Optional[int] = None,
+                 tensor_cache: bool = False, tensor_max_entries: int = 100,
+                 tensor_max_bytes: Optional[int] = None) -> None:
+        """
+        Args:
+            max_entries: Maximum cached predictions
+            max_bytes: Maximum approximate size of cached predictions
+            tensor_cache: Also cache preprocessed (75,46,140) uint8 windows
+            tensor_max_entries: Maximum cached windows
+            tensor_max_bytes: Maximum total size of cached windows
+        """
+        self.results = LRUCache(max_entries, max_bytes, sizeof=_result_size)
+        self.tensors: Optional[LRUCache] = None
+        if tensor_cache:
+            self.tensors = LRUCache(tensor_max_entries, tensor_max_bytes, sizeof=lambda arr: arr.nbytes)
+
+    def get_result(self, digest: str, model_version: str) -> Optional[Dict[str, Any]]:
+        result = self.results.get((digest, model_version))
+        CACHE_REQUESTS.inc(tier="result", result="hit" if result is not None else "miss")
+        # Callers annotate and serialize what they get back; keep the cached copy intact
+        return copy.deepcopy(result) if result is not None else None
+
+    def put_result(self, digest: str, model_version: str, result: Dict[str, Any]) -> None:
+        # Per-request timing fields don't belong in the cache
+        stored = {k: copy.deepcopy(v) for k, v in result.items() if k not in ("processing_time", "batch_size")}
+        self.results.put((digest, model_version), stored)
+
+    def get_tensor(self, digest: str, decode_key: Hashable) -> Optional[np.ndarray]:
+        if self.tensors is None:
+            return None
+        window = self.tensors.get((digest, decode_key))
+        CACHE_REQUESTS.inc(tier="tensor", result="hit" if window is not None else "miss")
+        return window
+
+    def put_tensor(self, digest: str, decode_key: Hashable, window: np.ndarray) -> None:
+        if self.tensors is None:
+            return
+        window.setflags(write=False)
+        self.tensors.put((digest, decode_key), window)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "results": self.results.stats(),
+            "tensors": self.tensors.stats() if self.tensors is not None else None,
+        }
@@ -0,0 +1,113 @@
+"""
+On-demand profiling
+`RequestTrace` collects the stage timings of one debug-flagged request so they
+can be returned with the response. `StackSampler` periodically snapshots the
+stacks of every thread with `sys._current_frames()` and aggregates them into
+the collapsed-stack format read by flamegraph.pl and speedscope.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """Per-request stage timings, accumulated across frames of a WebSocket prediction"""
+
+    def __init__(self, started: Optional[float] = None) -> None:
+        """
+        Args:
+            started: `time.perf_counter()` value the request started at (default: now)
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.stages: Dict[str, float] = defaultdict(float)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] += seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the wall time spent in the `with` block to `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Stage timings in milliseconds, in the order the stages first ran"""
+        return {
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        }
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profiling run is requested while another one is active"""
+
+
+class StackSampler:
+    """Samples the stacks of all threads in this process at a fixed interval"""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = max(0.001, interval)
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _sample_once(self, own_thread: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(self._frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.samples[";".join(reversed(stack))] += 1
+        self.sample_count += 1
+
+    def run(self, duration: float) -> None:
+        """Sample for `duration` seconds; blocking, run it in a worker thread."""
+        own_thread = threading.get_ident()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            self._sample_once(own_thread)
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """One `frame;frame;frame count` line per distinct stack, hottest first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+_profile_lock = threading.Lock()
+
+
+def sample_stacks(duration: float, interval: float = 0.005) -> StackSampler:
+    """Run one profiling window, refusing to overlap with another; blocking."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profiling run is already in progress")
+    try:
+        sampler = StackSampler(interval)
+        logger.info(f"Sampling stacks for {duration:.1f}s every {sampler.interval * 1000:.1f}ms")
+        sampler.run(duration)
+        logger.info(f"Collected {sampler.sample_count} samples, {len(sampler.samples)} distinct stacks")
+        return sampler
+    finally:
+        _profile_lock.release()
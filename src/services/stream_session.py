@@ -0,0 +1,122 @@
+"""
+Per-connection streaming state for the /ws endpoint
+Frames are handed from the receiver task to the processing task through a
+bounded queue so a slow model never backs up the socket.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from services.capture_control import CaptureController
+from services.incremental_encoder import EncoderCache
+from services.metrics import FRAMES_DROPPED, FRAMES_RECEIVED
+from utils.frame_protocol import PROTOCOL_JSON
+from utils.frame_window import FrameWindow
+from utils.motion_gate import MotionGate
+
+logger = logging.getLogger(__name__)
+
+# Overflow policies for the per-session frame queue
+POLICY_DROP_OLDEST = "drop_oldest"  # discard the oldest queued frame
+POLICY_COALESCE = "coalesce"  # drain every queued frame into the window, infer once
+POLICY_BLOCK = "block"  # stop reading from the socket until there is room
+OVERFLOW_POLICIES = (POLICY_DROP_OLDEST, POLICY_COALESCE, POLICY_BLOCK)
+
+
+@dataclass
+class PendingFrame:
+    """A received but not yet decoded frame message"""
+
+    kind: str  # "json" (base64 string) or "binary" (framed bytes)
+    data: Union[str, bytes]
+    received_at: float = field(default_factory=time.perf_counter)
+
+
+class StreamSession:
+    """State owned by one WebSocket connection"""
+
+    def __init__(self, window: FrameWindow, queue_size: int = 8, overflow_policy: str = POLICY_DROP_OLDEST) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+
+        self.window = window
+        self.protocol = PROTOCOL_JSON
+        self.overflow_policy = overflow_policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        # Cached encoder features when incremental inference is enabled
+        self.encoder_cache: Optional[EncoderCache] = None
+        # Mouth tracker for frames sent without an ROI, and the last ROI pushed to the client
+        self.tracker = None
+        self.roi_sent: Optional[Dict[str, int]] = None
+        # Attach a stage timing breakdown to each prediction (set via the config message)
+        self.debug = False
+        # Skips inference while the mouth is still; the last result is answered instead
+        self.motion_gate: Optional[MotionGate] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        # Chooses the capture settings pushed to the client
+        self.capture: Optional[CaptureController] = None
+        # (job id, listener) registered by watch_job; removed when the connection closes
+        self.job_watches: List[Tuple[str, Callable]] = []
+
+        # Counters
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.predictions_sent = 0
+        self.queue_lag = 0.0  # seconds the most recently dequeued frame waited
+
+    async def enqueue(self, frame: PendingFrame) -> None:
+        """
+        Queue a received frame, applying the overflow policy when full
+
+        Args:
+            frame: Frame message from the receiver task
+        """
+        self.frames_received += 1
+        FRAMES_RECEIVED.inc(protocol=frame.kind)
+
+        if self.overflow_policy == POLICY_BLOCK:
+            await self.queue.put(frame)
+            return
+
+        if self.queue.full():
+            # Latest frame wins: discard the oldest one
+            self.queue.get_nowait()
+            self.frames_dropped += 1
+            FRAMES_DROPPED.inc()
+
+        self.queue.put_nowait(frame)
+
+    async def next_frames(self) -> List[PendingFrame]:
+        """
+        Wait for the next frame; under the coalesce policy also take every
+        frame already queued so they all land in the window before one inference
+        """
+        frames = [await self.queue.get()]
+
+        if self.overflow_policy == POLICY_COALESCE:
+            while not self.queue.empty():
+                frames.append(self.queue.get_nowait())
+
+        self.queue_lag = time.perf_counter() - frames[0].received_at
+        return frames
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "protocol": self.protocol,
+            "overflow_policy": self.overflow_policy,
+            "stride": self.window.stride,
+            "frames_received": self.frames_received,
+            "frames_dropped": self.frames_dropped,
+            "frames_processed": self.frames_processed,
+            "predictions_sent": self.predictions_sent,
+            "queue_depth": self.queue.qsize(),
+            "queue_lag": self.queue_lag,
+            "mouth_roi": self.roi_sent,
+            "debug": self.debug,
+            "motion_gate": self.motion_gate.stats() if self.motion_gate is not None else None,
+            "capture": self.capture.stats() if self.capture is not None else None,
+        }
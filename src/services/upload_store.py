@@ -0,0 +1,166 @@
+"""
+Upload storage for the /predict endpoint
+Streams uploads to temporary files in chunks without blocking the event loop
+and optionally keeps them under a retention policy.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+@dataclass
+class StoredUpload:
+    """A streamed upload on disk"""
+
+    path: Path
+    size: int
+    digest: str  # sha256 of the uploaded bytes
+
+
+class UploadStore:
+    """Streams uploads to disk and enforces a retention policy on kept files"""
+
+    def __init__(
+        self,
+        directory: Path,
+        keep_uploads: bool = False,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        chunk_size: int = 1024 * 1024,
+        max_upload_size: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            directory: Where kept uploads are stored
+            keep_uploads: Keep uploads after prediction instead of deleting them
+            max_bytes: Total size of kept uploads before the oldest are removed
+            max_age: Seconds after which kept uploads are removed
+            chunk_size: Bytes read from the request per iteration
+            max_upload_size: Reject uploads larger than this many bytes
+        """
+        self.directory = Path(directory)
+        self.keep_uploads = keep_uploads
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self.max_upload_size = max_upload_size
+
+        if self.keep_uploads:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    async def save(self, upload: UploadFile) -> StoredUpload:
+        """
+        Stream an upload into a temporary file chunk by chunk, hashing as it goes
+
+        Args:
+            upload: Incoming multipart file
+
+        Returns:
+            StoredUpload for the temporary file; pass its path to `release` when done
+
+        Raises:
+            UploadTooLarge: If the upload exceeds `max_upload_size`
+        """
+        suffix = Path(upload.filename or "").suffix or ".mp4"
+        fd, name = tempfile.mkstemp(prefix="lipza-upload-", suffix=suffix)
+        path = Path(name)
+        size = 0
+        digest = hashlib.sha256()
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = await upload.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.max_upload_size is not None and size > self.max_upload_size:
+                        raise UploadTooLarge(f"Upload exceeds {self.max_upload_size} bytes")
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        return StoredUpload(path=path, size=size, digest=digest.hexdigest())
+
+    def release(self, path: Path) -> Optional[Path]:
+        """
+        Keep or delete a temporary upload once prediction is done
+
+        Blocking; call through `asyncio.to_thread`.
+
+        Returns:
+            Path of the kept file, or None if it was deleted
+        """
+        if not self.keep_uploads:
+            path.unlink(missing_ok=True)
+            return None
+
+        dest = self.directory / f"{int(time.time() * 1000)}{path.suffix}"
+        shutil.move(str(path), dest)
+        return dest
+
+    def sweep(self) -> int:
+        """
+        Enforce the retention policy on kept uploads
+
+        Removes files older than `max_age`, then the oldest files until the
+        total size is within `max_bytes`.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.directory.is_dir():
+            return 0
+
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        entries.sort()
+
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            oversize = self.max_bytes is not None and total > self.max_bytes
+            if not (expired or oversize):
+                continue
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove upload {path}: {e}")
+
+        if removed:
+            logger.info(f"Upload sweeper removed {removed} file(s)")
+        return removed
+
+    async def run_sweeper(self, interval: float) -> None:
+        """Background task: sweep kept uploads every `interval` seconds"""
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Upload sweep failed: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,11 @@
+"""
+Shared pytest setup
+Tests import modules the way the server does (from `src/`) and run in
+mock-model mode, so TensorFlow is not needed.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("LIPZA_MOCK_MODEL", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
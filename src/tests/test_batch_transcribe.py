@@ -0,0 +1,58 @@
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "scripts"))
+
+import batch_transcribe  # noqa: E402
+
+
+def fake_decode(path):
+    """Decode stand-in run in the pool's worker processes"""
+    name = os.path.basename(path)
+    if name.startswith("crash-always"):
+        os._exit(1)
+    if name.startswith("crash-once") and not os.path.exists(path + ".seen"):
+        open(path + ".seen", "w").close()
+        os._exit(1)
+    if name.startswith("raise"):
+        raise RuntimeError("worker bug")
+    if name.startswith("unreadable"):
+        return path, None
+    return path, np.zeros((2, 2), dtype=np.uint8)
+
+
+def make_pool():
+    return ProcessPoolExecutor(max_workers=2, mp_context=mp.get_context("spawn"))
+
+
+def decode_all(paths, **kwargs):
+    results = batch_transcribe.decode_all(paths, make_pool, decode=fake_decode, **kwargs)
+    return {os.path.basename(path): (window, error) for path, window, error in results}
+
+
+def test_every_path_is_reported_once(tmp_path):
+    names = ["a.mp4", "b.mp4", "unreadable.mp4", "raise.mp4"]
+    results = decode_all([str(tmp_path / n) for n in names], max_in_flight=2)
+    assert set(results) == set(names)
+    assert results["a.mp4"][0].shape == (2, 2) and results["a.mp4"][1] is None
+    assert results["unreadable.mp4"] == (None, None)
+    assert results["raise.mp4"][0] is None and "worker bug" in results["raise.mp4"][1]
+
+
+def test_pool_is_restarted_and_in_flight_decodes_resubmitted(tmp_path):
+    names = ["a.mp4", "crash-once.mp4", "b.mp4", "c.mp4"]
+    results = decode_all([str(tmp_path / n) for n in names], max_in_flight=4)
+    assert set(results) == set(names)
+    assert all(error is None and window is not None for window, error in results.values())
+
+
+def test_a_file_that_keeps_killing_workers_is_given_up(tmp_path):
+    names = ["crash-always.mp4", "a.mp4"]
+    results = decode_all([str(tmp_path / n) for n in names], max_in_flight=2, max_attempts=2)
+    window, error = results["crash-always.mp4"]
+    assert window is None and "died 2 times" in error
+    assert results["a.mp4"][1] is None
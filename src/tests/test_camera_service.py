@@ -0,0 +1,87 @@
+import numpy as np
+
+from services.camera_service import MouthTracker
+
+
+class StubCascade:
+    """Face detector stand-in that counts its calls"""
+
+    def __init__(self, face=None):
+        self.face = face  # (x, y, w, h) as a fraction of the frame, or None for an empty scene
+        self.calls = 0
+
+    def detectMultiScale(self, gray, **kwargs):
+        self.calls += 1
+        if self.face is None:
+            return []
+        h, w = gray.shape
+        fx, fy, fw, fh = self.face
+        return [(int(fx * w), int(fy * h), int(fw * w), int(fh * h))]
+
+
+def scene(shape=(240, 320), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def test_empty_scene_is_searched_every_detect_interval_frames():
+    cascade = StubCascade()
+    tracker = MouthTracker(cascade, detect_interval=10)
+    gray = scene()
+    for _ in range(30):
+        assert tracker.update(gray) is None
+    assert cascade.calls == 3
+
+
+def test_face_entering_the_view_is_found_at_the_next_search():
+    cascade = StubCascade()
+    tracker = MouthTracker(cascade, detect_interval=10)
+    gray = scene()
+    for _ in range(5):
+        tracker.update(gray)
+    cascade.face = (0.25, 0.2, 0.5, 0.6)
+    rois = [tracker.update(gray) for _ in range(6)]
+    assert rois[:5] == [None] * 5
+    assert rois[5] is not None
+
+
+def test_visible_face_is_tracked_between_detections():
+    cascade = StubCascade((0.25, 0.2, 0.5, 0.6))
+    tracker = MouthTracker(cascade, detect_interval=10, min_confidence=0.6)
+    gray = scene()
+    rois = [tracker.update(gray) for _ in range(25)]
+    assert all(roi is not None for roi in rois)
+    assert cascade.calls == 3
+    assert tracker.tracked_frames == 22
+
+
+def test_template_matches_the_smoothed_box():
+    cascade = StubCascade((0.25, 0.2, 0.5, 0.6))
+    tracker = MouthTracker(cascade, detect_interval=1, smoothing=0.5)
+    tracker.update(scene())
+    cascade.face = (0.3, 0.25, 0.4, 0.5)
+    tracker.update(scene())
+    _, _, w, h = tracker.box
+    assert tracker._template.shape == (int(round(h)), int(round(w)))
+
+
+def test_frame_size_change_restarts_tracking():
+    cascade = StubCascade((0.25, 0.2, 0.5, 0.6))
+    tracker = MouthTracker(cascade, detect_interval=10)
+    full = tracker.update(scene((240, 320)))
+    calls = cascade.calls
+    half = tracker.update(scene((120, 160)))
+    assert cascade.calls == calls + 1
+    # Detected fresh at the new scale, not smoothed against the old box
+    assert half["width"] == full["width"] // 2
+    assert half["x"] == full["x"] // 2
+
+
+def test_lost_face_is_dropped_after_max_misses():
+    cascade = StubCascade((0.25, 0.2, 0.5, 0.6))
+    tracker = MouthTracker(cascade, detect_interval=1, max_misses=3)
+    gray = scene()
+    tracker.update(gray)
+    cascade.face = None
+    rois = [tracker.update(scene(seed=i + 1)) for i in range(3)]
+    assert rois[0] is not None and rois[1] is not None
+    assert rois[2] is None
@@ -0,0 +1,97 @@
+import pytest
+
+from services.capture_control import CAPTURE_LEVELS, CaptureController
+
+
+def calm(controller, times):
+    for _ in range(times):
+        controller.update(backlog=0, frames_dropped=controller._frames_dropped)
+
+
+def test_starts_at_the_client_frame_rate():
+    settings = CaptureController(client_fps=10).settings()
+    assert settings["level"] == 0
+    assert settings["fps"] == 10
+    assert settings["roi"] is None
+
+
+def test_fps_never_exceeds_the_client_rate():
+    controller = CaptureController(client_fps=10)
+    rates = []
+    for level in range(len(CAPTURE_LEVELS)):
+        controller.level = level
+        rates.append(controller.settings()["fps"])
+    assert max(rates) == 10
+    assert rates == sorted(rates, reverse=True)
+    assert min(rates) >= 1
+
+
+def test_settings_include_the_roi():
+    roi = {"x": 1, "y": 2, "width": 140, "height": 46}
+    assert CaptureController().settings(roi)["roi"] == roi
+
+
+@pytest.mark.parametrize("backlog, dropped, rtt, reason", [
+    (17, 0, None, "backlog"),
+    (0, 3, None, "dropped_frames"),
+    (0, 0, 0.5, "rtt"),
+])
+def test_overload_steps_down_immediately(backlog, dropped, rtt, reason):
+    controller = CaptureController(backlog_high=16, rtt_high=0.25)
+    if rtt is not None:
+        controller.record_rtt(rtt)
+    assert controller.update(backlog=backlog, frames_dropped=dropped) == 1
+    assert controller.reason == reason
+    assert controller.downgrades == 1
+
+
+def test_dropped_frames_are_counted_per_interval():
+    controller = CaptureController()
+    controller.update(backlog=0, frames_dropped=5)
+    assert controller.level == 1
+    # Same total as before: nothing new was dropped
+    controller.update(backlog=0, frames_dropped=5)
+    assert controller.level == 1
+
+
+def test_level_stops_at_the_last_step():
+    controller = CaptureController()
+    for _ in range(len(CAPTURE_LEVELS) + 3):
+        controller.update(backlog=100, frames_dropped=0)
+    assert controller.level == len(CAPTURE_LEVELS) - 1
+
+
+def test_recovers_one_step_after_enough_calm_intervals():
+    controller = CaptureController(recover_intervals=3)
+    controller.update(backlog=100, frames_dropped=0)
+    controller.update(backlog=100, frames_dropped=0)
+    calm(controller, 2)
+    assert controller.level == 2
+    calm(controller, 1)
+    assert controller.level == 1
+    assert controller.reason == "recovered"
+    calm(controller, 3)
+    assert controller.level == 0
+    calm(controller, 3)
+    assert controller.level == 0
+
+
+def test_moderate_load_holds_the_level():
+    controller = CaptureController(backlog_high=16, backlog_low=4, recover_intervals=2)
+    controller.update(backlog=100, frames_dropped=0)
+    for _ in range(5):
+        controller.update(backlog=10, frames_dropped=0)
+    assert controller.level == 1
+
+
+def test_round_trip_is_smoothed():
+    controller = CaptureController(rtt_smoothing=0.5)
+    controller.record_rtt(0.2)
+    controller.record_rtt(0.4)
+    controller.record_rtt(-1.0)  # clock skew; ignored
+    assert controller.rtt == pytest.approx(0.3)
+
+
+def test_empty_levels_are_rejected():
+    with pytest.raises(ValueError):
+        CaptureController(levels=())
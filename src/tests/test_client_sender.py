@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from services.client_sender import (
+    SEND_POLICY_DISCONNECT,
+    SLOW_CONSUMER_CLOSE_CODE,
+    ClientSender,
+)
+
+
+class FakeSocket:
+    """WebSocket stand-in whose sends wait until `open_gate` is set"""
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed_with = None
+        self.fail = fail
+        self.open_gate = asyncio.Event()
+
+    async def send_text(self, text):
+        await self.open_gate.wait()
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = (code, reason)
+
+
+def prediction(n):
+    return {"type": "prediction", "n": n}
+
+
+def control(n):
+    return {"type": "job_update", "n": n}
+
+
+def queued(sender):
+    return [json.loads(text)["n"] for text, _ in sender.queue]
+
+
+def test_queued_messages_are_sent_in_order():
+    async def main():
+        socket = FakeSocket()
+        sender = ClientSender(socket, max_queue=8)
+        sender.start()
+        for n in range(3):
+            sender.send_json(prediction(n))
+        sender.send_json(control(3))
+        socket.open_gate.set()
+        while sender.messages_sent < 4:
+            await asyncio.sleep(0)
+        await sender.stop()
+        return socket.sent
+
+    assert [m["n"] for m in asyncio.run(main())] == [0, 1, 2, 3]
+
+
+def test_drop_oldest_discards_predictions_and_keeps_control_messages():
+    async def main():
+        sender = ClientSender(FakeSocket(), max_queue=3)
+        sender.send_json(prediction(1))
+        sender.send_json(control(2))
+        sender.send_json(prediction(3))
+        assert sender.send_json(prediction(4))
+        assert queued(sender) == [2, 3, 4]
+        assert sender.send_json(control(5))
+        assert queued(sender) == [2, 4, 5]
+        assert sender.messages_dropped == 2
+
+    asyncio.run(main())
+
+
+def test_new_prediction_is_dropped_when_only_control_messages_are_queued():
+    async def main():
+        sender = ClientSender(FakeSocket(), max_queue=2)
+        sender.send_json(control(1))
+        sender.send_json(control(2))
+        assert not sender.send_json(prediction(3))
+        assert queued(sender) == [1, 2]
+        assert sender.messages_dropped == 1
+        assert not sender.closed
+
+    asyncio.run(main())
+
+
+def test_control_messages_are_bounded_at_twice_the_limit():
+    async def main():
+        sender = ClientSender(FakeSocket(), max_queue=2)
+        for n in range(4):
+            assert sender.send_json(control(n))
+        assert len(sender.queue) == 4
+        assert not sender.send_json(control(4))
+        assert sender.closed and sender.close_reason == "slow consumer"
+
+    asyncio.run(main())
+
+
+def test_disconnect_policy_closes_a_slow_consumer():
+    async def main():
+        socket = FakeSocket()
+        sender = ClientSender(socket, max_queue=2, policy=SEND_POLICY_DISCONNECT)
+        sender.start()
+        sender.send_json(prediction(0))
+        await asyncio.sleep(0)  # the writer takes it and blocks in send
+        sender.send_json(prediction(1))
+        sender.send_json(prediction(2))
+        assert not sender.send_json(prediction(3))
+        await asyncio.wait_for(sender.task, timeout=1)
+        assert not sender.send_json(control(4))
+        return socket.closed_with
+
+    assert asyncio.run(main()) == (SLOW_CONSUMER_CLOSE_CODE, "slow consumer")
+
+
+def test_failed_send_stops_the_writer():
+    async def main():
+        socket = FakeSocket(fail=True)
+        socket.open_gate.set()
+        sender = ClientSender(socket)
+        sender.start()
+        sender.send_json(prediction(0))
+        await asyncio.wait_for(sender.task, timeout=1)
+        assert sender.closed and sender.close_reason == "send failed"
+        assert not sender.send_json(prediction(1))
+
+    asyncio.run(main())
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ClientSender(FakeSocket(), policy="ignore")
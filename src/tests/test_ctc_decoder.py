@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from utils.ctc_decoder import CTCDecoder, LexiconTrie
+
+VOCAB = list("abc ")
+# Output layout: 0 = OOV, 1..4 = "a", "b", "c", " ", 5 = blank
+A, B, C, SPACE, BLANK = 1, 2, 3, 4, 5
+
+
+def peaked(indices, peak=0.9):
+    """(T,V) probabilities with most of the mass on one class per timestep"""
+    num_classes = len(VOCAB) + 2
+    probs = np.full((len(indices), num_classes), (1 - peak) / (num_classes - 1), dtype=np.float32)
+    probs[np.arange(len(indices)), indices] = peak
+    return probs
+
+
+@pytest.fixture
+def decoder():
+    return CTCDecoder(VOCAB, beam_width=8)
+
+
+def test_greedy_collapses_repeats_and_drops_blanks(decoder):
+    probs = peaked([A, A, BLANK, A, B, B, BLANK, 0, C])
+    (result,) = decoder.greedy_decode(probs[None])
+    assert result["text"] == "aabc"
+    assert result["confidence"] == pytest.approx(0.9)
+
+
+def test_greedy_decodes_each_batch_row(decoder):
+    batch = np.stack([peaked([A, BLANK, B]), peaked([C, C, BLANK])])
+    assert [r["text"] for r in decoder.greedy_decode(batch)] == ["ab", "c"]
+
+
+def test_greedy_words_reports_word_times(decoder):
+    probs = peaked([A, B, BLANK, SPACE, C, C, BLANK, BLANK])
+    result = decoder.greedy_words(probs, fps=25.0)
+    assert result["text"] == "ab c"
+    assert [w["word"] for w in result["words"]] == ["ab", "c"]
+    assert result["words"][0]["start"] == pytest.approx(0.0)
+    assert result["words"][0]["end"] == pytest.approx(2 / 25)
+    assert result["words"][1]["start"] == pytest.approx(4 / 25)
+    assert result["words"][1]["end"] == pytest.approx(6 / 25)
+
+
+def test_beam_matches_greedy_on_peaked_output(decoder):
+    probs = np.stack([peaked([A, BLANK, A, B, SPACE, C]), peaked([B, B, BLANK, C, BLANK, BLANK])])
+    assert [r["text"] for r in decoder.decode(probs, "beam")] == ["aab c", "bc"]
+
+
+def test_beam_sums_paths_that_greedy_misses(decoder):
+    # Best single path is "blank, blank" (0.36), but the paths that spell "a"
+    # add up to 0.64
+    probs = np.zeros((2, len(VOCAB) + 2), dtype=np.float32)
+    probs[:, A] = 0.4
+    probs[:, BLANK] = 0.6
+    assert decoder.decode(probs[None], "greedy")[0]["text"] == ""
+    assert decoder.decode(probs[None], "beam")[0]["text"] == "a"
+
+
+def test_beam_with_lexicon_prefers_known_words():
+    probs = peaked([A, BLANK, BLANK])
+    # "c" narrowly beats "b" at the second step
+    probs[1] = 0.0
+    probs[1, C] = 0.5
+    probs[1, B] = 0.45
+    probs[1, BLANK] = 0.05
+    unconstrained = CTCDecoder(VOCAB)
+    constrained = CTCDecoder(VOCAB, lexicon=LexiconTrie(["ab"]))
+    assert unconstrained.decode(probs[None], "beam")[0]["text"] == "ac"
+    assert constrained.decode(probs[None], "beam")[0]["text"] == "ab"
+
+
+def test_lexicon_trie_ignores_case_and_duplicates():
+    trie = LexiconTrie(["Ab", "ab\n", "", "c"])
+    assert trie.size == 2
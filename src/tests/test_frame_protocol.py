@@ -0,0 +1,61 @@
+import pytest
+
+from utils.frame_protocol import (
+    HEADER_SIZE,
+    MSG_JPEG_FRAME,
+    MSG_RAW_GRAY_FRAME,
+    pack_binary_frame,
+    parse_binary_frame,
+)
+
+ROI = {"x": 10, "y": 20, "width": 140, "height": 46}
+
+
+def test_jpeg_frame_round_trip():
+    data = pack_binary_frame(MSG_JPEG_FRAME, b"\xff\xd8jpeg", seq=42, timestamp_ms=1234.5, roi=ROI,
+                             mouth_crop=True)
+    frame = parse_binary_frame(data)
+    assert frame.msg_type == MSG_JPEG_FRAME
+    assert frame.seq == 42
+    assert frame.timestamp_ms == 1234.5
+    assert frame.roi == ROI
+    assert frame.mouth_crop
+    assert bytes(frame.payload) == b"\xff\xd8jpeg"
+
+
+def test_raw_gray_frame_round_trip():
+    pixels = bytes(range(6))
+    frame = parse_binary_frame(pack_binary_frame(MSG_RAW_GRAY_FRAME, pixels, width=3, height=2))
+    assert (frame.width, frame.height) == (3, 2)
+    assert frame.roi is None
+    assert not frame.mouth_crop
+    assert bytes(frame.payload) == pixels
+
+
+def test_payload_is_a_view_of_the_message():
+    data = pack_binary_frame(MSG_JPEG_FRAME, b"abc")
+    assert parse_binary_frame(data).payload.obj is data
+
+
+def test_sequence_numbers_wrap_at_32_bits():
+    assert parse_binary_frame(pack_binary_frame(MSG_JPEG_FRAME, b"x", seq=2 ** 32 + 5)).seq == 5
+
+
+def test_empty_roi_is_ignored():
+    data = pack_binary_frame(MSG_JPEG_FRAME, b"x", roi={"x": 1, "y": 1, "width": 0, "height": 46})
+    assert parse_binary_frame(data).roi is None
+
+
+def test_truncated_header_is_rejected():
+    with pytest.raises(ValueError):
+        parse_binary_frame(b"\x01" * (HEADER_SIZE - 1))
+
+
+def test_unknown_message_type_is_rejected():
+    with pytest.raises(ValueError):
+        parse_binary_frame(pack_binary_frame(9, b"x"))
+
+
+def test_raw_gray_size_mismatch_is_rejected():
+    with pytest.raises(ValueError):
+        parse_binary_frame(pack_binary_frame(MSG_RAW_GRAY_FRAME, bytes(5), width=3, height=2))
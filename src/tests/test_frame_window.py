@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from utils.frame_window import FrameWindow
+
+
+def frame(value, shape=(2, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def values(snapshot):
+    return snapshot[:, 0, 0].tolist()
+
+
+def test_filling_window_is_front_padded_with_the_oldest_frame():
+    window = FrameWindow(size=5, height=2, width=3)
+    for i in (1, 2, 3):
+        window.push(frame(i))
+    assert not window.is_full
+    assert values(window.snapshot()) == [1, 1, 1, 2, 3]
+
+
+def test_full_window_keeps_the_last_frames_in_order():
+    window = FrameWindow(size=4, height=2, width=3)
+    for i in range(1, 8):
+        window.push(frame(i))
+    assert window.is_full
+    assert window.total == 7
+    assert values(window.snapshot()) == [4, 5, 6, 7]
+
+
+def test_snapshot_writes_into_a_given_buffer():
+    window = FrameWindow(size=3, height=2, width=3)
+    window.push(frame(9))
+    out = np.zeros((3, 2, 3), dtype=np.uint8)
+    assert window.snapshot(out) is out
+    assert values(out) == [9, 9, 9]
+
+
+def test_empty_window_snapshot_is_blank():
+    assert not FrameWindow(size=3, height=2, width=3).snapshot().any()
+
+
+def test_inference_is_due_every_stride_frames():
+    window = FrameWindow(size=10, height=2, width=3, stride=3)
+    due = []
+    for i in range(7):
+        window.push(frame(i))
+        due.append(window.should_infer())
+        if due[-1]:
+            window.mark_inferred()
+    assert due == [False, False, True, False, False, True, False]
+
+
+def test_reset_empties_the_window():
+    window = FrameWindow(size=3, height=2, width=3, stride=1)
+    window.push(frame(1))
+    window.reset()
+    assert window.count == 0
+    assert not window.should_infer()
+
+
+def test_wrong_frame_shape_is_rejected():
+    window = FrameWindow(size=3, height=2, width=3)
+    with pytest.raises(ValueError):
+        window.push(frame(1, shape=(3, 2)))
+
+
+@pytest.mark.parametrize("size, stride", [(0, 1), (3, 0)])
+def test_invalid_size_or_stride_is_rejected(size, stride):
+    with pytest.raises(ValueError):
+        FrameWindow(size=size, stride=stride)
@@ -0,0 +1,116 @@
+import numpy as np
+
+from services.incremental_encoder import EncoderCache, IncrementalEncoder, IncrementalRequest
+from utils.frame_window import FrameWindow
+
+RF = 2
+WEIGHTS = np.array([0.1, -0.4, 1.0, 0.3, -0.2], dtype=np.float32)
+
+
+class ConvService:
+    """Stand-in for LipReaderService: a 'same'-padded temporal convolution encoder"""
+
+    supports_incremental = True
+    receptive_field = RF
+    feature_size = 2
+
+    def __init__(self):
+        self.frames_encoded = 0
+
+    def encode_frames(self, batch):
+        self.frames_encoded += batch.shape[0] * batch.shape[1]
+        means = batch.reshape(batch.shape[0], batch.shape[1], -1).astype(np.float32).mean(axis=-1)
+        padded = np.pad(means, ((0, 0), (RF, RF)))
+        conv = sum(w * padded[:, k:k + means.shape[1]] for k, w in enumerate(WEIGHTS))
+        return np.stack([conv, means], axis=-1)
+
+    def head_probs(self, features):
+        # Sequence-wide head, like the BiLSTM: every output sees every frame
+        return features + features.mean(axis=1, keepdims=True)
+
+    def decode_probs(self, probs):
+        return [{"probs": row} for row in probs]
+
+
+def stream(window_size=75, stride=5, steps=30, seed=0):
+    rng = np.random.default_rng(seed)
+    window = FrameWindow(size=window_size, height=4, width=4, stride=stride)
+    for _ in range(steps):
+        for _ in range(stride):
+            window.push(rng.integers(0, 256, size=(4, 4), dtype=np.uint8))
+        yield window
+
+
+def test_incremental_outputs_match_a_full_forward_pass():
+    service = ConvService()
+    encoder = IncrementalEncoder(service)
+    cache = EncoderCache()
+    for window in stream():
+        snapshot = window.snapshot()
+        (incremental,) = encoder.predict_batch([IncrementalRequest(snapshot, window.total, window.is_full, cache)])
+        (full,) = IncrementalEncoder(ConvService()).predict_batch(
+            [IncrementalRequest(snapshot, window.total, window.is_full, EncoderCache())]
+        )
+        np.testing.assert_allclose(incremental["probs"], full["probs"], rtol=1e-5, atol=1e-4)
+
+    stats = encoder.stats()
+    assert stats["incremental_steps"] > 0
+    assert stats["frames_reused"] > 0
+    assert stats["mean_frames_encoded"] < 75
+
+
+def test_sessions_in_one_batch_keep_separate_caches():
+    encoder = IncrementalEncoder(ConvService())
+    caches = [EncoderCache(), EncoderCache()]
+    for a, b in zip(stream(seed=1), stream(seed=2)):
+        requests = [IncrementalRequest(w.snapshot(), w.total, w.is_full, c) for w, c in zip((a, b), caches)]
+        results = encoder.predict_batch(requests)
+        for request, result in zip(requests, results):
+            (expected,) = IncrementalEncoder(ConvService()).predict_batch(
+                [IncrementalRequest(request.window, request.total, request.full, EncoderCache())]
+            )
+            np.testing.assert_allclose(result["probs"], expected["probs"], rtol=1e-5, atol=1e-4)
+
+
+def test_plan_reencodes_only_the_edges():
+    encoder = IncrementalEncoder(ConvService())
+    window = np.zeros((75, 4, 4), dtype=np.uint8)
+    cache = EncoderCache(features=np.zeros((75, 2), dtype=np.float32), total=100)
+
+    shift, chunks = encoder._plan(IncrementalRequest(window, 105, True, cache))
+    assert shift == 5
+    assert chunks == [(0, 2 * RF, 0, RF), (75 - 5 - 2 * RF, 75, 75 - 5 - RF, 75)]
+
+    assert encoder._plan(IncrementalRequest(window, 100, True, cache)) == (0, [])
+
+
+def test_plan_falls_back_to_a_full_encode():
+    encoder = IncrementalEncoder(ConvService())
+    window = np.zeros((75, 4, 4), dtype=np.uint8)
+    cached = EncoderCache(features=np.zeros((75, 2), dtype=np.float32), total=100)
+    full = (-1, [(0, 75, 0, 75)])
+
+    assert encoder._plan(IncrementalRequest(window, 105, False, cached)) == full  # window not full
+    assert encoder._plan(IncrementalRequest(window, 105, True, EncoderCache())) == full  # nothing cached
+    assert encoder._plan(IncrementalRequest(window, 90, True, cached)) == full  # session restarted
+    assert encoder._plan(IncrementalRequest(window, 100 + 75 - 2 * RF, True, cached)) == full  # shift too large
+
+
+def test_partial_windows_do_not_populate_the_cache():
+    encoder = IncrementalEncoder(ConvService())
+    cache = EncoderCache()
+    window = np.zeros((75, 4, 4), dtype=np.uint8)
+    encoder.predict_batch([IncrementalRequest(window, 40, False, cache)])
+    assert cache.features is None
+
+
+def test_services_without_a_split_model_run_full_windows():
+    class MockService:
+        supports_incremental = False
+
+        def predict_batch(self, windows):
+            return [{"text": "mock", "frames": len(w)} for w in windows]
+
+    window = np.zeros((75, 4, 4), dtype=np.uint8)
+    results = IncrementalEncoder(MockService()).predict_batch([IncrementalRequest(window, 75, True)])
+    assert results == [{"text": "mock", "frames": 75}]
@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from services.inference_backends import tflite_custom_ops, uses_flex_ops
+
+
+def tflite_model(custom_ops, payload=b""):
+    """
+    Minimal .tflite flatbuffer: a Model table whose operator_codes hold one
+    OperatorCode per entry (a custom op name, or None for a builtin op),
+    followed by `payload` standing in for weight buffers
+    """
+    buf = bytearray(struct.pack("<I", 0) + b"TFL3")
+
+    def align():
+        buf.extend(b"\0" * (-len(buf) % 4))
+
+    def table(fields):
+        """Write a vtable and a table of uoffset fields; returns (table pos, field positions)"""
+        align()
+        vtable = len(buf)
+        buf.extend(struct.pack("<HH", 4 + 2 * len(fields), 4 + 4 * len(fields)))
+        for i, present in enumerate(fields):
+            buf.extend(struct.pack("<H", 4 + 4 * i if present else 0))
+        align()
+        pos = len(buf)
+        buf.extend(struct.pack("<i", pos - vtable))
+        buf.extend(b"\0" * (4 * len(fields)))
+        return pos, [pos + 4 + 4 * i for i in range(len(fields))]
+
+    def point(at, target):
+        struct.pack_into("<I", buf, at, target - at)
+
+    # Model: field 0 version (unused here), field 1 operator_codes
+    model, (_, codes_field) = table([False, True])
+    point(0, model)
+
+    align()
+    vector = len(buf)
+    buf.extend(struct.pack("<I", len(custom_ops)) + b"\0" * (4 * len(custom_ops)))
+    point(codes_field, vector)
+
+    for i, name in enumerate(custom_ops):
+        # OperatorCode: field 0 deprecated_builtin_code, field 1 custom_code
+        code, (_, custom_field) = table([False, name is not None])
+        point(vector + 4 + 4 * i, code)
+        if name is not None:
+            align()
+            string = len(buf)
+            encoded = name.encode()
+            buf.extend(struct.pack("<I", len(encoded)) + encoded + b"\0")
+            point(custom_field, string)
+
+    buf.extend(payload)
+    return bytes(buf)
+
+
+def write(tmp_path, data):
+    path = tmp_path / "model.tflite"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_custom_op_names_are_read_from_operator_codes(tmp_path):
+    path = write(tmp_path, tflite_model([None, "FlexTensorListReserve", None, "MyOp"]))
+    assert tflite_custom_ops(path) == ["FlexTensorListReserve", "MyOp"]
+    assert uses_flex_ops(path)
+
+
+def test_builtin_only_model_has_no_flex_ops(tmp_path):
+    path = write(tmp_path, tflite_model([None, None]))
+    assert tflite_custom_ops(path) == []
+    assert not uses_flex_ops(path)
+
+
+def test_flex_bytes_in_weights_are_not_mistaken_for_ops(tmp_path):
+    path = write(tmp_path, tflite_model([None], payload=b"weights...Flex...more weights"))
+    assert not uses_flex_ops(path)
+
+
+def test_truncated_model_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        tflite_custom_ops(write(tmp_path, b"\x40\0\0\0TFL3"))
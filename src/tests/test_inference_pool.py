@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.inference_pool import InferencePool
+from services.inference_scheduler import InferenceScheduler
+from services.lip_reader_service import LipReaderService
+
+WINDOW_SHAPE = (LipReaderService.WINDOW_FRAMES, LipReaderService.FRAME_HEIGHT, LipReaderService.FRAME_WIDTH)
+
+
+def decode(probs):
+    return [{"text": "", "frames": len(row)} for row in probs]
+
+
+def make_pool(workers, service_kwargs=None):
+    return InferencePool(workers, service_kwargs or {"mock": True}, decode=decode, max_batch=8,
+                         window_shape=WINDOW_SHAPE, start_timeout=60)
+
+
+def windows(count):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(count,) + WINDOW_SHAPE, dtype=np.uint8)
+
+
+def test_pool_returns_probabilities_for_every_window():
+    async def scenario():
+        pool = make_pool(1)
+        await pool.start()
+        try:
+            return await pool.predict_probs(windows(11))
+        finally:
+            await pool.stop()
+
+    probs = asyncio.run(scenario())
+    assert probs.shape == (11, WINDOW_SHAPE[0], 41)
+    np.testing.assert_allclose(probs.sum(axis=-1), 1.0, rtol=1e-4)
+
+
+def test_scheduler_keeps_every_worker_busy():
+    async def scenario():
+        pool = make_pool(2)
+        await pool.start()
+        scheduler = InferenceScheduler(pool.predict_batch, max_batch_size=8, max_wait_ms=1, max_in_flight=2)
+        await scheduler.start()
+        try:
+            await asyncio.gather(*(scheduler.submit(w) for w in windows(64)))
+            return [w["batches"] for w in pool.stats()["workers"]]
+        finally:
+            await scheduler.stop()
+            await pool.stop()
+
+    batches = asyncio.run(scenario())
+    assert sum(batches) == 8
+    assert all(count > 0 for count in batches)
+
+
+def test_worker_that_cannot_load_is_reported():
+    async def scenario():
+        pool = make_pool(1, {"mock": True, "unknown_option": 1})
+        with pytest.raises(RuntimeError):
+            await pool.start()
+        await pool.stop()
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert not pool.is_ready
+    assert pool.load_error
@@ -0,0 +1,152 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.inference_scheduler import InferenceScheduler, RawWindow, collate_windows, decode_rows
+
+
+def window(value):
+    return np.full((75, 46, 140), value, dtype=np.uint8)
+
+
+def label_runner(batches):
+    """Blocking runner that labels each window by its pixel value"""
+    def run(windows):
+        batches.append(len(windows))
+        return [{"text": str(int(w[0, 0, 0]))} for w in windows]
+    return run
+
+
+async def run_scheduler(scheduler, items):
+    await scheduler.start()
+    try:
+        return await asyncio.gather(*(scheduler.submit(item) for item in items), return_exceptions=True)
+    finally:
+        await scheduler.stop()
+
+
+def test_concurrent_windows_are_batched_and_matched_to_callers():
+    batches = []
+    scheduler = InferenceScheduler(label_runner(batches), max_batch_size=4, max_wait_ms=50)
+    results = asyncio.run(run_scheduler(scheduler, [window(i) for i in range(6)]))
+
+    assert [r["text"] for r in results] == [str(i) for i in range(6)]
+    assert batches == [4, 2]
+    assert [r["batch_size"] for r in results] == [4, 4, 4, 4, 2, 2]
+    assert scheduler.stats()["batch_size_histogram"] == {"2": 1, "4": 1}
+
+
+def test_coroutine_runners_are_awaited():
+    async def run(windows):
+        return [{"text": "ok"} for _ in windows]
+
+    results = asyncio.run(run_scheduler(InferenceScheduler(run, max_wait_ms=5), [window(0), window(1)]))
+    assert [r["text"] for r in results] == ["ok", "ok"]
+
+
+def test_runner_errors_reach_every_caller_in_the_batch():
+    def run(windows):
+        raise ValueError("model exploded")
+
+    results = asyncio.run(run_scheduler(InferenceScheduler(run, max_wait_ms=50), [window(i) for i in range(3)]))
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_missing_results_fail_the_batch():
+    def run(windows):
+        return [{"text": ""}] * (len(windows) - 1)
+
+    results = asyncio.run(run_scheduler(InferenceScheduler(run, max_wait_ms=50), [window(i) for i in range(3)]))
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_scheduler_keeps_running_after_a_failed_batch():
+    calls = []
+
+    def run(windows):
+        calls.append(len(windows))
+        if len(calls) == 1:
+            raise ValueError("first batch fails")
+        return [{"text": "ok"} for _ in windows]
+
+    async def scenario():
+        scheduler = InferenceScheduler(run, max_wait_ms=5)
+        await scheduler.start()
+        try:
+            with pytest.raises(ValueError):
+                await scheduler.submit(window(0))
+            return await scheduler.submit(window(1))
+        finally:
+            await scheduler.stop()
+
+    assert asyncio.run(scenario())["text"] == "ok"
+
+
+def test_raw_windows_skip_decoding():
+    windows, raw = collate_windows([window(1), RawWindow(window(2)), window(3)])
+    assert windows.shape == (3, 75, 46, 140)
+    assert raw.tolist() == [False, True, False]
+
+    probs = np.random.default_rng(0).random((3, 75, 41)).astype(np.float32)
+    decoded = []
+
+    def decode(rows):
+        decoded.append(len(rows))
+        return [{"text": str(i)} for i in range(len(rows))]
+
+    results = decode_rows(probs, raw, decode)
+    assert decoded == [2]
+    assert [r.get("text") for r in results] == ["0", None, "1"]
+    np.testing.assert_array_equal(results[1]["probs"], probs[1])
+
+
+def test_batches_overlap_up_to_max_in_flight():
+    running = 0
+    peak = 0
+
+    async def run(windows):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return [{"text": ""} for _ in windows]
+
+    scheduler = InferenceScheduler(run, max_batch_size=8, max_wait_ms=1, max_in_flight=4)
+    results = asyncio.run(run_scheduler(scheduler, [window(i % 256) for i in range(64)]))
+    assert len(results) == 64 and all(isinstance(r, dict) for r in results)
+    assert peak == 4
+    assert scheduler.batches_run >= 8
+
+
+def test_one_batch_at_a_time_by_default():
+    running = 0
+    peak = 0
+
+    async def run(windows):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"text": ""} for _ in windows]
+
+    asyncio.run(run_scheduler(InferenceScheduler(run, max_batch_size=8, max_wait_ms=1),
+                              [window(0) for _ in range(32)]))
+    assert peak == 1
+
+
+def test_stop_fails_batches_still_running():
+    async def run(windows):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler = InferenceScheduler(run, max_wait_ms=1, max_in_flight=2)
+        await scheduler.start()
+        pending = [asyncio.create_task(scheduler.submit(window(0))) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return await asyncio.gather(*pending, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(scenario()))
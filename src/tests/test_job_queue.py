@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from services.job_queue import JOB_DONE, JOB_FAILED, JOB_RUNNING, JobQueue, JobQueueFull, JobStore
+
+
+class Runner:
+    """Job runner that records job order and can be held at a gate"""
+
+    def __init__(self, hold=False):
+        self.ran = []
+        self.gate = asyncio.Event()
+        if not hold:
+            self.gate.set()
+
+    async def __call__(self, job):
+        self.ran.append(job.filename)
+        await self.gate.wait()
+        if job.filename.startswith("bad"):
+            raise RuntimeError("corrupt upload")
+        return {"text": job.filename}
+
+
+async def until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def upload(tmp_path):
+    path = tmp_path / "upload.mp4"
+    path.write_bytes(b"video")
+    return str(path)
+
+
+def test_jobs_run_in_priority_order(tmp_path, upload):
+    async def main():
+        runner = Runner(hold=True)
+        queue = JobQueue(JobStore(str(tmp_path / "jobs.db")), runner, workers=1)
+        await queue.start()
+        await queue.submit(upload, "first", "d")
+        await until(lambda: runner.ran == ["first"])
+        for name, priority in (("low", "low"), ("normal", "normal"), ("high", "high")):
+            await queue.submit(upload, name, "d", priority=priority)
+        runner.gate.set()
+        await until(lambda: queue.jobs_done == 4)
+        await queue.stop()
+        return runner.ran
+
+    assert asyncio.run(main()) == ["first", "high", "normal", "low"]
+
+
+def test_results_and_failures_are_stored(tmp_path, upload):
+    async def main():
+        queue = JobQueue(JobStore(str(tmp_path / "jobs.db")), Runner())
+        await queue.start()
+        good = await queue.submit(upload, "good", "d")
+        bad = await queue.submit(upload, "bad", "d")
+        await until(lambda: queue.jobs_done + queue.jobs_failed == 2)
+        await queue.stop()
+        return await queue.get(good.id), await queue.get(bad.id), queue.stats()
+
+    good, bad, stats = asyncio.run(main())
+    assert good.status == JOB_DONE and good.result == {"text": "good"}
+    assert bad.status == JOB_FAILED and bad.error == "corrupt upload" and bad.result is None
+    assert stats["jobs_done"] == 1 and stats["jobs_failed"] == 1
+    assert "path" not in good.to_dict()
+
+
+def test_unfinished_jobs_are_resumed_after_a_restart(tmp_path, upload):
+    db = str(tmp_path / "jobs.db")
+
+    async def first_run():
+        runner = Runner(hold=True)
+        queue = JobQueue(JobStore(db), runner, workers=1)
+        await queue.start()
+        running = await queue.submit(upload, "running", "d")
+        waiting = await queue.submit(upload, "waiting", "d")
+        lost = await queue.submit(str(tmp_path / "gone.mp4"), "lost", "d")
+        await until(lambda: runner.ran == ["running"])
+        await queue.stop()
+        queue.store.close()
+        return running.id, waiting.id, lost.id
+
+    async def second_run(ids):
+        store = JobStore(db)
+        assert store.get(ids[0]).status == JOB_RUNNING
+        queue = JobQueue(store, Runner(), workers=1)
+        await queue.start()
+        await until(lambda: queue.jobs_done == 2)
+        await queue.stop()
+        return [await queue.get(job_id) for job_id in ids]
+
+    running, waiting, lost = asyncio.run(second_run(asyncio.run(first_run())))
+    assert running.status == JOB_DONE and running.result == {"text": "running"}
+    assert waiting.status == JOB_DONE
+    assert lost.status == JOB_FAILED and "lost" in lost.error
+
+
+def test_full_queue_rejects_new_jobs(tmp_path, upload):
+    async def main():
+        runner = Runner(hold=True)
+        queue = JobQueue(JobStore(str(tmp_path / "jobs.db")), runner, workers=1, max_queued=1)
+        await queue.start()
+        await queue.submit(upload, "running", "d")
+        await until(lambda: runner.ran == ["running"])
+        await queue.submit(upload, "waiting", "d")
+        with pytest.raises(JobQueueFull):
+            await queue.submit(upload, "rejected", "d")
+        with pytest.raises(ValueError):
+            await queue.submit(upload, "urgent", "d", priority="urgent")
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_watchers_are_notified_once_and_can_unwatch(tmp_path, upload):
+    async def main():
+        runner = Runner(hold=True)
+        queue = JobQueue(JobStore(str(tmp_path / "jobs.db")), runner, workers=1)
+        await queue.start()
+        job = await queue.submit(upload, "clip", "d")
+        seen, dropped = [], []
+        assert (await queue.watch(job.id, seen.append)).id == job.id
+        await queue.watch(job.id, dropped.append)
+        queue.unwatch(job.id, dropped.append)
+        assert await queue.watch("missing", seen.append) is None
+
+        runner.gate.set()
+        await until(lambda: queue.jobs_done == 1)
+        late = []
+        finished = await queue.watch(job.id, late.append)
+        await queue.stop()
+        return seen, dropped, late, finished
+
+    seen, dropped, late, finished = asyncio.run(main())
+    assert [j.status for j in seen] == [JOB_DONE]
+    assert dropped == [] and late == []
+    assert finished.status == JOB_DONE
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+
+from services.lip_reader_service import LipReaderService
+from utils.long_video import merge_central, stack_windows, window_starts
+
+
+def test_short_clip_is_one_window():
+    assert window_starts(40) == [0]
+    assert window_starts(75) == [0]
+
+
+def test_last_window_is_aligned_to_the_end():
+    assert window_starts(200, size=75, hop=50) == [0, 50, 100, 125]
+    assert window_starts(175, size=75, hop=50) == [0, 50, 100]
+
+
+@pytest.mark.parametrize("hop", [0, -1, 76])
+def test_invalid_hop_is_rejected(hop):
+    with pytest.raises(ValueError):
+        window_starts(200, size=75, hop=hop)
+
+
+def test_stack_windows_pads_short_clips_with_the_last_frame():
+    frames = np.arange(10, dtype=np.uint8).reshape(10, 1, 1)
+    (window,) = stack_windows(frames, [0], size=15)
+    assert window[:, 0, 0].tolist() == list(range(10)) + [9] * 5
+
+
+def test_merge_central_reassembles_consistent_windows():
+    num_frames, size = 230, 75
+    sequence = np.random.default_rng(0).random((num_frames, 5)).astype(np.float32)
+    starts = window_starts(num_frames, size=size, hop=50)
+    probs = np.stack([sequence[start:start + size] for start in starts])
+    np.testing.assert_array_equal(merge_central(probs, starts, num_frames), sequence)
+
+
+def test_merge_central_takes_each_frame_from_the_nearest_center():
+    num_frames, size = 200, 75
+    starts = window_starts(num_frames, size=size, hop=50)
+    # Every row of window i holds the value i
+    probs = np.repeat(np.arange(len(starts), dtype=np.float32)[:, None, None], size, axis=1)
+    merged = merge_central(probs, starts, num_frames)[:, 0]
+
+    centers = np.asarray(starts) + (size - 1) / 2
+    for frame, owner in enumerate(merged):
+        assert starts[int(owner)] <= frame < starts[int(owner)] + size
+        assert abs(centers[int(owner)] - frame) == pytest.approx(np.min(np.abs(centers - frame)), abs=0.5)
+
+
+@pytest.fixture
+def clip_90(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (360, 288))
+    if not writer.isOpened():
+        pytest.skip("OpenCV cannot write MJPG video here")
+    for i in range(90):
+        writer.write(np.full((288, 360, 3), i, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.mark.parametrize("max_frames, expected, truncated", [(None, 90, False), (90, 90, False), (80, 80, True)])
+def test_read_video_clip_reports_truncation(clip_90, max_frames, expected, truncated):
+    service = LipReaderService(load_model=False)
+    frames, fps, was_truncated = service.read_video_clip(clip_90, max_frames=max_frames)
+    assert frames.shape == (expected, LipReaderService.FRAME_HEIGHT, LipReaderService.FRAME_WIDTH)
+    assert fps == 25.0
+    assert was_truncated is truncated
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from services.metrics import REGISTRY, MetricsRegistry
+
+
+def test_counter_renders_help_type_and_labelled_samples():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors by kind", ("kind",))
+    errors.inc(kind="decode")
+    errors.inc(2, kind="decode")
+    errors.inc(kind="timeout")
+    assert registry.render() == (
+        "# HELP errors_total Errors by kind\n"
+        "# TYPE errors_total counter\n"
+        'errors_total{kind="decode"} 3\n'
+        'errors_total{kind="timeout"} 1\n'
+    )
+
+
+def test_unlabelled_counter_is_exported_before_first_increment():
+    registry = MetricsRegistry()
+    registry.counter("dropped_total", "Dropped")
+    assert "dropped_total 0\n" in registry.render()
+
+
+def test_labels_must_match_the_declared_names():
+    counter = MetricsRegistry().counter("c", "c", ("stage",))
+    with pytest.raises(ValueError):
+        counter.inc(kind="x")
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("c", "c", ("kind",)).inc(kind='say "hi"\\\n')
+    assert 'c{kind="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, stage="forward")
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{stage="forward",le="0.1"} 1',
+        'latency_seconds_bucket{stage="forward",le="1"} 3',
+        'latency_seconds_bucket{stage="forward",le="+Inf"} 4',
+        'latency_seconds_sum{stage="forward"} 4.05',
+        'latency_seconds_count{stage="forward"} 4',
+    ]
+
+
+def test_histogram_time_observes_the_block():
+    registry = MetricsRegistry()
+    latency = registry.histogram("t", "t", buckets=(1.0,))
+    with latency.time():
+        pass
+    assert "t_count 1" in registry.render()
+
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    depth = [3]
+    registry.gauge("depth", "Queue depth", function=lambda: depth[0])
+    assert "depth 3\n" in registry.render()
+    depth[0] = 7
+    assert "depth 7\n" in registry.render()
+
+
+def test_failing_gauge_function_exports_no_sample():
+    registry = MetricsRegistry()
+    registry.gauge("broken", "Broken", function=lambda: 1 / 0)
+    assert registry.render() == "# HELP broken Broken\n# TYPE broken gauge\n"
+
+
+def test_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    registry.counter("c", "c")
+    with pytest.raises(ValueError):
+        registry.gauge("c", "c")
+
+
+def test_concurrent_increments_are_not_lost():
+    registry = MetricsRegistry()
+    counter = registry.counter("c", "c")
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert "c 40000\n" in registry.render()
+
+
+def test_default_registry_exports_the_pipeline_metrics():
+    text = REGISTRY.render()
+    for name in ("lipza_stage_seconds", "lipza_frames_dropped_total", "lipza_inference_batch_size",
+                 "lipza_process_resident_memory_bytes"):
+        assert f"# TYPE {name} " in text
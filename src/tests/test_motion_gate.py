@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from utils.motion_gate import MotionGate
+
+rng = np.random.default_rng(0)
+
+
+def still(value=100):
+    return np.full((46, 140), value, dtype=np.uint8)
+
+
+def moving():
+    return rng.integers(0, 256, size=(46, 140), dtype=np.uint8)
+
+
+def test_first_frame_has_no_energy():
+    assert MotionGate().push(moving()) == 0.0
+
+
+def test_brightness_changes_do_not_count_as_motion():
+    gate = MotionGate()
+    gate.push(still(100))
+    assert gate.push(still(140)) == pytest.approx(0.0)
+
+
+def test_still_mouth_is_skipped():
+    gate = MotionGate(size=10, threshold=2.0, min_active_frames=2)
+    for _ in range(5):
+        gate.push(still())
+    assert gate.check() == (False, False)
+    assert gate.stats()["windows_skipped"] == 1
+
+
+def test_moving_mouth_is_inferred():
+    gate = MotionGate(size=10, threshold=2.0, min_active_frames=2)
+    for _ in range(5):
+        gate.push(moving())
+    assert gate.check() == (True, True)
+
+
+def test_earlier_speech_stays_in_the_window():
+    gate = MotionGate(size=10, threshold=2.0, min_active_frames=2)
+    for _ in range(4):
+        gate.push(moving())
+    gate.check()
+    for _ in range(3):
+        gate.push(still())
+    # Nothing new moved, but the window still holds the earlier speech
+    assert gate.check() == (False, True)
+    for _ in range(10):
+        gate.push(still())
+    assert gate.check() == (False, False)
+
+
+def test_min_active_frames_filters_single_spikes():
+    gate = MotionGate(size=10, threshold=2.0, min_active_frames=3)
+    gate.push(still())
+    gate.push(moving())
+    gate.push(still())
+    # The spike and the return to still are only two active frames
+    assert gate.check()[0] is False
+    for _ in range(3):
+        gate.push(moving())
+    assert gate.check()[0] is True
+
+
+def test_reset_forgets_previous_motion():
+    gate = MotionGate(size=10)
+    for _ in range(5):
+        gate.push(moving())
+    gate.reset()
+    assert gate.check() == (False, False)
+
+
+def test_skip_rate():
+    gate = MotionGate(size=10)
+    gate.check()
+    for _ in range(3):
+        gate.push(moving())
+    gate.check()
+    assert gate.stats()["skip_rate"] == pytest.approx(0.5)
+
+
+def test_invalid_size_is_rejected():
+    with pytest.raises(ValueError):
+        MotionGate(size=0)
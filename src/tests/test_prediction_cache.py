@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from services.prediction_cache import LRUCache, PredictionCache, _result_size
+
+
+def long_result(words):
+    return {
+        "text": " ".join(["word"] * words),
+        "confidence": 0.9,
+        "words": [{"word": "word", "start": i * 0.4, "end": i * 0.4 + 0.3, "confidence": 0.9}
+                  for i in range(words)],
+    }
+
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_lru_evicts_until_within_the_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=250, sizeof=len)
+    for key in "abc":
+        cache.put(key, "x" * 100)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.total_bytes == 200
+
+
+def test_lru_skips_values_larger_than_the_budget():
+    cache = LRUCache(max_entries=10, max_bytes=50, sizeof=len)
+    cache.put("big", "x" * 100)
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = LRUCache(max_entries=10, sizeof=len)
+    cache.put("a", "x" * 10)
+    cache.put("a", "x" * 30)
+    assert cache.total_bytes == 30
+
+
+def test_hits_and_misses_are_counted():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_result_size_counts_nested_words():
+    assert _result_size(long_result(200)) > 20 * _result_size(long_result(5))
+
+
+def test_results_are_keyed_by_digest_and_model_version():
+    cache = PredictionCache()
+    cache.put_result("abc", "v1:greedy", {"text": "hi", "confidence": 0.5, "processing_time": 0.2})
+    assert cache.get_result("abc", "v1:greedy") == {"text": "hi", "confidence": 0.5}
+    assert cache.get_result("abc", "v2:greedy") is None
+    assert cache.get_result("def", "v1:greedy") is None
+
+
+def test_cached_results_are_isolated_from_callers():
+    cache = PredictionCache()
+    result = long_result(3)
+    cache.put_result("abc", "v1", result)
+    result["words"][0]["word"] = "changed"
+
+    first = cache.get_result("abc", "v1")
+    first["words"].clear()
+    first["cached"] = True
+
+    second = cache.get_result("abc", "v1")
+    assert second["words"][0]["word"] == "word"
+    assert len(second["words"]) == 3
+    assert "cached" not in second
+
+
+def test_byte_budget_accounts_for_long_results():
+    one = _result_size(long_result(500))
+    cache = PredictionCache(max_entries=100, max_bytes=int(one * 2.5))
+    for digest in "abcd":
+        cache.put_result(digest, "v1", long_result(500))
+    assert cache.stats()["results"]["entries"] == 2
+
+
+def test_tensor_tier_is_optional():
+    window = np.zeros((75, 46, 140), dtype=np.uint8)
+    cache = PredictionCache()
+    cache.put_tensor("abc", "grid", window)
+    assert cache.get_tensor("abc", "grid") is None
+
+
+def test_tensor_tier_is_bounded_by_bytes_and_read_only():
+    window = np.zeros((75, 46, 140), dtype=np.uint8)
+    cache = PredictionCache(tensor_cache=True, tensor_max_bytes=window.nbytes * 2)
+    for digest in "abc":
+        cache.put_tensor(digest, "grid", window.copy())
+    assert cache.get_tensor("a", "grid") is None
+    cached = cache.get_tensor("c", "grid")
+    assert cached is not None
+    with pytest.raises(ValueError):
+        cached[0, 0, 0] = 1
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from services import profiling
+from services.profiling import ProfilerBusy, RequestTrace, StackSampler, sample_stacks
+
+
+def test_request_trace_accumulates_stages_in_first_run_order():
+    trace = RequestTrace(started=time.perf_counter())
+    trace.add("decode", 0.002)
+    trace.add("forward", 0.010)
+    trace.add("decode", 0.003)
+    breakdown = trace.breakdown()
+    assert list(breakdown["stages_ms"]) == ["decode", "forward"]
+    assert breakdown["stages_ms"]["decode"] == pytest.approx(5.0)
+    assert breakdown["total_ms"] >= 0
+
+
+def test_request_trace_stage_times_the_block():
+    trace = RequestTrace()
+    with trace.stage("preprocess"):
+        time.sleep(0.01)
+    assert trace.breakdown()["stages_ms"]["preprocess"] >= 9
+
+
+def spin(stop):
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def test_sampler_collects_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        sampler = StackSampler(interval=0.002)
+        sampler.run(0.05)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sampler.sample_count > 0
+    stacks = sampler.collapsed().splitlines()
+    spinner = [line for line in stacks if line.startswith("spinner;")]
+    assert spinner and "spin (test_profiling.py:" in spinner[0]
+    # The sampling thread itself is never recorded
+    assert not any("_sample_once" in line for line in stacks)
+    counts = [int(line.rsplit(" ", 1)[1]) for line in stacks]
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_overlapping_profiling_runs_are_refused():
+    assert profiling._profile_lock.acquire(blocking=False)
+    try:
+        with pytest.raises(ProfilerBusy):
+            sample_stacks(0.01)
+    finally:
+        profiling._profile_lock.release()
+    assert sample_stacks(0.01, interval=0.005).sample_count > 0
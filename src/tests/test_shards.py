@@ -0,0 +1,100 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from model_preparation import shards  # noqa: E402
+
+FRAME_COUNT = 12
+
+
+@pytest.fixture
+def grid_dir(tmp_path):
+    """One GRID-sized colour clip with its alignment"""
+    videos = tmp_path / "videos"
+    alignments = tmp_path / "alignments"
+    videos.mkdir()
+    alignments.mkdir()
+    path = str(videos / "bbaf2n.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (360, 288))
+    if not writer.isOpened():
+        pytest.skip("OpenCV cannot write MJPG video here")
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, size=(288 // 8, 360 // 8, 3), dtype=np.uint8)
+    for i in range(FRAME_COUNT):
+        frame = cv2.resize(np.roll(base, i, axis=1), (360, 288), interpolation=cv2.INTER_NEAREST)
+        writer.write(frame)
+    writer.release()
+    (alignments / "bbaf2n.align").write_text(
+        "0 23750 sil\n23750 29500 bin\n29500 34000 blue\n34000 35500 at\n35500 41000 f\n41000 74500 sil\n"
+    )
+    return videos, alignments, path
+
+
+def decoded_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def test_grayscale_matches_tf_weights_on_bgr_frames():
+    # Pure blue, green, red, white and black BGR pixels
+    frame = np.array([[[255, 0, 0], [0, 255, 0], [0, 0, 255], [255, 255, 255], [0, 0, 0]]], dtype=np.uint8)
+    assert shards.to_grayscale(frame).tolist() == [[76, 149, 29, 255, 0]]
+
+
+def test_built_shards_read_back_the_cropped_clip(grid_dir, tmp_path):
+    videos, alignments, path = grid_dir
+    out = str(tmp_path / "shards")
+    shards.build(str(videos), str(alignments), out, shard_size=4, workers=1)
+
+    index = shards.ShardIndex(out)
+    ((example, frames),) = list(index.iter_examples())
+    assert example["text"] == "bin blue at f"
+    assert example["frame_count"] == FRAME_COUNT
+    assert shards.decode_labels(index.open_shard(0)[1][0]) == "bin blue at f"
+
+    y1, y2, x1, x2 = shards.MOUTH_CROP
+    expected = np.stack([shards.to_grayscale(f[y1:y2, x1:x2]) for f in decoded_frames(path)])
+    assert frames.shape == (shards.FRAMES, shards.HEIGHT, shards.WIDTH)
+    np.testing.assert_array_equal(frames[:FRAME_COUNT], expected)
+    # Padded by repeating the last frame
+    np.testing.assert_array_equal(frames[FRAME_COUNT:], np.broadcast_to(expected[-1], frames[FRAME_COUNT:].shape))
+
+
+def test_shard_frames_match_load_video(grid_dir, tmp_path, monkeypatch):
+    tf = pytest.importorskip("tensorflow")
+    from model_preparation import modelutils
+
+    videos, alignments, path = grid_dir
+    out = str(tmp_path / "shards")
+    shards.build(str(videos), str(alignments), out, workers=1)
+    ((_, frames),) = list(shards.ShardIndex(out).iter_examples())
+
+    # The grayscale conversion and crop of modelutils.load_video
+    expected = np.stack([tf.image.rgb_to_grayscale(f).numpy()[190:236, 80:220, 0] for f in decoded_frames(path)])
+    diff = np.abs(frames[:FRAME_COUNT].astype(np.int16) - expected.astype(np.int16))
+    # float32 summation order can move a value across a truncation boundary
+    assert diff.max() <= 1
+    assert (diff == 0).mean() > 0.99
+
+    # And the normalized clip load_video hands to training, when its conversion agrees exactly
+    if diff.max() == 0:
+        # modelutils is notebook code that expects cv2 and tf as globals
+        monkeypatch.setattr(modelutils, "cv2", cv2, raising=False)
+        monkeypatch.setattr(modelutils, "tf", tf, raising=False)
+        loaded = modelutils.load_video(None, path).numpy()
+        normalized = tf.constant(frames[:FRAME_COUNT, :, :, np.newaxis])
+        mean = tf.math.reduce_mean(normalized)
+        std = tf.math.reduce_std(tf.cast(normalized, tf.float32))
+        np.testing.assert_allclose(loaded, (tf.cast(normalized - mean, tf.float32) / std).numpy(), rtol=1e-5)
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from services.stream_session import (
+    POLICY_BLOCK,
+    POLICY_COALESCE,
+    POLICY_DROP_OLDEST,
+    PendingFrame,
+    StreamSession,
+)
+from utils.frame_window import FrameWindow
+
+
+def session(policy, queue_size):
+    return StreamSession(FrameWindow(size=75, height=4, width=4), queue_size=queue_size, overflow_policy=policy)
+
+
+def frame(n):
+    return PendingFrame("binary", bytes([n]))
+
+
+def payloads(frames):
+    return [f.data[0] for f in frames]
+
+
+def test_drop_oldest_keeps_the_latest_frames():
+    async def main():
+        s = session(POLICY_DROP_OLDEST, 2)
+        for n in range(5):
+            await s.enqueue(frame(n))
+        assert s.frames_received == 5 and s.frames_dropped == 3
+        return payloads(await s.next_frames()) + payloads(await s.next_frames())
+
+    assert asyncio.run(main()) == [3, 4]
+
+
+def test_coalesce_takes_every_queued_frame_at_once():
+    async def main():
+        s = session(POLICY_COALESCE, 4)
+        for n in range(6):
+            await s.enqueue(frame(n))
+        assert s.frames_dropped == 2
+        frames = await s.next_frames()
+        assert s.queue.empty()
+        return payloads(frames)
+
+    assert asyncio.run(main()) == [2, 3, 4, 5]
+
+
+def test_block_waits_for_room_instead_of_dropping():
+    async def main():
+        s = session(POLICY_BLOCK, 1)
+        await s.enqueue(frame(0))
+        blocked = asyncio.create_task(s.enqueue(frame(1)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        first = await s.next_frames()
+        await asyncio.wait_for(blocked, timeout=1)
+        second = await s.next_frames()
+        assert s.frames_dropped == 0
+        return payloads(first) + payloads(second)
+
+    assert asyncio.run(main()) == [0, 1]
+
+
+def test_queue_lag_measures_time_spent_queued():
+    async def main():
+        s = session(POLICY_DROP_OLDEST, 2)
+        await s.enqueue(frame(0))
+        await asyncio.sleep(0.02)
+        await s.next_frames()
+        return s.stats()["queue_lag"]
+
+    assert asyncio.run(main()) >= 0.015
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        session("discard_all", 2)
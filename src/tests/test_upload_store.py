@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+import pytest
+from fastapi import UploadFile
+
+from services.upload_store import UploadStore, UploadTooLarge
+
+
+def upload(data, filename="clip.webm"):
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+def test_save_streams_in_chunks_and_hashes_the_bytes(tmp_path):
+    data = os.urandom(10_000)
+    store = UploadStore(tmp_path, chunk_size=1024)
+    stored = asyncio.run(store.save(upload(data)))
+    try:
+        assert stored.path.suffix == ".webm"
+        assert stored.size == len(data)
+        assert stored.digest == hashlib.sha256(data).hexdigest()
+        assert stored.path.read_bytes() == data
+    finally:
+        stored.path.unlink(missing_ok=True)
+
+
+def test_upload_without_extension_defaults_to_mp4(tmp_path):
+    stored = asyncio.run(UploadStore(tmp_path).save(upload(b"x", filename="")))
+    stored.path.unlink()
+    assert stored.path.suffix == ".mp4"
+
+
+def test_oversize_upload_is_rejected_and_removed(tmp_path, monkeypatch):
+    created = []
+    real_mkstemp = tempfile.mkstemp
+
+    def mkstemp(**kwargs):
+        fd, name = real_mkstemp(dir=tmp_path, **kwargs)
+        created.append(name)
+        return fd, name
+
+    monkeypatch.setattr("services.upload_store.tempfile.mkstemp", mkstemp)
+    store = UploadStore(tmp_path / "kept", chunk_size=100, max_upload_size=250)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(store.save(upload(b"x" * 300)))
+    assert created and not os.path.exists(created[0])
+
+
+def test_release_deletes_unless_uploads_are_kept(tmp_path):
+    temp = tmp_path / "upload.mp4"
+    temp.write_bytes(b"video")
+    assert UploadStore(tmp_path / "kept").release(temp) is None
+    assert not temp.exists()
+
+    temp.write_bytes(b"video")
+    kept = UploadStore(tmp_path / "kept", keep_uploads=True).release(temp)
+    assert kept.parent == tmp_path / "kept"
+    assert kept.read_bytes() == b"video"
+    assert not temp.exists()
+
+
+def make_file(directory, name, size, age):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_removes_expired_files(tmp_path):
+    old = make_file(tmp_path, "old.mp4", 10, age=100)
+    new = make_file(tmp_path, "new.mp4", 10, age=1)
+    assert UploadStore(tmp_path, keep_uploads=True, max_age=50).sweep() == 1
+    assert not old.exists() and new.exists()
+
+
+def test_sweep_removes_oldest_files_until_within_budget(tmp_path):
+    files = [make_file(tmp_path, f"{i}.mp4", 100, age=10 - i) for i in range(5)]
+    assert UploadStore(tmp_path, keep_uploads=True, max_bytes=250).sweep() == 3
+    assert [f.exists() for f in files] == [False, False, False, True, True]
+
+
+def test_sweep_without_directory_is_a_no_op(tmp_path):
+    assert UploadStore(tmp_path / "missing").sweep() == 0
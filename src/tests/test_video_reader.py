@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+import pytest
+
+from utils import video_reader
+from utils.video_reader import pad_frames, read_video_frames, sample_indices
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in whose reported frame count may be wrong"""
+
+    instances = []
+
+    def __init__(self, frames, reported_count):
+        self.frames = frames
+        self.reported_count = reported_count
+        self.position = 0
+        self.decoded = 0
+        FakeCapture.instances.append(self)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        return float(self.reported_count) if prop == cv2.CAP_PROP_FRAME_COUNT else 25.0
+
+    def grab(self):
+        if self.position >= len(self.frames):
+            return False
+        self.position += 1
+        return True
+
+    def read(self):
+        if self.position >= len(self.frames):
+            return False, None
+        frame = self.frames[self.position]
+        self.position += 1
+        self.decoded += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+@pytest.fixture
+def fake_video(monkeypatch):
+    FakeCapture.instances = []
+
+    def install(actual, reported):
+        frames = [np.full((4, 4, 3), i % 256, dtype=np.uint8) for i in range(actual)]
+        monkeypatch.setattr(video_reader.cv2, "VideoCapture", lambda path: FakeCapture(frames, reported))
+
+    return install
+
+
+def indices(frames):
+    return [int(f[0, 0, 0]) for f in frames]
+
+
+def test_sample_indices_spread_over_the_clip():
+    assert sample_indices(10, 20).tolist() == list(range(10))
+    picked = sample_indices(150, 75)
+    assert len(picked) == 75
+    assert picked[0] == 0 and picked[-1] == 149
+    assert np.all(np.diff(picked) >= 0)
+
+
+def test_only_sampled_frames_are_decoded(fake_video):
+    fake_video(actual=150, reported=150)
+    frames = read_video_frames("clip.mp4", target_frames=75)
+    assert indices(frames) == sample_indices(150, 75).tolist()
+    assert len(FakeCapture.instances) == 1
+    assert FakeCapture.instances[0].decoded == 75
+
+
+@pytest.mark.parametrize("actual, reported", [
+    (120, 200),  # count too high: the tail indices are never reached
+    (150, 100),  # count too low: the end of the clip would be ignored
+])
+def test_wrong_frame_count_samples_the_frames_actually_read(fake_video, actual, reported):
+    fake_video(actual=actual, reported=reported)
+    frames = read_video_frames("clip.webm", target_frames=75)
+    assert indices(frames) == sample_indices(actual, 75).tolist()
+    assert len(FakeCapture.instances) == 2
+
+
+def test_unknown_frame_count_samples_after_a_full_decode(fake_video):
+    fake_video(actual=100, reported=0)
+    frames = read_video_frames("clip.webm", target_frames=75)
+    assert indices(frames) == sample_indices(100, 75).tolist()
+
+
+def test_short_clip_keeps_every_frame(fake_video):
+    fake_video(actual=40, reported=40)
+    assert indices(read_video_frames("clip.mp4", target_frames=75)) == list(range(40))
+
+
+def test_max_frames_stops_a_full_read(fake_video):
+    fake_video(actual=100, reported=100)
+    frames = read_video_frames("clip.mp4", max_frames=30)
+    assert indices(frames) == list(range(30))
+
+
+def test_transform_is_applied_to_each_frame(fake_video):
+    fake_video(actual=10, reported=10)
+    frames = read_video_frames("clip.mp4", transform=lambda f: f[..., 0] + 1)
+    assert [int(f[0, 0]) for f in frames] == list(range(1, 11))
+
+
+def test_pad_frames_repeats_the_last_frame():
+    assert pad_frames([1, 2], 4) == [1, 2, 2, 2]
+    assert pad_frames([], 3) == []
@@ -0,0 +1,258 @@
+"""
+Pure-NumPy CTC decoding for batches of model outputs
+Replaces per-character StringLookup calls with a precomputed index table.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NEG_INF = -np.inf
+
+# Trie key marking the end of a complete word
+_WORD_END = "$"
+
+
+class LexiconTrie:
+    """Character trie used to restrict beam search to known words"""
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.root: Dict[str, Any] = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        word = word.strip().lower()
+        if not word:
+            return
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if _WORD_END not in node:
+            node[_WORD_END] = True
+            self.size += 1
+
+    @classmethod
+    def from_file(cls, path: str) -> "LexiconTrie":
+        """Build a trie from a text file with one word per line"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(line for line in f)
+
+
+class CTCDecoder:
+    """Batched CTC decoder over (B,T,V) probability arrays
+
+    Index 0 is the StringLookup OOV token and index V-1 is the CTC blank,
+    matching the output layout of the LipNet-style model.
+    """
+
+    def __init__(
+        self,
+        vocab: Sequence[str],
+        beam_width: int = 10,
+        prune_threshold: float = 1e-3,
+        max_candidates: int = 8,
+        lexicon: Optional[LexiconTrie] = None,
+        word_separator: str = " ",
+    ) -> None:
+        """
+        Args:
+            vocab: Characters in model output order (without OOV and blank)
+            beam_width: Prefixes kept after each timestep in beam search
+            prune_threshold: Characters below this probability are not expanded
+            max_candidates: Expand at most this many characters per timestep
+            lexicon: Optional trie restricting beam search to known words
+            word_separator: Character that terminates a word in the lexicon
+        """
+        self.index_to_char = np.array([""] + list(vocab) + [""], dtype=object)
+        self.char_to_index = {char: i + 1 for i, char in enumerate(vocab)}
+        self.num_classes = len(self.index_to_char)
+        self.blank = self.num_classes - 1
+        self.beam_width = max(1, beam_width)
+        self.prune_threshold = prune_threshold
+        self.max_candidates = max(1, max_candidates)
+        self.lexicon = lexicon
+        self.separator_index = list(vocab).index(word_separator) + 1 if word_separator in vocab else None
+
+    @staticmethod
+    def confidences(probs: np.ndarray) -> np.ndarray:
+        """Mean max-probability across timesteps, one value per batch row"""
+        return np.mean(np.max(probs, axis=-1), axis=-1)
+
+    def greedy_decode(self, probs: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Greedy (best path) decoding: argmax, collapse repeats, drop blanks
+
+        Args:
+            probs: Model output of shape (B,T,V)
+
+        Returns:
+            One {"text", "confidence"} dict per batch row
+        """
+        best = np.argmax(probs, axis=-1)  # (B,T)
+
+        keep = best != self.blank
+        keep &= best != 0
+        keep[:, 1:] &= best[:, 1:] != best[:, :-1]
+
+        confidences = self.confidences(probs)
+        return [
+            {"text": "".join(self.index_to_char[row[mask]]), "confidence": float(confidence)}
+            for row, mask, confidence in zip(best, keep, confidences)
+        ]
+
+    def greedy_words(self, probs: np.ndarray, fps: float) -> Dict[str, Any]:
+        """
+        Greedy-decode one sequence and locate each word in time
+
+        Args:
+            probs: Model output of shape (T,V) at `fps` frames per second
+
+        Returns:
+            {"text", "confidence", "words"} where each word is
+            {"word", "start", "end", "confidence"} with times in seconds
+        """
+        best = np.argmax(probs, axis=-1)
+        peak = np.max(probs, axis=-1)
+
+        words: List[Dict[str, Any]] = []
+        chars: List[str] = []
+        first = last = 0
+        previous = -1
+
+        def close_word() -> None:
+            if chars:
+                words.append({
+                    "word": "".join(chars),
+                    "start": first / fps,
+                    "end": (last + 1) / fps,
+                    "confidence": float(np.mean(peak[first:last + 1])),
+                })
+                chars.clear()
+
+        for t, index in enumerate(best):
+            if index == previous:
+                # Repeated label: the same character (or separator) continues
+                if chars and index not in (self.blank, 0, self.separator_index):
+                    last = t
+                continue
+            previous = index
+            if index == self.blank or index == 0:
+                continue
+            if index == self.separator_index:
+                close_word()
+                continue
+            if not chars:
+                first = t
+            chars.append(self.index_to_char[index])
+            last = t
+        close_word()
+
+        return {
+            "text": " ".join(w["word"] for w in words),
+            "confidence": float(np.mean(peak)) if len(peak) else 0.0,
+            "words": words,
+        }
+
+    def beam_search_decode(self, probs: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Prefix beam search, optionally constrained to the lexicon trie
+
+        Args:
+            probs: Model output of shape (B,T,V)
+
+        Returns:
+            One {"text", "confidence"} dict per batch row
+        """
+        log_probs = np.log(np.clip(probs, 1e-12, 1.0))
+        confidences = self.confidences(probs)
+
+        # Candidate characters per timestep for the whole batch at once
+        order = np.argsort(-probs, axis=-1)[..., :self.max_candidates]
+        ranked = np.take_along_axis(probs, order, axis=-1)
+
+        results = []
+        for b in range(probs.shape[0]):
+            candidates = [
+                [int(c) for c, p in zip(order[b, t], ranked[b, t])
+                 if p >= self.prune_threshold and c != self.blank and c != 0]
+                for t in range(probs.shape[1])
+            ]
+            prefix = self._beam_search_row(log_probs[b], candidates)
+            results.append({
+                "text": "".join(self.index_to_char[list(prefix)]),
+                "confidence": float(confidences[b]),
+            })
+        return results
+
+    def _advance(self, node: Optional[Dict[str, Any]], index: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return (allowed, next trie node) for appending `index` to a prefix."""
+        if self.lexicon is None:
+            return True, None
+
+        if index == self.separator_index:
+            # A separator may only close a complete word
+            if node is not None and node is not self.lexicon.root and _WORD_END in node:
+                return True, self.lexicon.root
+            return False, None
+
+        child = (node or self.lexicon.root).get(self.index_to_char[index])
+        return child is not None, child
+
+    def _beam_search_row(self, log_probs: np.ndarray, candidates: List[List[int]]) -> Tuple[int, ...]:
+        root = self.lexicon.root if self.lexicon is not None else None
+        # prefix -> [log P(prefix, ends in blank), log P(prefix, ends in non-blank)]
+        beams: Dict[Tuple[int, ...], List[float]] = {(): [0.0, NEG_INF]}
+        nodes: Dict[Tuple[int, ...], Optional[Dict[str, Any]]] = {(): root}
+
+        for t, step in enumerate(log_probs):
+            next_beams: Dict[Tuple[int, ...], List[float]] = defaultdict(lambda: [NEG_INF, NEG_INF])
+
+            for prefix, (p_blank, p_non_blank) in beams.items():
+                total = np.logaddexp(p_blank, p_non_blank)
+
+                # Extend with blank: prefix unchanged
+                entry = next_beams[prefix]
+                entry[0] = np.logaddexp(entry[0], total + step[self.blank])
+
+                last = prefix[-1] if prefix else None
+                for c in candidates[t]:
+                    if c == last:
+                        # Repeated character without a blank collapses into the prefix
+                        entry = next_beams[prefix]
+                        entry[1] = np.logaddexp(entry[1], p_non_blank + step[c])
+                        source = p_blank
+                    else:
+                        source = total
+
+                    allowed, node = self._advance(nodes[prefix], c)
+                    if not allowed:
+                        continue
+
+                    extended = prefix + (c,)
+                    nodes.setdefault(extended, node)
+                    entry = next_beams[extended]
+                    entry[1] = np.logaddexp(entry[1], source + step[c])
+
+            ranked = sorted(next_beams.items(), key=lambda kv: np.logaddexp(*kv[1]), reverse=True)
+            beams = dict(ranked[:self.beam_width])
+
+        ranked = sorted(beams, key=lambda prefix: np.logaddexp(*beams[prefix]), reverse=True)
+        if self.lexicon is not None:
+            # Prefer hypotheses that end on a complete word
+            for prefix in ranked:
+                node = nodes[prefix]
+                if node is root or (node is not None and _WORD_END in node):
+                    return prefix
+        return ranked[0]
+
+    def decode(self, probs: np.ndarray, method: str = "greedy") -> List[Dict[str, Any]]:
+        """Decode a (B,T,V) batch with the given method ("greedy" or "beam")"""
+        if method == "beam":
+            return self.beam_search_decode(probs)
+        return self.greedy_decode(probs)
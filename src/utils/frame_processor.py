@@ -3,21 +3,75 @@ Frame processor utilities for handling camera frames
 """
 
 import logging
+import asyncio
 import base64
 import io
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Any, Tuple, Union
 import numpy as np
 import cv2
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# JPEG start-of-frame markers (all SOFn except DHT, JPG and DAC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Reduced-scale grayscale decode flags, largest reduction first
+_REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+
+def jpeg_dimensions(data: Union[bytes, memoryview]) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a JPEG's SOF header without decoding it."""
+    view = memoryview(data)
+    size = len(view)
+    if size < 4 or view[0] != 0xFF or view[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < size:
+        if view[i] != 0xFF:
+            return None
+        marker = view[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers carry no length
+            i += 2
+            continue
+        if marker in _SOF_MARKERS:
+            height = (view[i + 5] << 8) | view[i + 6]
+            width = (view[i + 7] << 8) | view[i + 8]
+            return width, height
+        i += 2 + ((view[i + 2] << 8) | view[i + 3])
+
+    return None
+
 
 class FrameProcessor:
     """Utility class for processing camera frames"""
     
     MAX_FRAME_SIZE = 10 * 1024 * 1024  # 10MB max frame size
     
+    def __init__(self, decode_workers: int = 4) -> None:
+        # OpenCV releases the GIL while decoding, so a small pool scales with cores
+        self._executor = ThreadPoolExecutor(max_workers=max(1, decode_workers), thread_name_prefix="frame-decode")
+    
+    async def run_in_pool(self, fn, *args, **kwargs):
+        """Run a blocking decode function on the bounded decode pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
     def decode_frame(self, frame_data: str) -> Optional[np.ndarray]:
         """
         Decode base64 encoded JPEG frame to numpy array
@@ -36,8 +90,29 @@ class FrameProcessor:
             # Decode base64
             frame_bytes = base64.b64decode(frame_data)
             
-            # Convert bytes to numpy array
-            nparr = np.frombuffer(frame_bytes, np.uint8)
+            return self.decode_jpeg_bytes(frame_bytes)
+            
+        except Exception as e:
+            logger.error(f"Error decoding frame: {e}")
+            return None
+    
+    def decode_jpeg_bytes(self, jpeg_bytes: Union[bytes, memoryview]) -> Optional[np.ndarray]:
+        """
+        Decode raw JPEG bytes (e.g. a binary WebSocket payload) to numpy array
+        
+        Args:
+            jpeg_bytes: JPEG encoded bytes; memoryviews are decoded without copying
+            
+        Returns:
+            Decoded frame as numpy array or None if decoding fails
+        """
+        try:
+            if not jpeg_bytes or len(jpeg_bytes) > self.MAX_FRAME_SIZE:
+                logger.warning("Invalid frame data size")
+                return None
+            
+            # Wrap the buffer without copying
+            nparr = np.frombuffer(jpeg_bytes, np.uint8)
             
             # Decode image from JPEG
             frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
@@ -48,10 +123,158 @@ class FrameProcessor:
             
             return frame
             
+        except Exception as e:
+            logger.error(f"Error decoding JPEG bytes: {e}")
+            return None
+    
+    def decode_raw_gray(self, pixels: Union[bytes, memoryview], width: int, height: int) -> Optional[np.ndarray]:
+        """
+        Wrap raw 8-bit grayscale pixels as a (height, width) numpy array
+        
+        Args:
+            pixels: Row-major grayscale bytes
+            width: Frame width
+            height: Frame height
+            
+        Returns:
+            Frame as numpy array or None if the size does not match
+        """
+        try:
+            if width <= 0 or height <= 0 or len(pixels) != width * height:
+                logger.warning("Invalid raw grayscale frame size")
+                return None
+            
+            return np.frombuffer(pixels, np.uint8).reshape(height, width)
+            
+        except Exception as e:
+            logger.error(f"Error decoding raw grayscale frame: {e}")
+            return None
+    
+    def decode_mouth_frame(self, jpeg_bytes: Union[bytes, memoryview], size: Tuple[int, int] = (140, 46),
+                           roi: Optional[Dict[str, int]] = None) -> Optional[np.ndarray]:
+        """
+        Decode a JPEG straight to a grayscale model-sized frame
+        
+        The JPEG is decoded at the largest reduced scale (1/2, 1/4 or 1/8) that
+        still leaves the ROI at least `size`, then cropped and resized, all in
+        one call so it can run on the decode pool.
+        
+        Args:
+            jpeg_bytes: JPEG encoded bytes
+            size: Target (width, height)
+            roi: Optional x, y, width, height crop in full-resolution pixels
+            
+        Returns:
+            uint8 array of shape (height, width) or None if decoding fails
+        """
+        try:
+            if not jpeg_bytes or len(jpeg_bytes) > self.MAX_FRAME_SIZE:
+                logger.warning("Invalid frame data size")
+                return None
+            
+            target_w, target_h = size
+            scale, flag = 1, cv2.IMREAD_GRAYSCALE
+            dims = jpeg_dimensions(jpeg_bytes)
+            if dims is not None:
+                region_w = roi["width"] if roi else dims[0]
+                region_h = roi["height"] if roi else dims[1]
+                for factor, reduced_flag in _REDUCED_GRAYSCALE_FLAGS:
+                    if region_w // factor >= target_w and region_h // factor >= target_h:
+                        scale, flag = factor, reduced_flag
+                        break
+            
+            frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), flag)
+            if frame is None:
+                logger.warning("Failed to decode JPEG frame")
+                return None
+            
+            return self._crop_and_resize(frame, size, roi, scale)
+            
+        except Exception as e:
+            logger.error(f"Error decoding mouth frame: {e}")
+            return None
+    
+    def decode_gray(self, jpeg_bytes: Union[bytes, memoryview], min_width: int = 320) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Decode a JPEG to grayscale at the largest reduced scale that keeps it at least `min_width` wide
+        
+        Used for mouth tracking, which needs the whole frame but not its full resolution.
+        
+        Returns:
+            (uint8 array or None if decoding fails, scale factor to full resolution)
+        """
+        try:
+            if not jpeg_bytes or len(jpeg_bytes) > self.MAX_FRAME_SIZE:
+                logger.warning("Invalid frame data size")
+                return None, 1
+            
+            scale, flag = 1, cv2.IMREAD_GRAYSCALE
+            dims = jpeg_dimensions(jpeg_bytes)
+            if dims is not None:
+                for factor, reduced_flag in _REDUCED_GRAYSCALE_FLAGS:
+                    if dims[0] // factor >= min_width:
+                        scale, flag = factor, reduced_flag
+                        break
+            
+            frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), flag)
+            if frame is None:
+                logger.warning("Failed to decode JPEG frame")
+                return None, 1
+            return frame, scale
+            
+        except Exception as e:
+            logger.error(f"Error decoding frame: {e}")
+            return None, 1
+    
+    def decode_mouth_frame_base64(self, frame_data: str, size: Tuple[int, int] = (140, 46),
+                                  roi: Optional[Dict[str, int]] = None) -> Optional[np.ndarray]:
+        """Base64 variant of `decode_mouth_frame` for JSON frame messages"""
+        try:
+            if not frame_data or len(frame_data) > self.MAX_FRAME_SIZE:
+                logger.warning("Invalid frame data size")
+                return None
+            return self.decode_mouth_frame(base64.b64decode(frame_data), size, roi)
         except Exception as e:
             logger.error(f"Error decoding frame: {e}")
             return None
     
+    def mouth_frame_from_gray(self, pixels: Union[bytes, memoryview], width: int, height: int,
+                              size: Tuple[int, int] = (140, 46),
+                              roi: Optional[Dict[str, int]] = None) -> Optional[np.ndarray]:
+        """Crop and resize a raw grayscale frame to the model frame size"""
+        frame = self.decode_raw_gray(pixels, width, height)
+        if frame is None:
+            return None
+        return self._crop_and_resize(frame, size, roi, 1)
+    
+    def crop_mouth(self, frame: np.ndarray, roi: Optional[Dict[str, int]],
+                   size: Tuple[int, int] = (140, 46)) -> Optional[np.ndarray]:
+        """Crop an already decoded grayscale frame to the ROI and resize to the model frame size"""
+        return self._crop_and_resize(frame, size, roi, 1)
+    
+    @staticmethod
+    def _crop_and_resize(frame: np.ndarray, size: Tuple[int, int], roi: Optional[Dict[str, int]],
+                         scale: int) -> Optional[np.ndarray]:
+        """Crop a (possibly reduced-scale) frame to the ROI and resize to `size`"""
+        if roi:
+            h, w = frame.shape[:2]
+            x1 = min(max(0, roi["x"] // scale), w)
+            y1 = min(max(0, roi["y"] // scale), h)
+            x2 = min(w, x1 + max(1, roi["width"] // scale))
+            y2 = min(h, y1 + max(1, roi["height"] // scale))
+            frame = frame[y1:y2, x1:x2]
+            if frame.size == 0:
+                logger.warning("ROI lies outside the frame")
+                return None
+        
+        target_w, target_h = size
+        if frame.shape[1] == target_w and frame.shape[0] == target_h:
+            return np.ascontiguousarray(frame)
+        
+        shrinking = frame.shape[1] >= target_w and frame.shape[0] >= target_h
+        interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+        return cv2.resize(frame, (target_w, target_h), interpolation=interpolation)
+    
     def encode_frame(self, frame: np.ndarray, quality: int = 80) -> Optional[str]:
         """
         Encode numpy array frame to base64 JPEG string
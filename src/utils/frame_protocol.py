@@ -0,0 +1,110 @@
+"""
+Binary WebSocket frame protocol
+
+A binary message is a fixed little-endian header followed by the frame
+payload (raw JPEG bytes or raw 8-bit grayscale pixels):
+
+    offset  size  field
+    0       1     message type (1 = JPEG frame, 2 = raw grayscale frame)
+    1       1     flags (bit 0: ROI fields are valid, bit 1: payload is the mouth crop)
+    2       2     reserved (0)
+    4       4     sequence number (uint32)
+    8       8     capture timestamp in milliseconds (float64)
+    16      8     ROI x, y, width, height (4 x uint16)
+    24      4     frame width, height (2 x uint16, raw grayscale only)
+    28      ...   payload
+"""
+
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<BBHId4H2H")
+HEADER_SIZE = HEADER.size
+
+MSG_JPEG_FRAME = 1
+MSG_RAW_GRAY_FRAME = 2
+
+FLAG_HAS_ROI = 0x01
+FLAG_MOUTH_CROP = 0x02  # client already cropped the server-provided mouth ROI
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+SUPPORTED_PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+
+@dataclass
+class BinaryFrame:
+    """A parsed binary frame message; `payload` is a zero-copy view"""
+
+    msg_type: int
+    seq: int
+    timestamp_ms: float
+    payload: memoryview
+    roi: Optional[Dict[str, int]] = None
+    width: int = 0
+    height: int = 0
+    mouth_crop: bool = False
+
+
+def parse_binary_frame(data: bytes) -> BinaryFrame:
+    """
+    Parse a binary frame message
+
+    Args:
+        data: Raw WebSocket binary message
+
+    Returns:
+        Parsed BinaryFrame
+
+    Raises:
+        ValueError: If the message is truncated or malformed
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Binary message shorter than {HEADER_SIZE}-byte header")
+
+    (msg_type, flags, _reserved, seq, timestamp_ms,
+     roi_x, roi_y, roi_w, roi_h, width, height) = HEADER.unpack_from(data, 0)
+
+    if msg_type not in (MSG_JPEG_FRAME, MSG_RAW_GRAY_FRAME):
+        raise ValueError(f"Unknown binary message type: {msg_type}")
+
+    payload = memoryview(data)[HEADER_SIZE:]
+
+    if msg_type == MSG_RAW_GRAY_FRAME and len(payload) != width * height:
+        raise ValueError(
+            f"Raw grayscale payload is {len(payload)} bytes, expected {width}x{height}"
+        )
+
+    roi = None
+    if flags & FLAG_HAS_ROI and roi_w > 0 and roi_h > 0:
+        roi = {"x": roi_x, "y": roi_y, "width": roi_w, "height": roi_h}
+
+    return BinaryFrame(
+        msg_type=msg_type,
+        seq=seq,
+        timestamp_ms=timestamp_ms,
+        payload=payload,
+        roi=roi,
+        width=width,
+        height=height,
+        mouth_crop=bool(flags & FLAG_MOUTH_CROP),
+    )
+
+
+def pack_binary_frame(msg_type: int, payload: bytes, seq: int = 0, timestamp_ms: float = 0.0,
+                      roi: Optional[Dict[str, Any]] = None, width: int = 0, height: int = 0,
+                      mouth_crop: bool = False) -> bytes:
+    """Build a binary frame message (used by test clients and tools)"""
+    flags = FLAG_MOUTH_CROP if mouth_crop else 0
+    roi_values = (0, 0, 0, 0)
+    if roi:
+        flags |= FLAG_HAS_ROI
+        roi_values = (int(roi["x"]), int(roi["y"]), int(roi["width"]), int(roi["height"]))
+
+    header = HEADER.pack(msg_type, flags, 0, seq & 0xFFFFFFFF, timestamp_ms,
+                         *roi_values, width, height)
+    return header + bytes(payload)
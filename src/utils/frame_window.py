@@ -0,0 +1,90 @@
+"""
+Sliding frame window for streaming lip-reading sessions
+"""
+
+import logging
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameWindow:
+    """Preallocated uint8 ring buffer holding the last N mouth frames of a session"""
+
+    def __init__(self, size: int = 75, height: int = 46, width: int = 140, stride: int = 5) -> None:
+        if size <= 0 or stride <= 0:
+            raise ValueError("size and stride must be positive")
+
+        self.size = size
+        self.stride = stride
+        self._buffer = np.zeros((size, height, width), dtype=np.uint8)
+        self._pos = 0
+        self.count = 0
+        self.total = 0
+        self._since_inference = 0
+
+    @property
+    def frame_shape(self):
+        return self._buffer.shape[1:]
+
+    @property
+    def is_full(self) -> bool:
+        return self.count == self.size
+
+    def push(self, frame: np.ndarray) -> None:
+        """
+        Append a preprocessed (H, W) mouth frame, overwriting the oldest one
+
+        Args:
+            frame: Grayscale frame matching the window frame shape
+        """
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Expected frame shape {self.frame_shape}, got {frame.shape}")
+
+        np.copyto(self._buffer[self._pos], frame, casting="unsafe")
+        self._pos = (self._pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.total += 1
+        self._since_inference += 1
+
+    def should_infer(self) -> bool:
+        """Return True once `stride` new frames arrived since the last inference"""
+        return self.count > 0 and self._since_inference >= self.stride
+
+    def mark_inferred(self) -> None:
+        self._since_inference = 0
+
+    def snapshot(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Copy the window into chronological order (oldest first)
+
+        While the window is still filling, the front is padded with the
+        oldest available frame so the result always has `size` frames.
+
+        Args:
+            out: Optional preallocated (size, H, W) uint8 destination
+
+        Returns:
+            Array of shape (size, H, W), dtype uint8
+        """
+        if out is None:
+            out = np.empty_like(self._buffer)
+
+        if self.count == 0:
+            out.fill(0)
+        elif self.is_full:
+            tail = self.size - self._pos
+            out[:tail] = self._buffer[self._pos:]
+            out[tail:] = self._buffer[:self._pos]
+        else:
+            pad = self.size - self.count
+            out[:pad] = self._buffer[0]
+            out[pad:] = self._buffer[:self.count]
+
+        return out
+
+    def reset(self) -> None:
+        self._pos = 0
+        self.count = 0
+        self._since_inference = 0
@@ -0,0 +1,63 @@
+"""
+Windowed inference helpers for clips longer than the model window
+A long clip is split into overlapping fixed-size windows at its native frame
+rate. The windows are batched through the model, and each frame's
+probabilities are taken from the window whose center is closest to it. The
+model sees the least padding and the most context on both sides there.
+"""
+
+import logging
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def window_starts(num_frames: int, size: int = 75, hop: int = 50) -> List[int]:
+    """
+    Start frames of overlapping windows covering `num_frames`
+
+    Windows advance by `hop`; the last one is aligned to the end of the clip
+    so no window needs padding unless the clip is shorter than `size`.
+    """
+    if hop <= 0 or hop > size:
+        raise ValueError("hop must be in (0, size]")
+    if num_frames <= size:
+        return [0]
+    starts = list(range(0, num_frames - size, hop))
+    starts.append(num_frames - size)
+    return starts
+
+
+def stack_windows(frames: np.ndarray, starts: Sequence[int], size: int = 75) -> np.ndarray:
+    """(W,size,H,W) batch of windows cut from a (N,H,W) clip; short clips repeat their last frame"""
+    if len(frames) < size:
+        padding = np.repeat(frames[-1:], size - len(frames), axis=0)
+        frames = np.concatenate([frames, padding], axis=0)
+    return np.stack([frames[start:start + size] for start in starts])
+
+
+def merge_central(probs: np.ndarray, starts: Sequence[int], num_frames: int) -> np.ndarray:
+    """
+    Merge per-window outputs into one (num_frames,V) sequence
+
+    Args:
+        probs: (W,size,V) model outputs, one row per window
+        starts: Start frame of each window, ascending
+        num_frames: Length of the clip
+
+    Returns:
+        Per-frame probabilities, each taken from the window whose center is closest
+    """
+    size = probs.shape[1]
+    centers = np.asarray(starts, dtype=np.float64) + (size - 1) / 2.0
+    # Window i owns the frames between the midpoints to its neighbours' centers
+    bounds = np.concatenate([[0], np.ceil((centers[:-1] + centers[1:]) / 2.0), [num_frames]]).astype(int)
+
+    merged = np.empty((num_frames, probs.shape[2]), dtype=probs.dtype)
+    for i, start in enumerate(starts):
+        lo, hi = bounds[i], min(bounds[i + 1], num_frames)
+        if hi > lo:
+            merged[lo:hi] = probs[i, lo - start:hi - start]
+    return merged
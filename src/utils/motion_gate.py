@@ -0,0 +1,84 @@
+"""
+Lip-activity gate for streaming sessions
+Scores every mouth crop by its motion energy: the mean absolute difference
+from the previous crop, after removing the frame-wide brightness change so
+exposure flicker does not count as articulation. A window is only worth a
+forward pass when enough of its new frames move.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """Per-session motion energies over the last `size` mouth frames"""
+
+    def __init__(self, size: int = 75, threshold: float = 2.0, min_active_frames: int = 2) -> None:
+        """
+        Args:
+            size: Frames in the inference window
+            threshold: Motion energy (mean abs grey-level change) above which a frame counts as active
+            min_active_frames: Active frames needed for a stretch of frames to count as speech
+        """
+        if size <= 0:
+            raise ValueError("size must be positive")
+
+        self.threshold = threshold
+        self.min_active_frames = max(1, min_active_frames)
+        self._energies = np.zeros(size, dtype=np.float32)
+        self._pos = 0
+        self._previous: np.ndarray = None
+        self._since_check = 0
+
+        # Stats
+        self.windows_checked = 0
+        self.windows_skipped = 0
+
+    def push(self, frame: np.ndarray) -> float:
+        """Score a (H,W) uint8 mouth frame against the previous one and return its energy"""
+        energy = 0.0
+        if self._previous is not None and self._previous.shape == frame.shape:
+            diff = frame.astype(np.int16) - self._previous
+            # Global brightness shifts move every pixel alike; only local change is articulation
+            energy = float(np.mean(np.abs(diff - diff.mean())))
+        self._previous = frame.astype(np.int16)
+
+        self._energies[self._pos] = energy
+        self._pos = (self._pos + 1) % len(self._energies)
+        self._since_check = min(self._since_check + 1, len(self._energies))
+        return energy
+
+    def _active(self, energies: np.ndarray) -> bool:
+        return int(np.count_nonzero(energies > self.threshold)) >= self.min_active_frames
+
+    def check(self) -> Tuple[bool, bool]:
+        """
+        Decide whether the frames since the last check justify inference
+
+        Returns:
+            (new frames are active, any speech left in the window)
+        """
+        recent = np.roll(self._energies, -self._pos)[len(self._energies) - self._since_check:]
+        self._since_check = 0
+        new_active = self._active(recent)
+        self.windows_checked += 1
+        if not new_active:
+            self.windows_skipped += 1
+        return new_active, new_active or self._active(self._energies)
+
+    def reset(self) -> None:
+        self._energies[:] = 0
+        self._previous = None
+        self._since_check = 0
+
+    def stats(self):
+        return {
+            "motion_threshold": self.threshold,
+            "windows_checked": self.windows_checked,
+            "windows_skipped": self.windows_skipped,
+            "skip_rate": self.windows_skipped / self.windows_checked if self.windows_checked else 0.0,
+        }
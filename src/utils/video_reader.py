@@ -0,0 +1,181 @@
+"""
+Video reading utilities
+Decodes only the frames that will be used and overlaps decoding with
+preprocessing by running the capture loop in a background thread.
+"""
+
+import logging
+import queue
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# GRID-dataset mouth crop: (y1, y2, x1, x2)
+DEFAULT_MOUTH_CROP = (190, 236, 80, 220)
+
+_END = object()
+
+
+def crop_mouth_frame(frame: np.ndarray, crop: Tuple[int, int, int, int] = DEFAULT_MOUTH_CROP,
+                     size: Tuple[int, int] = (140, 46)) -> np.ndarray:
+    """Crop a BGR frame, convert it to grayscale and resize to `size` (width, height)."""
+    y1, y2, x1, x2 = crop
+    h, w = frame.shape[:2]
+    # Clamp crop to frame bounds
+    y1c, y2c = max(0, y1), min(h, y2)
+    x1c, x2c = max(0, x1), min(w, x2)
+    cropped = frame[y1c:y2c, x1c:x2c]
+    gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
+    if gray.shape[1] != size[0] or gray.shape[0] != size[1]:
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_LINEAR)
+    return gray
+
+
+def sample_indices(frame_count: int, target_frames: int) -> np.ndarray:
+    """Indices of the frames kept when sampling a clip uniformly down to `target_frames`."""
+    if frame_count <= target_frames:
+        return np.arange(frame_count)
+    return np.linspace(0, frame_count - 1, target_frames).astype(int)
+
+
+def _decode_worker(cap: cv2.VideoCapture, wanted: Optional[Counter], last: Optional[int], out: queue.Queue,
+                   stop: threading.Event, status: Dict[str, Any]) -> None:
+    """Capture loop: grab every frame up to `last`, retrieve (decode) only the wanted ones.
+
+    Records in `status` how many source frames were read and whether the
+    stream continued past `last`.
+    """
+    index = 0
+    try:
+        while not stop.is_set():
+            if last is not None and index > last:
+                # Probe one more frame: a container that under-reports its frame count
+                status["more"] = bool(cap.grab())
+                break
+            if wanted is not None and index not in wanted:
+                # grab() advances the demuxer without the colour conversion of retrieve()
+                if not cap.grab():
+                    break
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                out.put((index, frame))
+            index += 1
+    except Exception:
+        logger.exception("Error decoding video frames")
+    finally:
+        status["frames_read"] = index
+        out.put(_END)
+
+
+def video_fps(video_path: str, default: float = 25.0) -> float:
+    """Frame rate reported by the container, or `default` when it is missing"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+    finally:
+        cap.release()
+    return fps if fps and fps > 0 else default
+
+
+def _read_frames(cap: cv2.VideoCapture, wanted: Optional[Counter], last: Optional[int],
+                 transform: Optional[Callable[[np.ndarray], np.ndarray]],
+                 prefetch: int) -> Tuple[List[np.ndarray], Dict[str, Any]]:
+    """Decode in a background thread and transform in this one; releases `cap`."""
+    out: queue.Queue = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    status: Dict[str, Any] = {"frames_read": 0, "more": False}
+    worker = threading.Thread(target=_decode_worker, args=(cap, wanted, last, out, stop, status),
+                              name="video-decode", daemon=True)
+    worker.start()
+
+    frames: List[np.ndarray] = []
+    try:
+        while True:
+            item = out.get()
+            if item is _END:
+                break
+            index, frame = item
+            processed = transform(frame) if transform is not None else frame
+            frames.extend([processed] * (wanted[index] if wanted is not None else 1))
+    finally:
+        stop.set()
+        # Unblock the worker if it is waiting on a full queue
+        while worker.is_alive():
+            try:
+                out.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.05)
+        cap.release()
+    return frames, status
+
+
+def read_video_frames(video_path: str, target_frames: Optional[int] = None,
+                      transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                      prefetch: int = 16, max_frames: Optional[int] = None) -> Optional[List[np.ndarray]]:
+    """
+    Read (a uniform sample of) a video's frames, pipelining decode and transform
+
+    When the container reports a frame count, only the sampled frames are
+    decoded; the rest are skipped with `grab()`. Otherwise every frame is
+    decoded and the sample is taken afterwards. Frame counts are estimates for
+    some containers (webm, variable frame rate): if the stream ends before the
+    last sampled frame or continues past it, the video is read again in full
+    and sampled over the frames actually decoded.
+
+    Args:
+        video_path: Path to the video file
+        target_frames: Sample down to this many frames; None keeps every frame
+        transform: Per-frame preprocessing, run while the next frames decode
+        prefetch: Decoded frames buffered between the two threads
+        max_frames: Stop after this many source frames (only without `target_frames`)
+
+    Returns:
+        List of transformed frames in order, or None if the video can't be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error("Could not open video: %s", video_path)
+        return None
+
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if target_frames is not None and frame_count > target_frames:
+        # Counts duplicates so repeated indices are emitted repeatedly
+        wanted = Counter(int(i) for i in sample_indices(frame_count, target_frames))
+        last = max(wanted)
+        frames, status = _read_frames(cap, wanted, last, transform, prefetch)
+        if status["frames_read"] > last and not status["more"]:
+            return frames
+
+        logger.info(
+            f"{video_path}: container reported {frame_count} frames but "
+            f"{'more' if status['more'] else status['frames_read']} were readable; reading in full"
+        )
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            logger.error("Could not reopen video: %s", video_path)
+            return None
+        frames, _ = _read_frames(cap, None, None, transform, prefetch)
+    else:
+        last = max_frames - 1 if target_frames is None and max_frames is not None else None
+        frames, _ = _read_frames(cap, None, last, transform, prefetch)
+
+    if target_frames is not None and len(frames) > target_frames:
+        # Sample over the frames actually decoded
+        frames = [frames[i] for i in sample_indices(len(frames), target_frames)]
+
+    return frames
+
+
+def pad_frames(frames: Sequence[np.ndarray], target_frames: int) -> List[np.ndarray]:
+    """Pad a clip to `target_frames` by repeating its last frame."""
+    frames = list(frames)
+    if frames and len(frames) < target_frames:
+        frames.extend([frames[-1]] * (target_frames - len(frames)))
+    return frames